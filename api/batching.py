@@ -0,0 +1,161 @@
+"""Server-side micro-batching of concurrent single-row predictions."""
+import asyncio
+import os
+import time
+from typing import Callable
+import numpy as np
+from executor import (
+    INFERENCE_TIMEOUT_SECONDS, ExecutorSaturatedError, InferenceExecutor, InferenceTimeoutError
+)
+from logger import get_logger
+from metrics import MICROBATCH_BATCH_SIZE, MICROBATCH_QUEUE_DEPTH, MICROBATCH_WAIT_SECONDS
+
+logger = get_logger(__name__)
+
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_MAX_QUEUE = int(os.getenv("MICROBATCH_MAX_QUEUE", "1024"))
+
+
+class MicroBatcher:
+    """
+    Collects single-row prediction requests into small batches.
+
+    Requests are queued with their feature row. A background task waits for
+    up to ``max_wait_ms`` (or until ``max_batch_size`` rows are queued), runs
+    one vectorized ``predict_fn`` call in a worker thread and resolves each
+    request's future with its own prediction. Extra arguments given to
+    ``submit`` are passed on to ``predict_fn`` after the matrix; rows
+    submitted with different arguments (e.g. another model version) are
+    scored in separate calls.
+
+    When ``executor`` is given, batches run on that bounded pool; otherwise
+    on the event loop's default executor. At most ``max_queue`` rows may
+    wait at once and each caller waits at most ``timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[..., np.ndarray],
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+        max_queue: int = MICROBATCH_MAX_QUEUE,
+        timeout: float = INFERENCE_TIMEOUT_SECONDS,
+        executor: InferenceExecutor = None
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.executor = executor
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._in_flight = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def submit(self, row: np.ndarray, *args):
+        """
+        Queue one feature row and wait for its prediction by ``predict_fn(X, *args)``.
+
+        Raises:
+            ExecutorSaturatedError: If too many rows are already queued.
+            InferenceTimeoutError: If the prediction does not arrive in time.
+        """
+        if self._queue.qsize() >= self.max_queue:
+            raise ExecutorSaturatedError("Prediction queue is full. Retry later.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, args, future, time.perf_counter()))
+        MICROBATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as e:
+            raise InferenceTimeoutError("Prediction did not finish in time.") from e
+
+    def start(self):
+        """Start the background batching task on the running event loop."""
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+                f"max_wait_ms={self.max_wait * 1000:.1f})"
+            )
+
+    async def stop(self):
+        """Stop the batching task and fail any request still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped."))
+        MICROBATCH_QUEUE_DEPTH.set(0)
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        MICROBATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    async def _dispatch(self, batch: list):
+        X = np.stack([row for row, _, _, _ in batch])
+        args = batch[0][1]
+        try:
+            if self.executor is not None:
+                predictions = await self.executor.run(self.predict_fn, X, *args)
+            else:
+                predictions = await asyncio.get_running_loop().run_in_executor(
+                    None, self.predict_fn, X, *args
+                )
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), value in zip(batch, predictions):
+            # The caller may have gone away (e.g. cancelled request)
+            if not future.done():
+                future.set_result(value)
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            dispatched = time.perf_counter()
+            for _, _, _, enqueued in batch:
+                MICROBATCH_WAIT_SECONDS.observe(dispatched - enqueued)
+
+            # Rows are grouped by the identity of their arguments, which need not be hashable
+            groups = {}
+            for item in batch:
+                groups.setdefault(tuple(map(id, item[1])), []).append(item)
+            for group in groups.values():
+                MICROBATCH_BATCH_SIZE.observe(len(group))
+                # Keep collecting while this batch runs; the executor bounds concurrency
+                task = asyncio.get_running_loop().create_task(self._dispatch(group))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
@@ -0,0 +1,169 @@
+"""Asynchronous capture of served requests and predictions to compressed JSONL."""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import numpy as np
+from logger import get_logger
+from metrics import (
+    CAPTURE_BUFFERED, CAPTURE_DROPPED, CAPTURE_FLUSH_SECONDS, CAPTURE_RECORDS, CAPTURE_SEGMENTS
+)
+from models import FEATURE_COLUMNS
+
+logger = get_logger(__name__)
+
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+# Entries held in memory; a batch request is one entry
+CAPTURE_BUFFER_SIZE = int(os.getenv("CAPTURE_BUFFER_SIZE", "100000"))
+CAPTURE_FLUSH_INTERVAL_SECONDS = float(os.getenv("CAPTURE_FLUSH_INTERVAL_SECONDS", "5"))
+# A new segment is started once the current one reaches this size or age
+CAPTURE_SEGMENT_MAX_MB = float(os.getenv("CAPTURE_SEGMENT_MAX_MB", "64"))
+CAPTURE_SEGMENT_MAX_SECONDS = float(os.getenv("CAPTURE_SEGMENT_MAX_SECONDS", "3600"))
+# Level 1 compresses about 3x faster than 6 for roughly a third more bytes
+CAPTURE_COMPRESS_LEVEL = int(os.getenv("CAPTURE_COMPRESS_LEVEL", "1"))
+
+
+class RequestCapture:
+    """
+    Records every prediction in a bounded in-memory buffer and writes it out in batches.
+
+    ``record`` only appends a tuple of references to a deque, so the request
+    path pays well under a microsecond and never touches the disk. A
+    background thread drains the buffer every ``flush_interval`` seconds,
+    serializes the entries to JSON lines and appends them as one gzip member
+    to the current segment, ``capture-<UTC time>-<pid>.jsonl.gz``. Segments
+    roll over by compressed size or age. When the buffer is full new entries
+    are dropped and counted instead of slowing requests down.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CAPTURE_ENABLED,
+        directory: str = CAPTURE_DIR,
+        buffer_size: int = CAPTURE_BUFFER_SIZE,
+        flush_interval: float = CAPTURE_FLUSH_INTERVAL_SECONDS,
+        segment_max_mb: float = CAPTURE_SEGMENT_MAX_MB,
+        segment_max_seconds: float = CAPTURE_SEGMENT_MAX_SECONDS,
+        compress_level: int = CAPTURE_COMPRESS_LEVEL
+    ):
+        self.enabled = enabled
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.segment_max_bytes = segment_max_mb * 1024 * 1024
+        self.segment_max_seconds = segment_max_seconds
+        self.compress_level = compress_level
+        self._buffer = deque()
+        self._segment = None
+        self._segment_started = 0.0
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def record(self, endpoint: str, features: np.ndarray, predictions, version, latency: float, **columns):
+        """
+        Queue one request for capture.
+
+        Args:
+            features: The request's feature row, or matrix for a batch request.
+            predictions: A float, or an array with one value per row.
+            latency: Seconds from request arrival to response.
+            columns: Extra fields for every line; arrays hold one value per row.
+        """
+        if len(self._buffer) >= self.buffer_size:
+            CAPTURE_DROPPED.labels(reason="buffer_full").inc()
+            return
+        # deque.append is atomic, so the flush thread can drain concurrently
+        self._buffer.append((time.time(), endpoint, features, predictions, version, latency, columns))
+
+    @staticmethod
+    def _lines(entry):
+        timestamp, endpoint, features, predictions, version, latency, columns = entry
+        rows = np.atleast_2d(features).tolist()
+        values = np.atleast_1d(predictions).tolist()
+        common = {
+            "timestamp": timestamp, "endpoint": endpoint, "model_version": version,
+            "latency_ms": round(latency * 1000, 3),
+        }
+        per_row = {}
+        for name, value in columns.items():
+            if isinstance(value, np.ndarray):
+                per_row[name] = value.tolist()
+            else:
+                common[name] = value
+        for i, (row, value) in enumerate(zip(rows, values)):
+            extra = {name: column[i] for name, column in per_row.items()}
+            yield json.dumps({
+                **common, **extra, "features": dict(zip(FEATURE_COLUMNS, row)), "prediction": value
+            })
+
+    def _segment_path(self) -> str:
+        now = time.time()
+        if (
+            self._segment is None
+            or now - self._segment_started >= self.segment_max_seconds
+            or (os.path.exists(self._segment) and os.path.getsize(self._segment) >= self.segment_max_bytes)
+        ):
+            stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%dT%H%M%S")
+            self._segment = os.path.join(self.directory, f"capture-{stamp}-{os.getpid()}.jsonl.gz")
+            self._segment_started = now
+            CAPTURE_SEGMENTS.inc()
+        return self._segment
+
+    def flush(self) -> int:
+        """
+        Write every buffered entry to the current segment.
+
+        Returns:
+            Number of lines written.
+        """
+        with self._flush_lock:
+            CAPTURE_BUFFERED.set(len(self._buffer))
+            entries = [self._buffer.popleft() for _ in range(len(self._buffer))]
+            if not entries:
+                return 0
+            started = time.perf_counter()
+            lines = [line for entry in entries for line in self._lines(entry)]
+            payload = gzip.compress(("\n".join(lines) + "\n").encode(), self.compress_level)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # Each flush appends a complete gzip member; readers see one continuous stream
+                with open(self._segment_path(), "ab") as f:
+                    f.write(payload)
+            except OSError as e:
+                CAPTURE_DROPPED.labels(reason="write_error").inc(len(lines))
+                logger.error(f"Failed to write {len(lines)} captured predictions: {e}")
+                return 0
+            CAPTURE_RECORDS.inc(len(lines))
+            CAPTURE_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            return len(lines)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """Start the background flush thread."""
+        if self.enabled and self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="request-capture", daemon=True)
+            self._thread.start()
+            logger.info(f"Capturing predictions to {self.directory}")
+
+    def stop(self):
+        """Stop the flush thread and write out what is still buffered."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+request_capture = RequestCapture()
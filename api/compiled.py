@@ -0,0 +1,115 @@
+"""Pure NumPy evaluator for models compiled by src/compile_model.py."""
+import os
+import numpy as np
+
+# Trees with at most this many nodes get private Python lists for faster single-row scoring;
+# larger trees are walked in their (possibly shared, memory-mapped) arrays
+COMPILED_ROW_LIST_MAX_NODES = int(os.getenv("COMPILED_ROW_LIST_MAX_NODES", "4096"))
+
+
+class CompiledModel:
+    """
+    Scores a float feature matrix with a compiled linear model or tree.
+
+    Exposes the same ``predict`` interface as the pyfunc model so the rest
+    of the API does not care which one it is serving.
+    """
+
+    def __init__(self, arrays):
+        self.kind = str(arrays["kind"])
+        if self.kind == "linear":
+            self.coef = np.ascontiguousarray(arrays["coef"], dtype=np.float64)
+            self.intercept = float(arrays["intercept"])
+        elif self.kind == "tree":
+            self.feature = np.asarray(arrays["feature"], dtype=np.intp)
+            self.threshold = np.asarray(arrays["threshold"], dtype=np.float64)
+            self.left = np.asarray(arrays["left"], dtype=np.intp)
+            self.right = np.asarray(arrays["right"], dtype=np.intp)
+            self.value = np.asarray(arrays["value"], dtype=np.float64)
+            self.max_depth = int(arrays["max_depth"])
+            self.float32_features = bool(arrays.get("float32_features", True))
+            # Scaler fused in front of the tree; its thresholds are in scaled space
+            self.mean = self.scale = None
+            if "mean" in arrays:
+                self.mean = np.asarray(arrays["mean"], dtype=np.float64)
+                self.scale = np.asarray(arrays["scale"], dtype=np.float64)
+            self._nodes = self._values = None
+            if len(self.feature) <= COMPILED_ROW_LIST_MAX_NODES:
+                # Python lists make single-row traversal cheaper than NumPy indexing
+                self._nodes = list(zip(
+                    self.feature.tolist(), self.threshold.tolist(),
+                    self.left.tolist(), self.right.tolist()
+                ))
+                self._values = self.value.tolist()
+        else:
+            raise ValueError(f"Unknown compiled model kind: {self.kind}")
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledModel":
+        """
+        Load a compiled .npz file, or a directory written by ``extract``.
+
+        Arrays in a directory are memory-mapped read-only, so every process
+        that loads the same directory shares one copy through the page cache.
+        """
+        if os.path.isdir(path):
+            return cls({
+                os.path.splitext(name)[0]: np.load(os.path.join(path, name), mmap_mode="r")
+                for name in os.listdir(path) if name.endswith(".npy")
+            })
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    @staticmethod
+    def extract(npz_path: str, target_dir: str) -> str:
+        """Unpack a compiled .npz into one memory-mappable .npy file per array."""
+        os.makedirs(target_dir, exist_ok=True)
+        with np.load(npz_path, allow_pickle=False) as arrays:
+            for name in arrays.files:
+                np.save(os.path.join(target_dir, f"{name}.npy"), arrays[name])
+        return target_dir
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if self.kind == "linear":
+            return X @ self.coef + self.intercept
+        if self.mean is not None:
+            # The same float64 operations as StandardScaler.transform, so the float32 cast below matches
+            X = (X - self.mean) / self.scale
+        if self.float32_features:
+            # scikit-learn trees compare float32 features against their thresholds
+            X = X.astype(np.float32)
+        if X.shape[0] == 1:
+            return np.array([self._predict_row(X[0].tolist())])
+        return self._predict_tree(X)
+
+    def _predict_row(self, row) -> float:
+        if self._nodes is None:
+            return self._predict_row_arrays(row)
+        node = 0
+        feature, threshold, left, right = self._nodes[0]
+        while left != -1:
+            node = left if row[feature] <= threshold else right
+            feature, threshold, left, right = self._nodes[node]
+        return self._values[node]
+
+    def _predict_row_arrays(self, row) -> float:
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        node = 0
+        while left[node] != -1:
+            node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+        return float(self.value[node])
+
+    def _predict_tree(self, X: np.ndarray) -> np.ndarray:
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(is_leaf, node, np.where(go_left, left, self.right[node]))
+        return self.value[node]
@@ -0,0 +1,249 @@
+"""Online drift monitoring of served features against the training reference."""
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from logger import get_logger
+from metrics import (
+    DRIFT_KS, DRIFT_MEAN_SHIFT, DRIFT_PSI, DRIFT_RETRAIN_TRIGGERS, DRIFT_ROWS_DROPPED, DRIFT_STD_RATIO,
+    DRIFT_WINDOW_FILL
+)
+from model_loader import get_mlflow
+from models import FEATURE_COLUMNS
+
+logger = get_logger(__name__)
+
+DRIFT_ENABLED = os.getenv("DRIFT_ENABLED", "false").lower() == "true"
+# Local reference statistics; when unset they are taken from the served model version
+DRIFT_REFERENCE_PATH = os.getenv("DRIFT_REFERENCE_PATH", "")
+# Rows per comparison window; scores are published once MIN_ROWS are in
+DRIFT_WINDOW_ROWS = int(os.getenv("DRIFT_WINDOW_ROWS", "10000"))
+DRIFT_MIN_ROWS = int(os.getenv("DRIFT_MIN_ROWS", "1000"))
+DRIFT_UPDATE_INTERVAL_SECONDS = float(os.getenv("DRIFT_UPDATE_INTERVAL_SECONDS", "1"))
+DRIFT_BUFFER_SIZE = int(os.getenv("DRIFT_BUFFER_SIZE", "100000"))
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+DRIFT_KS_THRESHOLD = float(os.getenv("DRIFT_KS_THRESHOLD", "0.1"))
+# Directory watched by src/watch_and_train.py; retraining is only requested when set
+DRIFT_RETRAIN_DIR = os.getenv("DRIFT_RETRAIN_DIR", "")
+DRIFT_RETRAIN_COOLDOWN_SECONDS = float(os.getenv("DRIFT_RETRAIN_COOLDOWN_SECONDS", "3600"))
+# Model version tag set by src/select_best_and_register.py
+DRIFT_REFERENCE_TAG = "drift_reference_uri"
+RETRAIN_TRIGGER_SUFFIX = ".retrain.json"
+# Floor for empty bins so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def bin_counts(X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Per-feature bin counts, binned exactly like utils/drift_reference.py."""
+    n_features, n_bins = edges.shape[0], edges.shape[1] + 1
+    index = (X[:, :, None] > edges[None, :, :]).sum(axis=2)
+    offsets = np.arange(n_features) * n_bins
+    return np.bincount((index + offsets).ravel(), minlength=n_features * n_bins).reshape(n_features, n_bins)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Population stability index per feature of two (n_features, n_bins) proportion arrays."""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Kolmogorov-Smirnov distance per feature, evaluated at the bin edges."""
+    return np.abs(np.cumsum(expected, axis=1) - np.cumsum(actual, axis=1)).max(axis=1)
+
+
+class DriftMonitor:
+    """
+    Compares the distribution of served features with the training data.
+
+    The request path only appends the feature row to a deque, which is
+    O(1) and takes no lock. A background thread drains the deque every
+    ``update_interval`` seconds and folds the rows into the current window
+    in one vectorized step: mean and variance via Welford/Chan merging and
+    counts over the reference's fixed bins. Once the window holds
+    ``min_rows`` rows, per-feature PSI, binned KS, standardized mean shift
+    and standard deviation ratio are published as gauges. When ``window_rows`` rows are in, the
+    window is checked against the thresholds, at most one retraining
+    request per cooldown is written for the watcher, and a new window starts.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = DRIFT_ENABLED,
+        window_rows: int = DRIFT_WINDOW_ROWS,
+        min_rows: int = DRIFT_MIN_ROWS,
+        update_interval: float = DRIFT_UPDATE_INTERVAL_SECONDS,
+        buffer_size: int = DRIFT_BUFFER_SIZE,
+        psi_threshold: float = DRIFT_PSI_THRESHOLD,
+        ks_threshold: float = DRIFT_KS_THRESHOLD,
+        retrain_dir: str = DRIFT_RETRAIN_DIR,
+        retrain_cooldown: float = DRIFT_RETRAIN_COOLDOWN_SECONDS
+    ):
+        self.enabled = enabled
+        self.window_rows = window_rows
+        self.min_rows = min_rows
+        self.update_interval = update_interval
+        self.buffer_size = buffer_size
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.retrain_dir = retrain_dir
+        self.retrain_cooldown = retrain_cooldown
+        self.reference = None
+        self.scores = {}
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._last_trigger = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._reset_window()
+
+    def _reset_window(self):
+        n_features = len(FEATURE_COLUMNS)
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        n_bins = self.reference["edges"].shape[1] + 1 if self.reference else 1
+        self.counts = np.zeros((n_features, n_bins), dtype=np.int64)
+        DRIFT_WINDOW_FILL.set(0)
+
+    def set_reference(self, reference: dict):
+        """Install reference statistics (as written by utils/drift_reference.py) and restart the window."""
+        order = [reference["features"].index(name) for name in FEATURE_COLUMNS]
+        parsed = {
+            "mean": np.asarray(reference["mean"], dtype=np.float64)[order],
+            "std": np.sqrt(np.asarray(reference["var"], dtype=np.float64))[order],
+            "edges": np.asarray(reference["edges"], dtype=np.float64)[order],
+            "proportions": np.asarray(reference["proportions"], dtype=np.float64)[order],
+        }
+        with self._lock:
+            self.reference = parsed
+            self._reset_window()
+        logger.info(f"Drift reference loaded ({reference.get('count')} rows, {reference.get('created_at')})")
+
+    def load_reference(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            self.set_reference(json.load(f))
+
+    def on_model_swap(self, model_version):
+        """Follow the reference statistics tagged on a newly served model version."""
+        if DRIFT_REFERENCE_PATH:
+            return
+        reference_uri = (model_version.tags or {}).get(DRIFT_REFERENCE_TAG)
+        if not reference_uri:
+            logger.warning(f"Model version {model_version.version} has no drift reference; keeping the current one.")
+            return
+        self.load_reference(get_mlflow().artifacts.download_artifacts(artifact_uri=reference_uri))
+
+    def observe(self, features: np.ndarray):
+        """Queue a served feature row (or matrix) for the next update."""
+        if len(self._buffer) >= self.buffer_size:
+            DRIFT_ROWS_DROPPED.inc()
+            return
+        self._buffer.append(features)
+
+    def update(self) -> int:
+        """
+        Fold every queued row into the current window and publish scores.
+
+        Returns:
+            Number of rows processed.
+        """
+        entries = [self._buffer.popleft() for _ in range(len(self._buffer))]
+        if not entries or self.reference is None:
+            return 0
+        X = np.vstack([np.atleast_2d(entry) for entry in entries])
+        with self._lock:
+            n = X.shape[0]
+            mean = X.mean(axis=0)
+            total = self.count + n
+            delta = mean - self.mean
+            self.m2 = self.m2 + ((X - mean) ** 2).sum(axis=0) + delta ** 2 * self.count * n / total
+            self.mean = self.mean + delta * n / total
+            self.count = total
+            self.counts += bin_counts(X, self.reference["edges"])
+            DRIFT_WINDOW_FILL.set(self.count)
+            if self.count >= self.min_rows:
+                self._publish()
+            if self.count >= self.window_rows:
+                self._check_thresholds()
+                self._reset_window()
+        return X.shape[0]
+
+    def _publish(self):
+        actual = self.counts / self.count
+        expected = self.reference["proportions"]
+        scores = {
+            "psi": psi(expected, actual),
+            "ks": binned_ks(expected, actual),
+            "mean_shift": (self.mean - self.reference["mean"]) / np.maximum(self.reference["std"], 1e-12),
+            "std_ratio": np.sqrt(self.m2 / max(self.count - 1, 1)) / np.maximum(self.reference["std"], 1e-12),
+        }
+        self.scores = {name: dict(zip(FEATURE_COLUMNS, values.tolist())) for name, values in scores.items()}
+        for feature in FEATURE_COLUMNS:
+            DRIFT_PSI.labels(feature=feature).set(self.scores["psi"][feature])
+            DRIFT_KS.labels(feature=feature).set(self.scores["ks"][feature])
+            DRIFT_MEAN_SHIFT.labels(feature=feature).set(self.scores["mean_shift"][feature])
+            DRIFT_STD_RATIO.labels(feature=feature).set(self.scores["std_ratio"][feature])
+
+    def _check_thresholds(self):
+        if not self.scores:
+            return
+        drifted = sorted(
+            feature for feature in FEATURE_COLUMNS
+            if self.scores["psi"][feature] >= self.psi_threshold or self.scores["ks"][feature] >= self.ks_threshold
+        )
+        if not drifted:
+            return
+        logger.warning(f"Feature drift over {self.count} rows: {', '.join(drifted)}")
+        if self.retrain_dir:
+            self._request_retrain(drifted)
+
+    def _request_retrain(self, drifted: list):
+        """Drop a retraining request into the watcher's directory, at most once per cooldown."""
+        now = time.monotonic()
+        if self._last_trigger is not None and now - self._last_trigger < self.retrain_cooldown:
+            return
+        request = {"reason": "drift", "features": drifted, "rows": self.count, "scores": self.scores}
+        name = f"drift-{int(time.time())}-{os.getpid()}{RETRAIN_TRIGGER_SUFFIX}"
+        try:
+            os.makedirs(self.retrain_dir, exist_ok=True)
+            tmp_path = os.path.join(self.retrain_dir, f".{name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(request, f)
+            # Renamed into place so the watcher never reads a partial file
+            os.replace(tmp_path, os.path.join(self.retrain_dir, name))
+        except OSError as e:
+            logger.error(f"Failed to request retraining in {self.retrain_dir}: {e}")
+            return
+        self._last_trigger = now
+        DRIFT_RETRAIN_TRIGGERS.inc()
+        logger.warning(f"Requested retraining: {name}")
+
+    def _run(self):
+        while not self._stop_event.wait(self.update_interval):
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"Drift update failed: {e}")
+
+    def start(self):
+        """Load a configured local reference and start the update thread."""
+        if not self.enabled or self._thread is not None:
+            return
+        if DRIFT_REFERENCE_PATH:
+            self.load_reference(DRIFT_REFERENCE_PATH)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+drift_monitor = DriftMonitor()
@@ -0,0 +1,89 @@
+"""Bounded worker pool that keeps blocking inference off the event loop."""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logger import get_logger
+from metrics import INFERENCE_IN_FLIGHT, INFERENCE_REJECTED, INFERENCE_TIMEOUTS
+
+logger = get_logger(__name__)
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "5"))
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the pool already holds as many tasks as it may queue."""
+
+
+class InferenceTimeoutError(TimeoutError):
+    """Raised when a task does not finish within the per-request timeout."""
+
+
+class InferenceExecutor:
+    """
+    Thread pool with a bounded backlog and per-task timeouts.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue`` more
+    wait for a worker; further submissions are rejected immediately with
+    ExecutorSaturatedError so callers can shed load (HTTP 429) instead of
+    piling up latency. Awaiting callers give up after ``timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = INFERENCE_WORKERS,
+        max_queue: int = INFERENCE_QUEUE_SIZE,
+        timeout: float = INFERENCE_TIMEOUT_SECONDS
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks currently running or waiting for a worker."""
+        return self._in_flight
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            INFERENCE_IN_FLIGHT.set(self._in_flight)
+
+    async def run(self, fn, *args, timeout: float = None):
+        """
+        Run ``fn(*args)`` on the pool and await its result.
+
+        Raises:
+            ExecutorSaturatedError: If the backlog is full.
+            InferenceTimeoutError: If the task does not finish in time.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                INFERENCE_REJECTED.inc()
+                raise ExecutorSaturatedError("Inference queue is full. Retry later.")
+            self._in_flight += 1
+            INFERENCE_IN_FLIGHT.set(self._in_flight)
+
+        # The slot is held until the task really finishes, not just until we stop waiting
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout if timeout is not None else self.timeout
+            )
+        except asyncio.TimeoutError as e:
+            # Drops the task if it has not started yet; a running task finishes on its own
+            future.cancel()
+            INFERENCE_TIMEOUTS.inc()
+            raise InferenceTimeoutError("Inference did not finish in time.") from e
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+inference_executor = InferenceExecutor()
@@ -0,0 +1,27 @@
+"""Helpers that turn validated prediction requests into model input matrices."""
+from itertools import chain
+from operator import attrgetter
+from typing import Sequence
+import numpy as np
+from models import FEATURE_COLUMNS, ColumnarPredictionRequest, PredictionRequest
+
+_get_features = attrgetter(*FEATURE_COLUMNS)
+
+
+def requests_to_matrix(requests: Sequence[PredictionRequest]) -> np.ndarray:
+    """Build a contiguous (n_rows, n_features) float64 matrix from row requests."""
+    n_rows = len(requests)
+    flat = np.fromiter(
+        chain.from_iterable(map(_get_features, requests)),
+        dtype=np.float64,
+        count=n_rows * len(FEATURE_COLUMNS)
+    )
+    return flat.reshape(n_rows, len(FEATURE_COLUMNS))
+
+
+def columns_to_matrix(request: ColumnarPredictionRequest) -> np.ndarray:
+    """Build a contiguous (n_rows, n_features) float64 matrix from columnar arrays."""
+    X = np.empty((len(request), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, name in enumerate(FEATURE_COLUMNS):
+        X[:, i] = getattr(request, name)
+    return X
@@ -0,0 +1,44 @@
+"""Gunicorn settings for serving the API from several worker processes.
+
+Run from the api directory with ``gunicorn main:app -c gunicorn.conf.py``.
+The app is imported once in the master; the compiled model is unpacked
+there before the workers fork, and every worker memory-maps the same files,
+so N workers share one copy of the model. Prometheus samples from all
+workers are aggregated through PROMETHEUS_MULTIPROC_DIR."""
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = 30
+
+# Must be set before prometheus_client is imported by the app; stale files
+# from a previous run would be summed into the new counters
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "mlops-prometheus")
+)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def on_starting(server):
+    """Unpack the latest compiled model into the shared directory before forking."""
+    from logger import disable_rotation
+    from model_loader import model_cache
+    # The master and every worker append to the same log file
+    disable_rotation()
+    try:
+        path = model_cache.prefetch()
+        server.log.info(f"Shared model directory: {path}")
+    except Exception as e:
+        # Workers fall back to loading the model themselves
+        server.log.warning(f"Model prefetch failed: {e}")
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauge samples."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
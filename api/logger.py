@@ -1,8 +1,171 @@
+import atexit
+import itertools
+import json
 import os
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# One file handler per log file, shared by every logger writing to it
+_handlers = {}
+_file_handlers = []
+_listeners = []
+# Cleared by disable_rotation() when several processes share the log files
+_rotation_enabled = True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every ``1 / rate`` records below WARNING."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return self.every > 0 and next(self._count) % self.every == 0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue without blocking the caller.
+
+    Records are queued unformatted, so message formatting happens on the
+    listener thread. When the queue is full the record is dropped and
+    counted instead of stalling the caller.
+    """
+
+    dropped = 0
+    # Optional callable run on every drop, e.g. a metrics counter's ``inc``
+    on_drop = None
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+            if DroppingQueueHandler.on_drop is not None:
+                DroppingQueueHandler.on_drop()
+
+
+def _sample_rates() -> dict:
+    """Parse LOG_SAMPLE_RATES, e.g. ``router.agent=0.01,model_loader=0.1``."""
+    rates = {}
+    for item in os.getenv("LOG_SAMPLE_RATES", "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def _file_handler(log_file):
+    # LOG_MAX_BYTES=0 never rotates, like a plain FileHandler
+    handler = RotatingFileHandler(
+        log_file, mode='a', encoding='utf-8',
+        maxBytes=int(os.getenv("LOG_MAX_BYTES", "0")) if _rotation_enabled else 0,
+        backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    )
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    _file_handlers.append(handler)
+    return handler
+
+
+def _start_listener(log_queue, handler):
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return listener
+
+
+def _handler_for(log_file):
+    """Return the shared handler for ``log_file``, behind a queue if LOG_ASYNC is set."""
+    if log_file not in _handlers:
+        handler = _file_handler(log_file)
+        if os.getenv("LOG_ASYNC", "false").lower() == "true":
+            log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+            listener = _start_listener(log_queue, handler)
+            handler = DroppingQueueHandler(log_queue)
+            handler.listener = listener
+        _handlers[log_file] = handler
+    return _handlers[log_file]
+
+
+def disable_rotation():
+    """
+    Turn off size rotation for current and future log files.
+
+    For processes that fork workers appending to the same files, such as the
+    gunicorn master: RotatingFileHandler cannot coordinate a rollover between
+    processes, so one worker's rollover would strand the others' records.
+    """
+    global _rotation_enabled
+    _rotation_enabled = False
+    for handler in _file_handlers:
+        handler.maxBytes = 0
+
+
+def _after_fork_in_child():
+    """
+    Give a forked child its own queues and listener threads.
+
+    Threads do not survive fork, so queued records would never be written.
+    Records still queued in the parent are left to the parent's listener.
+    """
+    _listeners.clear()
+    for handler in _handlers.values():
+        if isinstance(handler, DroppingQueueHandler):
+            handler.queue = queue.Queue(maxsize=handler.queue.maxsize)
+            handler.listener = _start_listener(handler.queue, *handler.listener.handlers)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def shutdown_logging():
+    """Drain queued records and stop the listener threads."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(shutdown_logging)
 
 
 def get_logger(name=None):
+    """
+    Get a logger with the specified name.
+
+    Configured through the environment: LOG_LEVEL, LOG_FILE, LOG_FORMAT
+    (text or json), LOG_MAX_BYTES/LOG_BACKUP_COUNT for size-based rotation
+    (see ``disable_rotation``),
+    LOG_ASYNC to write through a bounded queue (LOG_QUEUE_SIZE) on a
+    background thread, and LOG_SAMPLE_RATES to keep only a fraction of a
+    logger's records below WARNING.
+    """
     logger = logging.getLogger(name)
 
     if logger.handlers:
@@ -13,11 +176,11 @@ def get_logger(name=None):
     logger.setLevel(log_level)
 
     log_file = os.getenv("LOG_FILE", "app.log")
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.addHandler(_handler_for(log_file))
 
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    rate = _sample_rates().get(name)
+    if rate is not None:
+        logger.addFilter(SamplingFilter(rate))
 
     logger.propagate = False
     return logger
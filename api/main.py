@@ -1,11 +1,26 @@
 """FastAPI Module"""
+import time
+_import_started = time.perf_counter()
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import FastAPI
-from router import agent
+from fastapi.responses import JSONResponse
+from router import admin, agent
+from model_loader import model_cache
+from batching import MICROBATCH_ENABLED
+from capture import request_capture
+from drift import drift_monitor
+from executor import inference_executor
+from shadow import shadow_evaluator
+from logger import get_logger
 from prometheus_fastapi_instrumentator import Instrumentator
 
+IMPORT_SECONDS = time.perf_counter() - _import_started
+logger = get_logger(__name__)
+
 
 # Load environment variables
 if os.environ.get("DOCKER_ENV", "false").lower() == "true":
@@ -17,27 +32,92 @@ else:
 
 # Load the chosen .env file
 load_dotenv(dotenv_path=dotenv_path)
+
+
+class ReceivedAtMiddleware:
+    """Stamp each HTTP request's scope with its arrival time, for the parse stage metric."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+def warm_up():
+    """Load and warm the serving model, then log where startup time went."""
+    model_cache.start()
+    timings = {"imports": IMPORT_SECONDS, **model_cache.timings}
+    breakdown = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items())
+    logger.info(f"Startup {'ready' if model_cache.ready else 'without a model'} "
+                f"in {sum(timings.values()):.3f}s ({breakdown})")
+    # The challenger loads after the champion so it never delays readiness
+    shadow_evaluator.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start serving at once and load the model in the background; /ready reports when it is resident."""
+    if drift_monitor.enabled:
+        model_cache.listeners.append(drift_monitor.on_model_swap)
+        drift_monitor.start()
+    # Registry lookups, the mlflow import and unpickling are blocking; keep them off the event loop
+    warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    if MICROBATCH_ENABLED:
+        agent.micro_batcher.start()
+    request_capture.start()
+    yield
+    await warm_up_task
+    await agent.micro_batcher.stop()
+    await asyncio.to_thread(request_capture.stop)
+    await asyncio.to_thread(drift_monitor.stop)
+    await asyncio.to_thread(shadow_evaluator.stop)
+    await asyncio.to_thread(model_cache.stop)
+    inference_executor.shutdown()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Prediction API",
     description="API for model prediction",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.include_router(agent.router)
+app.include_router(admin.router)
+app.add_middleware(ReceivedAtMiddleware)
 
 
 # Health check endpoint
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "model_name": model_cache.model_name,
+        "model_version": model_cache.version
+    }
+
+
+# Readiness probe: 503 until a warmed-up model is resident
+@app.get("/ready")
+async def ready():
+    """Readiness endpoint"""
+    content = {
+        "status": "ready" if model_cache.ready else "loading",
+        "model_name": model_cache.model_name,
+        "model_version": model_cache.version
+    }
+    return JSONResponse(status_code=200 if model_cache.ready else 503, content=content)
 
 # Instrumentation for Prometheus
 Instrumentator(
     should_group_status_codes=True,
     should_ignore_untemplated=True,
-    excluded_handlers=["/metrics", "/health"]
+    excluded_handlers=["/metrics", "/health", "/ready", "/admin/.*"]
 ).instrument(app).expose(app)
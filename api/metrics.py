@@ -0,0 +1,185 @@
+"""Prometheus metrics exported next to the Instrumentator request metrics.
+
+Under gunicorn (PROMETHEUS_MULTIPROC_DIR set) every worker writes its own
+samples and /metrics aggregates them; gauges declare how they combine."""
+from prometheus_client import Counter, Gauge, Histogram
+from logger import DroppingQueueHandler
+
+MICROBATCH_QUEUE_DEPTH = Gauge(
+    "microbatch_queue_depth",
+    "Single-row prediction requests waiting to be batched",
+    multiprocess_mode="livesum"
+)
+MICROBATCH_BATCH_SIZE = Histogram(
+    "microbatch_batch_size",
+    "Number of rows scored per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+MICROBATCH_WAIT_SECONDS = Histogram(
+    "microbatch_wait_seconds",
+    "Time a request spends queued before its micro-batch is dispatched",
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+PREDICTION_STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds",
+    "Time spent in each stage of a prediction request "
+    "(parse, features, cache, inference, predict)",
+    ["endpoint", "stage", "model_name", "model_version"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+             0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_seconds",
+    "Time spent loading a model version, by stage (registry, load, warmup)",
+    ["stage", "model_name", "model_version"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+INFERENCE_IN_FLIGHT = Gauge(
+    "inference_in_flight",
+    "Inference tasks running or waiting for a worker thread",
+    multiprocess_mode="livesum"
+)
+INFERENCE_REJECTED = Counter(
+    "inference_rejected_total",
+    "Inference tasks rejected because the worker queue was full"
+)
+INFERENCE_TIMEOUTS = Counter(
+    "inference_timeouts_total",
+    "Inference tasks that exceeded the per-request timeout"
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "prediction_cache_hits_total",
+    "Single-row predictions served from the prediction cache"
+)
+PREDICTION_CACHE_MISSES = Counter(
+    "prediction_cache_misses_total",
+    "Single-row predictions not found in the prediction cache"
+)
+PREDICTION_CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions_total",
+    "Prediction cache entries removed, by reason (capacity, expired, invalidated)",
+    ["reason"]
+)
+PREDICTION_CACHE_ENTRIES = Gauge(
+    "prediction_cache_entries",
+    "Entries currently held in the prediction cache",
+    multiprocess_mode="livesum"
+)
+
+CAPTURE_RECORDS = Counter(
+    "capture_records_total",
+    "Captured predictions written to capture segments"
+)
+CAPTURE_DROPPED = Counter(
+    "capture_records_dropped_total",
+    "Captured predictions dropped, by reason (buffer_full, write_error)",
+    ["reason"]
+)
+CAPTURE_BUFFERED = Gauge(
+    "capture_buffered_entries",
+    "Capture entries waiting to be written at the last flush",
+    multiprocess_mode="livesum"
+)
+CAPTURE_FLUSH_SECONDS = Histogram(
+    "capture_flush_seconds",
+    "Time to serialize, compress and write one capture batch",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+CAPTURE_SEGMENTS = Counter(
+    "capture_segments_total",
+    "Capture segment files started"
+)
+
+DRIFT_PSI = Gauge(
+    "feature_drift_psi",
+    "Population stability index of served features against the training reference",
+    ["feature"],
+    multiprocess_mode="livemostrecent"
+)
+DRIFT_KS = Gauge(
+    "feature_drift_ks",
+    "Kolmogorov-Smirnov distance (at the reference bin edges) of served features",
+    ["feature"],
+    multiprocess_mode="livemostrecent"
+)
+DRIFT_MEAN_SHIFT = Gauge(
+    "feature_drift_mean_shift",
+    "Served feature mean minus the reference mean, in reference standard deviations",
+    ["feature"],
+    multiprocess_mode="livemostrecent"
+)
+DRIFT_STD_RATIO = Gauge(
+    "feature_drift_std_ratio",
+    "Served feature standard deviation over the reference standard deviation",
+    ["feature"],
+    multiprocess_mode="livemostrecent"
+)
+DRIFT_WINDOW_FILL = Gauge(
+    "feature_drift_window_rows",
+    "Served rows in the current drift comparison window",
+    multiprocess_mode="livesum"
+)
+DRIFT_ROWS_DROPPED = Counter(
+    "feature_drift_dropped_total",
+    "Served requests not added to drift statistics because the buffer was full"
+)
+DRIFT_RETRAIN_TRIGGERS = Counter(
+    "feature_drift_retrain_requests_total",
+    "Retraining requests written because drift crossed a threshold"
+)
+
+MODEL_POOL_REQUESTS = Counter(
+    "model_pool_requests_total",
+    "Model pool lookups, by result (hit, load, joined an in-flight load)",
+    ["result"]
+)
+MODEL_POOL_LOADS = Counter(
+    "model_pool_loads_total",
+    "Model versions loaded into the pool, by outcome (loaded, failed)",
+    ["outcome"]
+)
+MODEL_POOL_EVICTIONS = Counter(
+    "model_pool_evictions_total",
+    "Model versions evicted from the pool to stay within its memory budget"
+)
+MODEL_POOL_MODELS = Gauge(
+    "model_pool_models",
+    "Model versions resident in the pool",
+    multiprocess_mode="livesum"
+)
+MODEL_POOL_BYTES = Gauge(
+    "model_pool_bytes",
+    "Estimated memory of the model versions resident in the pool",
+    multiprocess_mode="livesum"
+)
+
+SHADOW_ROWS = Counter(
+    "shadow_rows_total",
+    "Served rows also scored by the challenger model"
+)
+SHADOW_DROPPED = Counter(
+    "shadow_rows_dropped_total",
+    "Sampled rows not scored by the challenger, by reason",
+    ["reason"]
+)
+SHADOW_PREDICT_SECONDS = Histogram(
+    "shadow_predict_seconds_per_row",
+    "Model call time per row on the same shadow batch, by role (champion, challenger)",
+    ["role", "model_name", "model_version"],
+    buckets=(0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+)
+SHADOW_RELATIVE_DIFF = Histogram(
+    "shadow_prediction_relative_diff",
+    "Absolute difference between challenger and served prediction, relative to the served one",
+    ["champion_version", "challenger_version"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the async logging queue was full"
+)
+DroppingQueueHandler.on_drop = LOG_RECORDS_DROPPED.inc
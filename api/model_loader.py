@@ -1,12 +1,60 @@
+import fcntl
 import os
-import mlflow
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from compiled import CompiledModel
 from logger import get_logger
+from metrics import MODEL_LOAD_SECONDS
+from models import FEATURE_COLUMNS
 
 logger = get_logger(__name__)
 
-# Set MLflow Tracking URI from env variable
-mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI"))
-mlflow.set_registry_uri(os.getenv("MLFLOW_TRACKING_URI"))
+# Seconds between registry polls for a newer model version
+MODEL_REFRESH_INTERVAL = float(os.getenv("MODEL_REFRESH_INTERVAL", "30"))
+# Serve the compiled NumPy artifact when the registered version has one
+COMPILED_INFERENCE = os.getenv("COMPILED_INFERENCE", "true").lower() == "true"
+# Model version tag set by src/select_best_and_register.py
+COMPILED_MODEL_TAG = "compiled_model_uri"
+# Compiled artifacts are unpacked here once and memory-mapped by every worker process
+MODEL_SHARED_DIR = os.getenv("MODEL_SHARED_DIR", os.path.join(tempfile.gettempdir(), "mlops-models"))
+
+_mlflow = None
+
+
+def get_mlflow():
+    """
+    Import mlflow on first use and point it at MLFLOW_TRACKING_URI.
+
+    mlflow (and the pandas stack it pulls in) is most of the API's import
+    time, so it is loaded by the model-loading thread rather than at import.
+    This also picks up a tracking URI set by .env after this module loads.
+    """
+    global _mlflow
+    if _mlflow is None:
+        import mlflow
+        mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI"))
+        mlflow.set_registry_uri(os.getenv("MLFLOW_TRACKING_URI"))
+        _mlflow = mlflow
+    return _mlflow
+
+
+def shared_model_dir(model_name: str, version) -> str:
+    """Directory in MODEL_SHARED_DIR holding a version's unpacked compiled arrays."""
+    return os.path.join(MODEL_SHARED_DIR, f"{model_name}-v{version}")
+
+
+def remove_shared_model(model_name: str, version):
+    """Delete a version's unpacked arrays, under the lock that guards unpacking."""
+    path = shared_model_dir(model_name, version)
+    if not os.path.isdir(path):
+        return
+    with open(os.path.join(MODEL_SHARED_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Mapped files stay readable after unlinking, so processes still using them are unaffected
+        shutil.rmtree(path, ignore_errors=True)
 
 
 def load_best_model_from_registry(
@@ -24,6 +72,7 @@ def load_best_model_from_registry(
         Loaded MLflow model or None if loading fails.
     """
     try:
+        mlflow = get_mlflow()
         logger.info(f"Tracking URI: {mlflow.get_tracking_uri()}")
         if stage is None:
             model_uri = f"models:/{model_name}/latest"
@@ -36,3 +85,222 @@ def load_best_model_from_registry(
     except Exception as e:
         logger.error(f"Failed to load model from MLflow registry: {e}")
         return None
+
+
+class ModelCache:
+    """
+    Process-wide cache that keeps the serving model resident in memory.
+
+    The model is loaded once at startup and served from memory afterwards.
+    A background thread polls the registry and, when the latest version
+    changes, loads the new version and swaps it in atomically so in-flight
+    requests keep using the model they started with. Every version scores
+    one dummy row before it is swapped in, so the first real request does
+    not pay for lazy initialisation.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "best_model",
+        stage: str = None,
+        refresh_interval: float = MODEL_REFRESH_INTERVAL,
+        pinned_version: str = None,
+        prune_shared: bool = True
+    ):
+        self.model_name = model_name
+        self.stage = stage
+        # Serve this exact version instead of following the latest one
+        self.pinned_version = pinned_version
+        # Remove other unpacked versions of this model from MODEL_SHARED_DIR after an unpack
+        self.prune_shared = prune_shared
+        self.refresh_interval = refresh_interval
+        # (version, model) pair, replaced as a whole so readers never see a torn update
+        self._entry = (None, None)
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # Seconds spent per stage of the last model load, plus the mlflow import
+        self.timings = {}
+        # Callables run with the registry ModelVersion after each swap, on the loading thread
+        self.listeners = []
+
+    @property
+    def ready(self) -> bool:
+        """True once a warmed-up model is resident and can serve requests."""
+        return self._entry[1] is not None
+
+    @property
+    def version(self):
+        """Version of the model currently being served, or None."""
+        return self._entry[0]
+
+    def get(self):
+        """Return the (model, version) pair currently being served."""
+        version, model = self._entry
+        return model, version
+
+    def _latest_model_version(self):
+        client = get_mlflow().tracking.MlflowClient()
+        if self.pinned_version:
+            return client.get_model_version(self.model_name, self.pinned_version)
+        if self.stage is None:
+            versions = client.search_model_versions(
+                f"name='{self.model_name}'",
+                max_results=1,
+                order_by=["version_number DESC"]
+            )
+        else:
+            versions = client.get_latest_versions(self.model_name, stages=[self.stage])
+        return versions[0] if versions else None
+
+    def latest_version(self):
+        """Look up the newest version of the model in the registry."""
+        model_version = self._latest_model_version()
+        return str(model_version.version) if model_version is not None else None
+
+    def _shared_compiled_dir(self, model_version, compiled_uri: str) -> str:
+        """
+        Return the shared directory holding a version's unpacked compiled arrays.
+
+        The first process to get here downloads and unpacks the artifact
+        under an exclusive file lock; the others wait and reuse the result,
+        so N workers cause one registry download and share one copy of the
+        arrays in the page cache.
+        """
+        target = shared_model_dir(self.model_name, model_version.version)
+        if os.path.isdir(target):
+            return target
+        os.makedirs(MODEL_SHARED_DIR, exist_ok=True)
+        with open(os.path.join(MODEL_SHARED_DIR, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.isdir(target):
+                tmp_dir = tempfile.mkdtemp(dir=MODEL_SHARED_DIR)
+                try:
+                    local_path = get_mlflow().artifacts.download_artifacts(
+                        artifact_uri=compiled_uri, dst_path=tmp_dir
+                    )
+                    CompiledModel.extract(local_path, os.path.join(tmp_dir, "arrays"))
+                    os.replace(os.path.join(tmp_dir, "arrays"), target)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                if self.prune_shared:
+                    self._prune_shared(keep=target)
+        return target
+
+    def _prune_shared(self, keep: str):
+        """Remove unpacked versions other than ``keep`` and the one being served."""
+        served = shared_model_dir(self.model_name, self.version)
+        prefix = f"{self.model_name}-v"
+        for name in os.listdir(MODEL_SHARED_DIR):
+            path = os.path.join(MODEL_SHARED_DIR, name)
+            # Mapped files stay readable after unlinking, so workers still on them are unaffected
+            if name.startswith(prefix) and path not in (keep, served):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def prefetch(self):
+        """
+        Unpack the latest compiled artifact into the shared directory.
+
+        Called in the server's master process before workers fork, so workers
+        start by memory-mapping local files instead of downloading.
+        """
+        model_version = self._latest_model_version()
+        compiled_uri = (model_version.tags or {}).get(COMPILED_MODEL_TAG) if model_version else None
+        if COMPILED_INFERENCE and compiled_uri:
+            return self._shared_compiled_dir(model_version, compiled_uri)
+        return None
+
+    def _load(self, model_version):
+        """Load a registry version, preferring its compiled artifact."""
+        compiled_uri = (model_version.tags or {}).get(COMPILED_MODEL_TAG)
+        if COMPILED_INFERENCE and compiled_uri:
+            try:
+                model = CompiledModel.load(self._shared_compiled_dir(model_version, compiled_uri))
+                logger.info(f"Loaded compiled {model.kind} model from {compiled_uri} (memory-mapped)")
+                return model
+            except Exception as e:
+                logger.warning(f"Falling back to pyfunc, compiled model unavailable: {e}")
+
+        model_uri = f"models:/{self.model_name}/{model_version.version}"
+        logger.info(f"Loading model from URI: {model_uri}")
+        return get_mlflow().pyfunc.load_model(model_uri)
+
+    @staticmethod
+    def _warm_up(model):
+        """Score one dummy row so lazy code paths run before real traffic."""
+        model.predict(np.zeros((1, len(FEATURE_COLUMNS))))
+
+    def refresh(self) -> bool:
+        """
+        Load the latest registry version if it differs from the served one.
+
+        Returns:
+            True if a new model version was swapped in.
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                model_version = self._latest_model_version()
+            except Exception as e:
+                logger.error(f"Failed to query registry for '{self.model_name}': {e}")
+                return False
+
+            if model_version is None:
+                logger.warning(f"No versions registered for model '{self.model_name}'.")
+                return False
+            latest = str(model_version.version)
+            if latest == self.version:
+                return False
+
+            registry_done = time.perf_counter()
+            try:
+                model = self._load(model_version)
+                load_done = time.perf_counter()
+                self._warm_up(model)
+            except Exception as e:
+                logger.error(f"Failed to load model version {latest}: {e}")
+                return False
+            self.timings.update(
+                registry=registry_done - started,
+                load=load_done - registry_done,
+                warmup=time.perf_counter() - load_done
+            )
+            for stage in ("registry", "load", "warmup"):
+                MODEL_LOAD_SECONDS.labels(stage, self.model_name, latest).observe(self.timings[stage])
+
+            previous = self.version
+            self._entry = (latest, model)
+            logger.info(f"Serving model '{self.model_name}' version {latest} (previous: {previous}).")
+            for listener in self.listeners:
+                try:
+                    listener(model_version)
+                except Exception as e:
+                    logger.error(f"Model swap listener {listener} failed: {e}")
+            return True
+
+    def _poll(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self):
+        """Load the model and start the background refresh thread."""
+        started = time.perf_counter()
+        get_mlflow()
+        self.timings["mlflow_import"] = time.perf_counter() - started
+        self.refresh()
+        if self._thread is None and self.refresh_interval > 0:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._poll, name="model-cache-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+model_cache = ModelCache()
@@ -0,0 +1,194 @@
+"""In-process pool of registry model versions, loaded on first use and evicted by LRU."""
+import asyncio
+import os
+import pickle
+import time
+from collections import OrderedDict
+from logger import get_logger
+from metrics import MODEL_POOL_BYTES, MODEL_POOL_EVICTIONS, MODEL_POOL_LOADS, MODEL_POOL_MODELS, MODEL_POOL_REQUESTS
+from model_loader import ModelCache, get_mlflow, model_cache, remove_shared_model
+
+logger = get_logger(__name__)
+
+# Memory budget for pooled models; the least recently used are evicted to stay within it
+MODEL_POOL_MAX_MB = float(os.getenv("MODEL_POOL_MAX_MB", "512"))
+# Size charged against the budget for a model whose size cannot be measured
+MODEL_POOL_DEFAULT_MODEL_MB = float(os.getenv("MODEL_POOL_DEFAULT_MODEL_MB", "64"))
+
+
+class ModelNotFoundError(LookupError):
+    """Raised when the registry has no such model version."""
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a registered model version could not be loaded."""
+
+
+def model_nbytes(model) -> int:
+    """
+    Approximate in-memory size of a model, as the length of its pickle.
+
+    A pyfunc wrapper is sized by the model it wraps, since the wrapper's own
+    pickle holds little more than metadata. Models that cannot be unwrapped
+    or pickled are charged ``MODEL_POOL_DEFAULT_MODEL_MB`` so they still count
+    against the budget.
+    """
+    default = int(MODEL_POOL_DEFAULT_MODEL_MB * 1024 * 1024)
+    try:
+        if hasattr(model, "get_raw_model"):
+            model = model.get_raw_model()
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        logger.warning(f"Could not size model {type(model).__name__}, assuming {default} bytes: {e}")
+        return default
+
+
+def load_registry_version(model_name: str, version: str):
+    """
+    Load and warm one registry version, compiled artifact first.
+
+    Returns:
+        The loaded model.
+
+    Raises:
+        ModelNotFoundError: If the version is not registered.
+        ModelLoadError: If the registry is unreachable or loading fails.
+    """
+    mlflow = get_mlflow()
+    try:
+        mlflow.tracking.MlflowClient().get_model_version(model_name, version)
+    except mlflow.exceptions.MlflowException as e:
+        if e.error_code == "RESOURCE_DOES_NOT_EXIST":
+            raise ModelNotFoundError(f"Model '{model_name}' has no version {version}.") from e
+        raise ModelLoadError(f"Failed to query registry for '{model_name}': {e}") from e
+    # Pooled versions keep their unpacked arrays until evicted; pruning would delete other pooled versions' files
+    cache = ModelCache(model_name, refresh_interval=0, pinned_version=version, prune_shared=False)
+    if not cache.refresh():
+        raise ModelLoadError(f"Failed to load model '{model_name}' version {version}.")
+    model, _ = cache.get()
+    return model
+
+
+class PooledModel:
+    """A resident model version and its bookkeeping."""
+
+    def __init__(self, model_name: str, version: str, model, size_bytes: int, load_seconds: float):
+        self.model_name = model_name
+        self.version = version
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used_at = self.loaded_at
+        self.requests = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "model_version": self.version,
+            "size_bytes": self.size_bytes,
+            "load_seconds": round(self.load_seconds, 6),
+            "loaded_at": self.loaded_at,
+            "last_used_at": self.last_used_at,
+            "requests": self.requests,
+        }
+
+
+class ModelPool:
+    """
+    LRU pool of model versions keyed by (name, version).
+
+    A version is loaded the first time it is requested, on a worker thread so
+    the event loop keeps serving. Concurrent requests for a version that is
+    still loading await the same future, so a burst of first requests causes
+    a single registry download. Loads are shielded from request cancellation,
+    and failed loads are not cached. After each load the least recently used
+    versions are evicted until the pool's estimated size fits ``max_mb``; the
+    version just loaded is always kept, even if it alone exceeds the budget.
+    Used from the event loop only, so it takes no locks.
+    """
+
+    def __init__(self, max_mb: float = MODEL_POOL_MAX_MB, loader=load_registry_version, sizer=model_nbytes):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.loader = loader
+        self.sizer = sizer
+        self._entries = OrderedDict()
+        self._loading = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    async def get(self, model_name: str, version: str) -> PooledModel:
+        """Return the pooled version, loading it first if needed."""
+        key = (model_name, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            MODEL_POOL_REQUESTS.labels(result="hit").inc()
+        else:
+            future = self._loading.get(key)
+            if future is None:
+                MODEL_POOL_REQUESTS.labels(result="load").inc()
+                future = asyncio.ensure_future(self._load(model_name, version))
+                self._loading[key] = future
+                future.add_done_callback(lambda _: self._loading.pop(key, None))
+            else:
+                MODEL_POOL_REQUESTS.labels(result="joined").inc()
+            entry = await asyncio.shield(future)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        entry.requests += 1
+        entry.last_used_at = time.time()
+        return entry
+
+    async def _load(self, model_name: str, version: str) -> PooledModel:
+        started = time.perf_counter()
+        try:
+            model = await asyncio.to_thread(self.loader, model_name, version)
+            size = await asyncio.to_thread(self.sizer, model)
+        except Exception:
+            MODEL_POOL_LOADS.labels(outcome="failed").inc()
+            raise
+        entry = PooledModel(model_name, version, model, size, time.perf_counter() - started)
+        self._entries[(model_name, version)] = entry
+        MODEL_POOL_LOADS.labels(outcome="loaded").inc()
+        logger.info(f"Pooled model '{model_name}' version {version} "
+                    f"({size / 1024:.1f} KiB, {entry.load_seconds:.3f}s)")
+        for evicted in self._evict():
+            # File locking and deletion block; keep them off the event loop
+            await asyncio.to_thread(self.remove_files, *evicted)
+        return entry
+
+    def _evict(self) -> list:
+        """Drop least recently used versions until the pool fits its budget; returns their keys."""
+        evicted = []
+        while len(self._entries) > 1 and self.size_bytes > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            evicted.append(key)
+            MODEL_POOL_EVICTIONS.inc()
+            logger.info(f"Evicted model '{key[0]}' version {key[1]} from the pool")
+        MODEL_POOL_MODELS.set(len(self._entries))
+        MODEL_POOL_BYTES.set(self.size_bytes)
+        return evicted
+
+    @staticmethod
+    def remove_files(model_name: str, version: str):
+        """Delete an evicted version's unpacked arrays unless the main model cache serves it."""
+        if (model_name, version) == (model_cache.model_name, model_cache.version):
+            return
+        remove_shared_model(model_name, version)
+
+    def snapshot(self) -> dict:
+        """Resident versions, most recently used last, with the pool's budget."""
+        return {
+            "max_bytes": self.max_bytes,
+            "size_bytes": self.size_bytes,
+            "loading": [{"model_name": name, "model_version": version} for name, version in self._loading],
+            "models": [entry.to_dict() for entry in self._entries.values()],
+        }
+
+
+model_pool = ModelPool()
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from typing import List
+from pydantic import BaseModel, Field, model_validator
 
 
 class PredictionRequest(BaseModel):
@@ -18,3 +19,31 @@ class PredictionRequest(BaseModel):
 class PredictionResponse(BaseModel):
     """Schema for the prediction response."""
     predicted_price: float = Field(..., example=2.85, description="Predicted median house price")
+
+
+# Feature order expected by the model, as declared on PredictionRequest
+FEATURE_COLUMNS = list(PredictionRequest.model_fields)
+
+
+class ColumnarPredictionRequest(BaseModel):
+    """
+    Columnar batch schema: one array per feature, all of the same length.
+    """
+    MedInc: List[float] = Field(..., description="Median income per row")
+    HouseAge: List[float] = Field(..., description="Median house age per row")
+    AveRooms: List[float] = Field(..., description="Average number of rooms per row")
+    AveBedrms: List[float] = Field(..., description="Average number of bedrooms per row")
+    Population: List[float] = Field(..., description="Block group population per row")
+    AveOccup: List[float] = Field(..., description="Average house occupancy per row")
+    Latitude: List[float] = Field(..., description="Latitude per row")
+    Longitude: List[float] = Field(..., description="Longitude per row")
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {len(getattr(self, name)) for name in FEATURE_COLUMNS}
+        if len(lengths) > 1:
+            raise ValueError("All feature arrays must have the same length.")
+        return self
+
+    def __len__(self):
+        return len(self.MedInc)
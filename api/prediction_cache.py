@@ -0,0 +1,105 @@
+"""In-process LRU/TTL cache of single-row predictions."""
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+from metrics import (
+    PREDICTION_CACHE_ENTRIES, PREDICTION_CACHE_EVICTIONS, PREDICTION_CACHE_HITS, PREDICTION_CACHE_MISSES
+)
+
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "false").lower() == "true"
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "100000"))
+# Memory cap; the entry limit is lowered to fit within it
+PREDICTION_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+# Entries older than this are treated as misses (0 = never expire)
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+# Round features to this many decimals before keying, so near-identical rows share an entry
+_round = os.getenv("PREDICTION_CACHE_ROUND_DECIMALS")
+PREDICTION_CACHE_ROUND_DECIMALS = int(_round) if _round not in (None, "") else None
+
+
+def _entry_bytes(n_features: int = 8) -> int:
+    """Approximate memory of one entry: key bytes, value tuple and dict slot."""
+    key = np.zeros(n_features).tobytes()
+    value = (0.0, 0.0)
+    return sys.getsizeof(key) + sys.getsizeof(value) + 2 * sys.getsizeof(0.0) + 100
+
+
+class PredictionCache:
+    """
+    LRU cache of predictions keyed by the feature vector and model version.
+
+    The key is the raw bytes of the (optionally rounded) float64 feature row,
+    so equal rows always collide and different rows never do. The cache
+    belongs to one model version; the first lookup for a new version clears
+    it. Used from the event loop only, so it takes no locks.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = PREDICTION_CACHE_ENABLED,
+        max_entries: int = PREDICTION_CACHE_MAX_ENTRIES,
+        max_mb: float = PREDICTION_CACHE_MAX_MB,
+        ttl_seconds: float = PREDICTION_CACHE_TTL_SECONDS,
+        round_decimals: Optional[int] = PREDICTION_CACHE_ROUND_DECIMALS
+    ):
+        self.enabled = enabled
+        self.max_entries = max(1, min(max_entries, int(max_mb * 1024 * 1024) // _entry_bytes()))
+        self.ttl_seconds = ttl_seconds
+        self.round_decimals = round_decimals
+        self.version = None
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, row: np.ndarray) -> bytes:
+        row = np.asarray(row, dtype=np.float64)
+        if self.round_decimals is not None:
+            # + 0.0 folds -0.0 into 0.0 so both round to the same key
+            row = np.round(row, self.round_decimals) + 0.0
+        return row.tobytes()
+
+    def get(self, row: np.ndarray, version) -> Optional[float]:
+        """Return the cached prediction for ``row`` under ``version``, or None."""
+        if version != self.version:
+            self.clear("invalidated")
+            self.version = version
+        key = self.key(row)
+        entry = self._entries.get(key)
+        if entry is None:
+            PREDICTION_CACHE_MISSES.inc()
+            return None
+        expires_at, prediction = entry
+        if self.ttl_seconds and expires_at < time.monotonic():
+            del self._entries[key]
+            PREDICTION_CACHE_EVICTIONS.labels(reason="expired").inc()
+            PREDICTION_CACHE_ENTRIES.set(len(self._entries))
+            PREDICTION_CACHE_MISSES.inc()
+            return None
+        self._entries.move_to_end(key)
+        PREDICTION_CACHE_HITS.inc()
+        return prediction
+
+    def put(self, row: np.ndarray, version, prediction: float):
+        """Store a prediction; ignored if the model was swapped meanwhile."""
+        if version != self.version:
+            return
+        key = self.key(row)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, prediction)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            PREDICTION_CACHE_EVICTIONS.labels(reason="capacity").inc()
+        PREDICTION_CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self, reason: str = "cleared"):
+        if self._entries:
+            PREDICTION_CACHE_EVICTIONS.labels(reason=reason).inc(len(self._entries))
+            self._entries.clear()
+        PREDICTION_CACHE_ENTRIES.set(0)
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,74 @@
+"""Wall-clock sampling profiler for the live API process.
+
+Stacks of every thread are sampled from ``sys._current_frames`` at a fixed
+interval and returned in collapsed ("folded") form, one line per distinct
+stack with its sample count, as read by flamegraph.pl, speedscope and
+inferno. Sampling runs on its own thread, so the event loop keeps serving
+while a profile is captured and appears in it like any other thread."""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Upper bound on a single capture
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a capture is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+def _stack(frame) -> str:
+    """Root-first, semicolon-separated labels of ``frame`` and its callers."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def collapse(stacks: Counter) -> str:
+    """Render sampled stacks as folded text, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """Captures one time-boxed profile at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float = 0.01) -> Counter:
+        """
+        Sample every thread's stack each ``interval`` seconds for ``seconds``.
+
+        Returns:
+            Counter mapping "thread;frame;...;frame" to its number of samples.
+
+        Raises:
+            ProfilerBusyError: If another capture is in progress.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being captured.")
+        try:
+            own = threading.get_ident()
+            stacks = Counter()
+            deadline = time.monotonic() + min(seconds, PROFILE_MAX_SECONDS)
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != own:
+                        stacks[f"{names.get(ident, ident)};{_stack(frame)}"] += 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+
+profiler = SamplingProfiler()
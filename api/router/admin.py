@@ -0,0 +1,63 @@
+"Operational endpoints for the API's maintainers, guarded by ADMIN_TOKEN."
+import asyncio
+import os
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from profiler import PROFILE_MAX_SECONDS, ProfilerBusyError, collapse, profiler
+from shadow import shadow_evaluator
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Admin endpoints are disabled (404) unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Reject requests without the configured X-Admin-Token header."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000)
+):
+    """
+    Capture a sampling profile of this process and return it as folded stacks.
+
+    The response can be fed to ``flamegraph.pl`` or opened in speedscope.
+    Under gunicorn only the worker that receives the request is profiled.
+    """
+    logger.info("Capturing a %.1fs profile every %.0fms", seconds, interval_ms)
+    try:
+        stacks = await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return PlainTextResponse(
+        collapse(stacks),
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'}
+    )
+
+
+@router.get("/shadow")
+async def shadow():
+    """
+    Compare the shadowed challenger with the served champion.
+
+    Covers the rows mirrored since either model version last changed:
+    prediction differences against what was served and the per-row model
+    call time of each model on the same batches.
+    """
+    return shadow_evaluator.stats()
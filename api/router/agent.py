@@ -1,13 +1,67 @@
 "This code is part of a FastAPI application that handles prediction requests for a machine learning model. It includes an endpoint for generating predictions based on input features."
-import pandas as pd
-from models import PredictionRequest, PredictionResponse
+import os
+import time
+from typing import List, Union
+from models import ColumnarPredictionRequest, PredictionRequest, PredictionResponse
 from fastapi import APIRouter
 from fastapi import HTTPException
-from model_loader import load_best_model_from_registry
+from fastapi import Path
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from features import columns_to_matrix, requests_to_matrix
+from batching import MicroBatcher
+from executor import ExecutorSaturatedError, InferenceTimeoutError, inference_executor
+from model_loader import model_cache
+from model_pool import ModelLoadError, ModelNotFoundError, model_pool
+from prediction_cache import prediction_cache
+from capture import request_capture
+from drift import drift_monitor
+from shadow import shadow_evaluator
+from metrics import PREDICTION_STAGE_SECONDS
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+# Upper bound on rows accepted by a single batch request
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "100000"))
+
+
+def _observe(endpoint: str, stage: str, version, seconds: float, model_name: str = None):
+    """Record the time one request stage took under the model's labels (the serving model by default)."""
+    PREDICTION_STAGE_SECONDS.labels(
+        endpoint, stage, model_name or model_cache.model_name, str(version)
+    ).observe(seconds)
+
+
+def _observe_parse(endpoint: str, http_request: Request, version, entered: float, model_name: str = None):
+    """Record body reading and validation: from arrival (stamped by middleware) to the handler."""
+    received_at = http_request.scope.get("received_at")
+    if received_at is not None:
+        _observe(endpoint, "parse", version, entered - received_at, model_name)
+
+
+def _capture(endpoint: str, http_request: Request, entered: float, features, predictions, version):
+    """Queue the request for capture with its latency since arrival."""
+    received_at = http_request.scope.get("received_at", entered)
+    request_capture.record(endpoint, features, predictions, version, time.perf_counter() - received_at)
+
+
+def _timed_predict(endpoint: str, model, version, X, model_name: str = None):
+    """Run ``model.predict`` and record its duration as the "predict" stage."""
+    started = time.perf_counter()
+    predictions = model.predict(X)
+    _observe(endpoint, "predict", version, time.perf_counter() - started, model_name)
+    return predictions
+
+
+def _predict_rows(X, model, version):
+    """Score a micro-batch with the model version its requests were accepted under."""
+    return _timed_predict("prediction", model, version, X)
+
+
+# Coalesces concurrent single-row requests, one batch per model version; started from the app lifespan
+micro_batcher = MicroBatcher(_predict_rows, executor=inference_executor)
+
 router = APIRouter(
     prefix="/agents",
     tags=["agents"],
@@ -15,24 +69,190 @@ router = APIRouter(
 
 
 @router.post("/prediction", response_model=PredictionResponse)
-async def prediction(request: PredictionRequest):
-    """Endpoint to generate predictions based on input features."""
-    logger.info(f"Incoming prediction request: {request.dict()}")
+async def prediction(request: PredictionRequest, http_request: Request):
+    """
+    Endpoint to generate predictions based on input features.
+
+    Each stage's duration is exported as prediction_stage_seconds: parse
+    (body read and validation), features, cache, inference (queueing and
+    hand-off included) and predict (the model call itself).
+    """
+    entered = time.perf_counter()
+    logger.info("Incoming prediction request: %s", request)
+    # Serve from the resident model; the cache swaps in new versions in the background
+    model, version = model_cache.get()
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded. Check MLflow registry or URI.")
+    _observe_parse("prediction", http_request, version, entered)
+
     try:
-        # Load the model on demand
-        model = load_best_model_from_registry()  # Load on demand
-        if model is None:
-            raise RuntimeError("Model not loaded. Check MLflow registry or URI.")
+        started = time.perf_counter()
+        row = requests_to_matrix([request])[0]
+        _observe("prediction", "features", version, time.perf_counter() - started)
+        if drift_monitor.enabled:
+            drift_monitor.observe(row)
+        if prediction_cache.enabled:
+            started = time.perf_counter()
+            cached = prediction_cache.get(row, version)
+            _observe("prediction", "cache", version, time.perf_counter() - started)
+            if cached is not None:
+                logger.info("Model version %s cached prediction response: %s", version, cached)
+                if request_capture.enabled:
+                    _capture("prediction", http_request, entered, row, cached, version)
+                if shadow_evaluator.enabled:
+                    shadow_evaluator.observe(row, cached, version)
+                return PredictionResponse(predicted_price=cached)
+
+        started = time.perf_counter()
+        if micro_batcher.running:
+            prediction = await micro_batcher.submit(row, model, version)
+        else:
+            prediction = (await inference_executor.run(
+                _timed_predict, "prediction", model, version, row[None, :]
+            ))[0]
+        _observe("prediction", "inference", version, time.perf_counter() - started)
+        if prediction_cache.enabled:
+            prediction_cache.put(row, version, float(prediction))
+        if request_capture.enabled:
+            _capture("prediction", http_request, entered, row, float(prediction), version)
+        if shadow_evaluator.enabled:
+            shadow_evaluator.observe(row, float(prediction), version)
+        logger.info("Model version %s prediction response: %s", version, prediction)
+        return PredictionResponse(predicted_price=float(prediction))
+
+    except ExecutorSaturatedError as e:
+        logger.warning("Rejected prediction: %s", e)
+        raise HTTPException(status_code=429, detail=str(e)) from e
+
+    except InferenceTimeoutError as e:
+        logger.error("Prediction timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e)) from e
+
+    except ValueError as e:
+        logger.error("Value error: %s", e)
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.") from e
+
+
+@router.post("/predictions:batch", response_model=List[PredictionResponse])
+async def batch_prediction(
+    request: Union[List[PredictionRequest], ColumnarPredictionRequest], http_request: Request
+):
+    """
+    Endpoint to generate predictions for many rows in one call.
+
+    Accepts either a list of PredictionRequest objects or a columnar object
+    holding one array per feature. Rows are packed into a single float64
+    matrix and scored with one model call.
+    """
+    entered = time.perf_counter()
+    n_rows = len(request)
+    logger.info("Incoming batch prediction request with %d rows", n_rows)
+    if n_rows > BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {n_rows} rows exceeds the limit of {BATCH_MAX_ROWS}."
+        )
+
+    model, version = model_cache.get()
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded. Check MLflow registry or URI.")
+    if n_rows == 0:
+        return JSONResponse(content=[])
+    _observe_parse("predictions:batch", http_request, version, entered)
+
+    try:
+        started = time.perf_counter()
+        if isinstance(request, ColumnarPredictionRequest):
+            X = columns_to_matrix(request)
+        else:
+            X = requests_to_matrix(request)
+        _observe("predictions:batch", "features", version, time.perf_counter() - started)
+        if drift_monitor.enabled:
+            drift_monitor.observe(X)
+        started = time.perf_counter()
+        predictions = await inference_executor.run(_timed_predict, "predictions:batch", model, version, X)
+        _observe("predictions:batch", "inference", version, time.perf_counter() - started)
+        logger.info("Model version %s scored %d rows", version, n_rows)
+        if request_capture.enabled:
+            _capture("predictions:batch", http_request, entered, X, predictions, version)
+        if shadow_evaluator.enabled:
+            shadow_evaluator.observe(X, predictions, version)
+        # Rows are already validated; skip per-item response model validation
+        return JSONResponse(
+            content=[{"predicted_price": value} for value in predictions.tolist()]
+        )
+
+    except ExecutorSaturatedError as e:
+        logger.warning("Rejected prediction: %s", e)
+        raise HTTPException(status_code=429, detail=str(e)) from e
+
+    except InferenceTimeoutError as e:
+        logger.error("Prediction timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e)) from e
+
+    except ValueError as e:
+        logger.error("Value error: %s", e)
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.") from e
+
+
+@router.get("/models")
+async def pooled_models():
+    """List the model versions resident in the pool with their sizes and load times."""
+    return model_pool.snapshot()
+
+
+@router.post("/models/{model_name}/versions/{version}/prediction", response_model=PredictionResponse)
+async def model_version_prediction(
+    model_name: str, request: PredictionRequest, http_request: Request, version: int = Path(..., ge=1)
+):
+    """
+    Endpoint to generate a prediction with a specific registered model version.
+
+    The version is loaded into the model pool on first use; later requests
+    are served from memory until it is evicted.
+    """
+    entered = time.perf_counter()
+    logger.info("Incoming prediction request for model '%s' version %s: %s", model_name, version, request)
+    try:
+        pooled = await model_pool.get(model_name, str(version))
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except ModelLoadError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    _observe_parse("models:prediction", http_request, pooled.version, entered, model_name)
+
+    try:
+        started = time.perf_counter()
+        row = requests_to_matrix([request])[0]
+        _observe("models:prediction", "features", pooled.version, time.perf_counter() - started, model_name)
+        started = time.perf_counter()
+        prediction = (await inference_executor.run(
+            _timed_predict, "models:prediction", pooled.model, pooled.version, row[None, :], model_name
+        ))[0]
+        _observe("models:prediction", "inference", pooled.version, time.perf_counter() - started, model_name)
+        logger.info("Model '%s' version %s prediction response: %s", model_name, version, prediction)
+        return PredictionResponse(predicted_price=float(prediction))
+
+    except ExecutorSaturatedError as e:
+        logger.warning("Rejected prediction: %s", e)
+        raise HTTPException(status_code=429, detail=str(e)) from e
 
-        input_df = pd.DataFrame([request.dict()])
-        prediction = model.predict(input_df)
-        logger.info(f"Model prediction response: {prediction.tolist()}")
-        return PredictionResponse(predicted_price=float(prediction[0]))
+    except InferenceTimeoutError as e:
+        logger.error("Prediction timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e)) from e
 
     except ValueError as e:
-        logger.error(f"Value error: {e}")
+        logger.error("Value error: %s", e)
         raise HTTPException(status_code=422, detail=str(e)) from e
 
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred.") from e
@@ -0,0 +1,240 @@
+"""Shadow evaluation of a challenger model on a sample of live traffic."""
+import os
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+from capture import RequestCapture
+from logger import get_logger
+from metrics import SHADOW_DROPPED, SHADOW_PREDICT_SECONDS, SHADOW_RELATIVE_DIFF, SHADOW_ROWS
+from model_loader import ModelCache, model_cache
+
+logger = get_logger(__name__)
+
+SHADOW_ENABLED = os.getenv("SHADOW_ENABLED", "false").lower() == "true"
+# Registered model to evaluate, required when enabled; follows its latest version unless one is pinned
+SHADOW_MODEL_NAME = os.getenv("SHADOW_MODEL_NAME", "")
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION", "")
+# Fraction of served rows mirrored to the challenger
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_UPDATE_INTERVAL_SECONDS = float(os.getenv("SHADOW_UPDATE_INTERVAL_SECONDS", "1"))
+# Entries held in memory; a sampled batch request is one entry
+SHADOW_BUFFER_SIZE = int(os.getenv("SHADOW_BUFFER_SIZE", "10000"))
+# Paired predictions are written like request captures when enabled
+SHADOW_CAPTURE_ENABLED = os.getenv("SHADOW_CAPTURE_ENABLED", "false").lower() == "true"
+SHADOW_CAPTURE_DIR = os.getenv("SHADOW_CAPTURE_DIR", os.path.join("captures", "shadow"))
+
+
+class ShadowEvaluator:
+    """
+    Scores a sample of served rows with a challenger model and compares it to the champion.
+
+    The request path only draws the sample and appends the served features,
+    predictions and champion version to a deque. A background thread drains
+    the deque every ``update_interval`` seconds, stacks the rows into one
+    matrix and times both models on it, so the per-row costs are measured on
+    identical input off the request path. The challenger's predictions are
+    paired with the ones actually served and folded into running comparison
+    statistics, which restart whenever either model version changes.
+    Without labels this measures agreement and cost; the optional paired
+    capture keeps the features so accuracy can be scored once labels arrive.
+    """
+
+    def __init__(
+        self,
+        champion: ModelCache = model_cache,
+        enabled: bool = SHADOW_ENABLED,
+        model_name: str = SHADOW_MODEL_NAME,
+        model_version: str = SHADOW_MODEL_VERSION,
+        sample_rate: float = SHADOW_SAMPLE_RATE,
+        update_interval: float = SHADOW_UPDATE_INTERVAL_SECONDS,
+        buffer_size: int = SHADOW_BUFFER_SIZE,
+        capture: RequestCapture = None
+    ):
+        if enabled and not model_name:
+            raise ValueError("SHADOW_ENABLED requires SHADOW_MODEL_NAME to name the challenger model.")
+        if enabled and model_name == champion.model_name and not model_version:
+            # The latest version of the served model is the champion itself
+            raise ValueError(f"Set SHADOW_MODEL_VERSION to shadow another version of '{model_name}'.")
+        self.champion = champion
+        # Pruning would delete the champion's and pooled versions' unpacked arrays in MODEL_SHARED_DIR
+        self.challenger = ModelCache(
+            model_name=model_name, pinned_version=model_version or None, prune_shared=False
+        )
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.update_interval = update_interval
+        self.buffer_size = buffer_size
+        if capture is None:
+            capture = RequestCapture(enabled=SHADOW_CAPTURE_ENABLED, directory=SHADOW_CAPTURE_DIR)
+        self.capture = capture
+        self._buffer = deque()
+        self._rng = np.random.default_rng()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._reset((None, None))
+
+    def _reset(self, versions: tuple):
+        self.versions = versions
+        self.rows = 0
+        self.batches = 0
+        self.sums = dict.fromkeys(
+            ("champion", "challenger", "diff", "abs_diff", "squared_diff", "relative_diff",
+             "champion_seconds", "challenger_seconds"),
+            0.0
+        )
+        self.max_abs_diff = 0.0
+
+    def observe(self, features: np.ndarray, predictions, version):
+        """Mirror the sampled part of a served request: a row and float, or a matrix and array."""
+        if features.ndim == 1:
+            if random.random() >= self.sample_rate:
+                return
+            entry = (features[None, :], np.array([predictions], dtype=np.float64), version)
+        else:
+            mask = self._rng.random(features.shape[0]) < self.sample_rate
+            if not mask.any():
+                return
+            entry = (features[mask], np.asarray(predictions, dtype=np.float64)[mask], version)
+        if len(self._buffer) >= self.buffer_size:
+            SHADOW_DROPPED.labels(reason="buffer_full").inc(entry[0].shape[0])
+            return
+        self._buffer.append(entry)
+
+    def update(self) -> int:
+        """
+        Score every queued row with both models and fold the pairs into the statistics.
+
+        Returns:
+            Number of rows compared.
+        """
+        entries = [self._buffer.popleft() for _ in range(len(self._buffer))]
+        if not entries:
+            return 0
+        champion, champion_version = self.champion.get()
+        challenger, challenger_version = self.challenger.get()
+        if challenger is None or champion is None:
+            SHADOW_DROPPED.labels(reason="not_loaded").inc(sum(len(entry[1]) for entry in entries))
+            return 0
+        # Rows served by a previous champion version are not comparable with its timing
+        current = [entry for entry in entries if entry[2] == champion_version]
+        stale = sum(len(entry[1]) for entry in entries) - sum(len(entry[1]) for entry in current)
+        if stale:
+            SHADOW_DROPPED.labels(reason="version_changed").inc(stale)
+        if not current:
+            return 0
+        X = np.vstack([entry[0] for entry in current])
+        served = np.concatenate([entry[1] for entry in current])
+
+        try:
+            started = time.perf_counter()
+            champion.predict(X)
+            champion_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            predictions = np.asarray(challenger.predict(X), dtype=np.float64).ravel()
+            challenger_seconds = time.perf_counter() - started
+        except Exception as e:
+            SHADOW_DROPPED.labels(reason="error").inc(len(served))
+            logger.error(f"Shadow scoring of {len(served)} rows failed: {e}")
+            return 0
+
+        n = X.shape[0]
+        diff = predictions - served
+        relative = np.abs(diff) / np.maximum(np.abs(served), 1e-12)
+        with self._lock:
+            if self.versions != (champion_version, challenger_version):
+                self._reset((champion_version, challenger_version))
+            self.rows += n
+            self.batches += 1
+            self.sums["champion"] += served.sum()
+            self.sums["challenger"] += predictions.sum()
+            self.sums["diff"] += diff.sum()
+            self.sums["abs_diff"] += np.abs(diff).sum()
+            self.sums["squared_diff"] += (diff ** 2).sum()
+            self.sums["relative_diff"] += relative.sum()
+            self.sums["champion_seconds"] += champion_seconds
+            self.sums["challenger_seconds"] += challenger_seconds
+            self.max_abs_diff = max(self.max_abs_diff, float(np.abs(diff).max()))
+
+        SHADOW_ROWS.inc(n)
+        SHADOW_PREDICT_SECONDS.labels("champion", self.champion.model_name, champion_version).observe(
+            champion_seconds / n
+        )
+        SHADOW_PREDICT_SECONDS.labels("challenger", self.challenger.model_name, challenger_version).observe(
+            challenger_seconds / n
+        )
+        histogram = SHADOW_RELATIVE_DIFF.labels(champion_version, challenger_version)
+        for value in relative.tolist():
+            histogram.observe(value)
+        if self.capture.enabled:
+            self.capture.record(
+                "shadow", X, served, champion_version, champion_seconds / n,
+                challenger_model=self.challenger.model_name, challenger_version=challenger_version,
+                challenger_prediction=predictions, challenger_latency_ms=round(challenger_seconds / n * 1000, 6)
+            )
+        return n
+
+    def stats(self) -> dict:
+        """Comparison of challenger and champion since either version last changed."""
+        with self._lock:
+            rows, sums = self.rows, dict(self.sums)
+            champion_version, challenger_version = self.versions
+            max_abs_diff, batches = self.max_abs_diff, self.batches
+
+        def mean(key):
+            return sums[key] / rows if rows else None
+
+        champion_per_row, challenger_per_row = mean("champion_seconds"), mean("challenger_seconds")
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "rows": rows,
+            "batches": batches,
+            "champion": {
+                "model_name": self.champion.model_name, "model_version": champion_version,
+                "mean_prediction": mean("champion"), "seconds_per_row": champion_per_row,
+            },
+            "challenger": {
+                "model_name": self.challenger.model_name, "model_version": challenger_version,
+                "mean_prediction": mean("challenger"), "seconds_per_row": challenger_per_row,
+            },
+            "mean_diff": mean("diff"),
+            "mean_abs_diff": mean("abs_diff"),
+            "rms_diff": mean("squared_diff") ** 0.5 if rows else None,
+            "max_abs_diff": max_abs_diff if rows else None,
+            "mean_relative_diff": mean("relative_diff"),
+            # Above 1 when the challenger is cheaper to run than the champion
+            "speedup": champion_per_row / challenger_per_row if rows and challenger_per_row else None,
+        }
+
+    def _run(self):
+        while not self._stop_event.wait(self.update_interval):
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"Shadow evaluation failed: {e}")
+
+    def start(self):
+        """Load the challenger and start the evaluation thread; blocks on the registry."""
+        if not self.enabled or self._thread is not None:
+            return
+        self.challenger.start()
+        self.capture.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._thread.start()
+        logger.info(f"Mirroring {self.sample_rate:.1%} of traffic to '{self.challenger.model_name}' "
+                    f"version {self.challenger.version}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.challenger.stop()
+        self.capture.stop()
+
+
+shadow_evaluator = ShadowEvaluator()
@@ -0,0 +1,67 @@
+"""In-process load generator for the prediction endpoint.
+
+The FastAPI app is driven through httpx's ASGI transport, so the numbers
+cover routing, validation, batching and inference but no network stack."""
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+from benchmarks.harness import BenchmarkResults
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+REQUEST_ROW = {
+    "MedInc": 8.3252, "HouseAge": 41.0, "AveRooms": 6.98, "AveBedrms": 1.02,
+    "Population": 322.0, "AveOccup": 2.55, "Latitude": 37.88, "Longitude": -122.23,
+}
+
+
+async def generate_load(client, path: str, n_requests: int, concurrency: int) -> dict:
+    """Send ``n_requests`` POSTs with at most ``concurrency`` in flight."""
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=REQUEST_ROW)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"rps": n_requests / elapsed, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "errors": errors}
+
+
+async def _run(results: BenchmarkResults, n_requests: int, concurrency_levels: list):
+    import httpx
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # The model loads in the background after startup
+            deadline = time.monotonic() + 120
+            while (await client.get("/ready")).status_code != 200:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("API did not become ready within 120s")
+                await asyncio.sleep(0.1)
+            # Warm up the thread pool and batcher
+            await generate_load(client, "/agents/prediction", 50, 8)
+            for concurrency in concurrency_levels:
+                stats = await generate_load(client, "/agents/prediction", n_requests, concurrency)
+                prefix = f"serving.prediction.c{concurrency}"
+                results.add(f"{prefix}.throughput", stats["rps"], "req/s")
+                for key in ("p50_ms", "p95_ms", "p99_ms"):
+                    results.add(f"{prefix}.{key[:3]}", stats[key], "ms")
+                if stats["errors"]:
+                    results.add(f"{prefix}.errors", stats["errors"], "count")
+
+
+def run(results: BenchmarkResults, n_requests: int, concurrency_levels: list):
+    asyncio.run(_run(results, n_requests, concurrency_levels))
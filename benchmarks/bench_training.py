@@ -0,0 +1,50 @@
+"""Microbenchmarks for preprocessing, the trainers and model selection.
+
+Runs in the current working directory, which the runner points at a scratch
+directory, so processed arrays, pickles and the MLflow file store never
+touch the repository."""
+from src import preprocess
+from src.select_best_and_register import RunMetricsCache, register_best_from_registry
+from src.train_linear import train_linear_regression
+from src.train_tree import train_decision_tree
+from utils.common import load_processed_data
+from benchmarks.harness import BenchmarkResults, synthetic_housing, time_call
+
+CANDIDATES = ["decision_tree", "linear_regression"]
+
+
+def run(results: BenchmarkResults, n_rows: int, repeats: int):
+    df = synthetic_housing(n_rows)
+    X = df.drop("MedHouseVal", axis=1)
+
+    results.add_timing("preprocess.remove_outliers_iqr", time_call(
+        lambda: preprocess.remove_outliers_iqr(X), repeats
+    ))
+    results.add_timing("preprocess.preprocess_data", time_call(
+        lambda: preprocess.preprocess_data(df.copy()), repeats
+    ))
+
+    # Each trainer call is a full MLflow run against the local file store
+    data = load_processed_data()
+    results.add_timing("train.linear_regression", time_call(
+        lambda: train_linear_regression(data=data), repeats
+    ))
+    results.add_timing("train.decision_tree", time_call(
+        lambda: train_decision_tree(data=data), repeats
+    ))
+
+    # The first selection registers and compiles the winner; later ones find it unchanged
+    results.add_timing("select.register_best_cold_cache", time_call(
+        lambda: register_best_from_registry(CANDIDATES, cache=RunMetricsCache(None)), repeats, warmup=0
+    ))
+    warm_cache = RunMetricsCache(None)
+    results.add_timing("select.register_best_warm_cache", time_call(
+        lambda: register_best_from_registry(CANDIDATES, cache=warm_cache), repeats
+    ))
+
+
+def prepare_model(n_rows: int):
+    """Register a model for the serving benchmark without timing anything."""
+    preprocess.preprocess_data(synthetic_housing(n_rows))
+    train_linear_regression(data=load_processed_data())
+    register_best_from_registry(CANDIDATES, cache=RunMetricsCache(None))
@@ -0,0 +1,130 @@
+"""Shared helpers for the benchmark suite: timing, synthetic data, result files."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+# Metrics where a larger value is an improvement; everything else is lower-is-better
+HIGHER_IS_BETTER_UNITS = {"req/s", "rows/s"}
+
+
+def synthetic_housing(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Deterministic stand-in for the California Housing frame (no network needed)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "MedInc": rng.lognormal(1.2, 0.4, n_rows),
+        "HouseAge": rng.integers(1, 52, n_rows).astype(float),
+        "AveRooms": rng.normal(5.4, 1.2, n_rows),
+        "AveBedrms": rng.normal(1.1, 0.1, n_rows),
+        "Population": rng.lognormal(7, 0.7, n_rows),
+        "AveOccup": rng.normal(2.9, 0.6, n_rows),
+        "Latitude": rng.uniform(32.5, 42, n_rows),
+        "Longitude": rng.uniform(-124, -114, n_rows),
+    })
+    df["MedHouseVal"] = (
+        0.4 * df["MedInc"] + 0.01 * df["HouseAge"] - 0.05 * (df["Latitude"] - 36)
+        + rng.normal(0, 0.3, n_rows)
+    )
+    return df
+
+
+def time_call(fn, repeats: int = 5, warmup: int = 1) -> list:
+    """Run ``fn`` ``warmup + repeats`` times and return the timed durations."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class BenchmarkResults:
+    """Named measurements plus the environment they were taken in."""
+
+    def __init__(self, params: dict = None):
+        self.meta = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": _git_commit(),
+            "params": params or {},
+        }
+        self.results = {}
+
+    def add(self, name: str, value: float, unit: str, samples: list = None):
+        entry = {"value": float(value), "unit": unit}
+        if samples:
+            entry["samples"] = [float(sample) for sample in samples]
+        self.results[name] = entry
+
+    def add_timing(self, name: str, samples: list):
+        """Record the median of timed samples in seconds."""
+        self.add(name, statistics.median(samples), "s", samples)
+
+    def to_dict(self) -> dict:
+        return {"meta": self.meta, "results": self.results}
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.2) -> list:
+    """
+    Compare two result files' measurements.
+
+    Args:
+        threshold (float): Relative slowdown tolerated before a measurement
+            counts as a regression (0.2 = 20%).
+
+    Returns:
+        One dict per measurement present in both runs with the relative
+        change (positive = worse) and a ``regression`` flag.
+    """
+    rows = []
+    for name, entry in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["value"] == 0:
+            continue
+        change = (entry["value"] - base["value"]) / base["value"]
+        if entry["unit"] in HIGHER_IS_BETTER_UNITS:
+            change = -change
+        rows.append({
+            "name": name,
+            "unit": entry["unit"],
+            "baseline": base["value"],
+            "current": entry["value"],
+            "change": change,
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def format_comparison(rows: list) -> str:
+    lines = [f"{'benchmark':<45} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['name']:<45} {row['baseline']:>12.4g} {row['current']:>12.4g} "
+            f"{row['change']:>+7.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,90 @@
+"""run.py
+Runs the benchmark suite offline and compares it against a stored baseline.
+
+Everything runs in a scratch directory with a local file-based MLflow store
+and synthetic data, so no tracking server or network access is needed.
+
+Usage:
+    python benchmarks/run.py [--suite training serving] [--quick]
+                             [--output PATH] [--baseline PATH] [--threshold 0.2]
+                             [--save-baseline]
+
+Exits with status 1 when any measurement is slower than the baseline by
+more than the threshold."""
+import argparse
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+from benchmarks.harness import BenchmarkResults, compare_results, format_comparison  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "benchmarks", "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the training and serving benchmarks.")
+    parser.add_argument("--suite", nargs="+", choices=["training", "serving"], default=["training", "serving"])
+    parser.add_argument("--rows", type=int, default=20640, help="Synthetic dataset size")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed repetitions per microbenchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a smoke run")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the baseline")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.rows, args.repeats, args.requests = 5000, 1, 200
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="mlops-bench-")
+    # Must be set before the pipeline and API modules read them at import time
+    os.environ["MLFLOW_TRACKING_URI"] = "file://" + os.path.join(workdir, "mlruns")
+    os.environ["LOG_FILE"] = os.path.join(workdir, "bench.log")
+    os.environ["MODEL_REFRESH_INTERVAL"] = "3600"
+    os.chdir(workdir)
+
+    from benchmarks import bench_serving, bench_training
+
+    results = BenchmarkResults(params={key: value for key, value in vars(args).items()
+                                       if key not in ("output", "baseline", "save_baseline")})
+    if "training" in args.suite:
+        bench_training.run(results, args.rows, args.repeats)
+    else:
+        bench_training.prepare_model(args.rows)
+    if "serving" in args.suite:
+        bench_serving.run(results, args.requests, args.concurrency)
+
+    results.save(args.output)
+    print(f"Results written to {args.output} (scratch dir {workdir})")
+    if args.save_baseline:
+        results.save(args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        for name, entry in results.results.items():
+            print(f"{name:<45} {entry['value']:>12.4g} {entry['unit']}")
+        return 0
+
+    import json
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare_results(results.to_dict(), baseline, args.threshold)
+    print(format_comparison(rows))
+    regressions = [row["name"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""compile_model.py
+Compiles registered scikit-learn models into flat NumPy arrays for fast serving.
+
+A LinearRegression becomes a coefficient vector plus intercept and a
+DecisionTreeRegressor becomes its node arrays (feature, threshold, left,
+right, value). A StandardScaler in front of a linear model is folded into
+its coefficients; in front of a tree its mean and scale are stored with the
+node arrays and applied before traversal. Either way the compiled model
+takes raw features. The arrays are saved as an .npz file that the API
+scores with plain vectorized NumPy, without the pyfunc wrapper or pandas."""
+import os
+import sys
+import tempfile
+from typing import Optional
+import numpy as np
+import mlflow
+import mlflow.sklearn
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Model version tag pointing the API at the compiled artifact
+COMPILED_MODEL_TAG = "compiled_model_uri"
+COMPILED_ARTIFACT_DIR = "compiled"
+COMPILED_FILENAME = "model.npz"
+
+
+def _scaler_stats(scaler: StandardScaler, n_features: int) -> tuple:
+    """Return the (mean, scale) a fitted StandardScaler applies per feature."""
+    mean = scaler.mean_ if scaler.with_mean else None
+    scale = scaler.scale_ if scaler.with_std else None
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+def compile_linear(model: LinearRegression, scaler: Optional[StandardScaler] = None) -> dict:
+    """
+    Flatten a fitted linear model into a coefficient vector and intercept.
+
+    With a scaler, ``coef . (x - mean) / scale + b`` is rewritten as
+    ``(coef / scale) . x + (b - coef . mean / scale)``.
+    """
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    intercept = float(np.asarray(model.intercept_, dtype=np.float64).ravel()[0])
+    if scaler is not None:
+        mean, scale = _scaler_stats(scaler, coef.shape[0])
+        coef = coef / scale
+        intercept = intercept - float(coef @ mean)
+    return {
+        "kind": np.array("linear"),
+        "coef": coef,
+        "intercept": np.array(intercept, dtype=np.float64),
+    }
+
+
+def compile_tree(model: DecisionTreeRegressor, scaler: Optional[StandardScaler] = None) -> dict:
+    """
+    Flatten a fitted regression tree into per-node arrays.
+
+    With a scaler, the thresholds stay in scaled space and the scaler's mean
+    and scale are stored alongside. Folding them into raw-space thresholds
+    would not be exact: scikit-learn compares the float32-cast scaled
+    feature, and rows close to a split can land on the other side.
+    """
+    tree = model.tree_
+    compiled = {
+        "kind": np.array("tree"),
+        "feature": tree.feature.astype(np.int64),
+        "threshold": tree.threshold.astype(np.float64),
+        "left": tree.children_left.astype(np.int64),
+        "right": tree.children_right.astype(np.int64),
+        "value": tree.value[:, 0, 0].astype(np.float64),
+        "max_depth": np.array(tree.max_depth, dtype=np.int64),
+        "float32_features": np.array(True),
+    }
+    if scaler is not None:
+        compiled["mean"], compiled["scale"] = _scaler_stats(scaler, model.n_features_in_)
+    return compiled
+
+
+def compile_model(model) -> dict:
+    """
+    Compile a fitted scikit-learn regressor into flat arrays.
+
+    Accepts a bare regressor or a Pipeline of a StandardScaler followed by
+    the regressor, in which case the scaling is compiled in as well.
+
+    Raises:
+        TypeError: If the model type has no compiled representation.
+    """
+    scaler = None
+    if isinstance(model, Pipeline):
+        steps = [step for _, step in model.steps if step not in (None, "passthrough")]
+        if len(steps) == 2 and isinstance(steps[0], StandardScaler):
+            scaler, model = steps
+        elif len(steps) == 1:
+            model = steps[0]
+        else:
+            raise TypeError("Only StandardScaler + regressor pipelines can be compiled")
+
+    if isinstance(model, DecisionTreeRegressor):
+        return compile_tree(model, scaler)
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return compile_linear(model, scaler)
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+
+
+def save_compiled(compiled: dict, path: str) -> str:
+    """Save compiled arrays as an uncompressed .npz file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **compiled)
+    return path
+
+
+def export_compiled_model(model_uri: str, run_id: str) -> Optional[str]:
+    """
+    Compile the model at ``model_uri`` and log it as an artifact of ``run_id``.
+
+    Returns:
+        The ``runs:/`` URI of the compiled artifact, or None if the model
+        cannot be compiled.
+    """
+    try:
+        model = mlflow.sklearn.load_model(model_uri)
+        compiled = compile_model(model)
+    except Exception as e:
+        logger.warning("Skipping compiled export for %s: %s", model_uri, e)
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = save_compiled(compiled, os.path.join(tmp_dir, COMPILED_FILENAME))
+        MlflowClient().log_artifact(run_id, path, artifact_path=COMPILED_ARTIFACT_DIR)
+
+    compiled_uri = f"runs:/{run_id}/{COMPILED_ARTIFACT_DIR}/{COMPILED_FILENAME}"
+    logger.info("Compiled %s model exported to %s", compiled["kind"], compiled_uri)
+    return compiled_uri
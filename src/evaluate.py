@@ -0,0 +1,215 @@
+"""evaluate.py
+K-fold cross-validation with bootstrap confidence intervals for candidate models.
+
+Every candidate is refitted (as an unfitted clone of its registered
+estimator) on the same K folds of the current training rows: the train split
+of the latest processed data, or every training row of the data store after
+an incremental update. Each row therefore gets one out-of-fold squared error
+per candidate, from a model that never saw it, and none of the rows is one
+of the test rows the offline metric shortlisted the candidates on. The
+(candidate, fold) fits run in parallel in a process pool whose workers
+memory-map the rows once. Confidence intervals come from a bootstrap over
+rows in which every resample weights the rows identically for all
+candidates, so the difference of two candidates' resampled MSEs is a paired
+statistic and the noise they share cancels out."""
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import mlflow.sklearn
+from sklearn.base import clone
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.common import PROCESSED_DIR, SCALER_PATH, available_cpus, load_processed_data
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EVALUATION_DEFAULTS = {
+    "enabled": True,
+    "folds": 5,
+    "min_rows": 1000,
+    "bootstrap_resamples": 1000,
+    "confidence": 0.95,
+    "random_state": 42,
+}
+# Bootstrap resamples drawn per vectorized step; bounds memory to chunk x rows weights
+BOOTSTRAP_CHUNK = 100
+
+# Per-worker state set by _init_worker
+_worker_data = None
+_worker_folds = None
+
+
+class InsufficientRowsError(ValueError):
+    """Raised when there are too few rows to cross-validate the candidates on."""
+
+
+def training_rows(data_dir: str = PROCESSED_DIR, scaler_path: str = SCALER_PATH) -> tuple:
+    """
+    Raw-feature training rows of the latest processed data.
+
+    Registered models take raw features (the scaler is fused in and refitted
+    with every fold), so the scaled processed rows are mapped back through
+    the saved scaler.
+
+    Raises:
+        FileNotFoundError: If the processed training arrays are missing.
+    """
+    X_train, _, y_train, _ = load_processed_data(data_dir, mmap_mode="r")
+    if os.path.exists(scaler_path):
+        return joblib.load(scaler_path).inverse_transform(X_train), np.asarray(y_train)
+    return np.asarray(X_train), np.asarray(y_train)
+
+
+def fold_assignment(n_rows: int, folds: int, random_state: int) -> np.ndarray:
+    """Deterministically assign each row to one of ``folds`` shuffled folds of near-equal size."""
+    order = np.random.default_rng(random_state).permutation(n_rows)
+    assignment = np.empty(n_rows, dtype=np.intp)
+    assignment[order] = np.arange(n_rows) % folds
+    return assignment
+
+
+def _init_worker(rows_dir, folds, random_state):
+    """Map the rows once; every fit in this worker reuses them."""
+    global _worker_data, _worker_folds
+    y = np.load(os.path.join(rows_dir, "y.npy"), mmap_mode="r")
+    _worker_data = (np.load(os.path.join(rows_dir, "X.npy"), mmap_mode="r"), y)
+    _worker_folds = fold_assignment(len(y), folds, random_state)
+
+
+def _fit_fold(label, estimator, fold):
+    X, y = _worker_data
+    fit_rows = np.flatnonzero(_worker_folds != fold)
+    held_out = np.flatnonzero(_worker_folds == fold)
+    model = estimator.fit(X[fit_rows], y[fit_rows])
+    return label, fold, (np.asarray(model.predict(X[held_out]), dtype=np.float64).ravel() - y[held_out]) ** 2
+
+
+def cross_validate(
+    estimators: dict,
+    X: np.ndarray,
+    y: np.ndarray,
+    folds: int = 5,
+    random_state: int = 42,
+    max_workers: int = None
+) -> dict:
+    """
+    Out-of-fold squared errors of every estimator on the rows (X, y).
+
+    The rows are written once to a temporary directory that every worker
+    memory-maps, so they are neither pickled per task nor copied per worker.
+
+    Args:
+        estimators: Mapping of label -> scikit-learn estimator (fitted or not;
+            only its parameters are used).
+
+    Returns:
+        Dict mapping each label to an array with one squared error per row.
+    """
+    assignment = fold_assignment(len(y), folds, random_state)
+    errors = {label: np.empty(len(y)) for label in estimators}
+    tasks = [(label, fold) for label in estimators for fold in range(folds)]
+    workers = min(len(tasks), max_workers or available_cpus())
+    with tempfile.TemporaryDirectory(prefix="cv-rows-") as rows_dir:
+        np.save(os.path.join(rows_dir, "X.npy"), np.asarray(X, dtype=np.float64))
+        np.save(os.path.join(rows_dir, "y.npy"), np.asarray(y, dtype=np.float64))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(rows_dir, folds, random_state)
+        ) as pool:
+            futures = [pool.submit(_fit_fold, label, clone(estimators[label]), fold) for label, fold in tasks]
+            for future in futures:
+                label, fold, fold_errors = future.result()
+                errors[label][assignment == fold] = fold_errors
+    logger.info("Cross-validated %d models on %d folds of %d rows with %d workers",
+                len(estimators), folds, len(y), workers)
+    return errors
+
+
+def bootstrap_means(errors: np.ndarray, n_resamples: int, random_state: int = 42) -> np.ndarray:
+    """
+    Bootstrap the mean of each row of ``errors`` with shared resamples.
+
+    Each resample is drawn as per-row counts (one bincount over offset
+    indices), and the means of all candidates follow from one matrix
+    product, so no resampled copy of the errors is ever materialized.
+
+    Args:
+        errors: Array of shape (n_candidates, n_rows).
+
+    Returns:
+        Array of shape (n_resamples, n_candidates).
+    """
+    errors = np.atleast_2d(np.asarray(errors, dtype=np.float64))
+    n_rows = errors.shape[1]
+    rng = np.random.default_rng(random_state)
+    means = np.empty((n_resamples, errors.shape[0]))
+    for start in range(0, n_resamples, BOOTSTRAP_CHUNK):
+        size = min(BOOTSTRAP_CHUNK, n_resamples - start)
+        index = rng.integers(0, n_rows, size=(size, n_rows))
+        offsets = np.arange(size)[:, None] * n_rows
+        weights = np.bincount((index + offsets).ravel(), minlength=size * n_rows).reshape(size, n_rows)
+        means[start:start + size] = weights @ errors.T / n_rows
+    return means
+
+
+def percentile_interval(samples: np.ndarray, confidence: float) -> tuple:
+    """Lower and upper percentile bounds of ``samples`` along the first axis."""
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    return low, high
+
+
+class Evaluation:
+    """Cross-validated errors and paired bootstrap samples of a set of candidates."""
+
+    def __init__(self, errors: dict, samples: np.ndarray, confidence: float):
+        self.labels = list(errors)
+        self.errors = errors
+        self.samples = samples
+        self.confidence = confidence
+
+    def summary(self, label) -> dict:
+        """Cross-validated MSE of one candidate with its confidence interval."""
+        low, high = percentile_interval(self.samples[:, self.labels.index(label)], self.confidence)
+        return {"cv_mse": float(self.errors[label].mean()), "cv_mse_ci_low": float(low), "cv_mse_ci_high": float(high)}
+
+    def difference(self, label, baseline) -> dict:
+        """MSE of ``label`` minus that of ``baseline``, with a paired confidence interval."""
+        delta = self.samples[:, self.labels.index(label)] - self.samples[:, self.labels.index(baseline)]
+        low, high = percentile_interval(delta, self.confidence)
+        return {
+            "cv_mse_delta": float(self.errors[label].mean() - self.errors[baseline].mean()),
+            "cv_mse_delta_ci_low": float(low),
+            "cv_mse_delta_ci_high": float(high),
+        }
+
+
+def evaluate_candidates(model_uris: dict, settings: dict = None, rows: tuple = None) -> Evaluation:
+    """
+    Cross-validate logged models and bootstrap their errors.
+
+    Args:
+        model_uris: Mapping of label -> MLflow model URI of a scikit-learn model.
+        settings: Overrides of EVALUATION_DEFAULTS (the ``evaluation`` config section).
+        rows: Raw-feature (X, y) rows to cross-validate on; defaults to ``training_rows()``.
+
+    Raises:
+        FileNotFoundError: If no rows were given and the processed arrays are missing.
+        InsufficientRowsError: If there are fewer rows than ``min_rows`` or than folds.
+    """
+    settings = {**EVALUATION_DEFAULTS, **(settings or {})}
+    folds = int(settings["folds"])
+    min_rows = max(folds, int(settings["min_rows"]))
+    X, y = rows if rows is not None else training_rows()
+    if len(y) < min_rows:
+        raise InsufficientRowsError(
+            f"{len(y)} rows are too few to cross-validate on; at least {min_rows} are required"
+        )
+    estimators = {label: mlflow.sklearn.load_model(uri) for label, uri in model_uris.items()}
+    errors = cross_validate(estimators, X, y, folds=folds, random_state=int(settings["random_state"]))
+    samples = bootstrap_means(
+        np.vstack(list(errors.values())), int(settings["bootstrap_resamples"]), int(settings["random_state"])
+    )
+    return Evaluation(errors, samples, float(settings["confidence"]))
@@ -1,5 +1,9 @@
 """Preprocessing script for the California Housing dataset.
-This script loads the dataset, removes outliers, scales features, and splits the data into training"""
+This script loads the dataset, removes outliers, scales features, and splits the data into training
+
+Files larger than PREPROCESS_STREAM_THRESHOLD_MB are processed in streaming
+mode, which reads the file in chunks so peak memory is bounded by the chunk
+size rather than the file size."""
 import os
 import sys
 import pandas as pd
@@ -8,22 +12,40 @@ import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.data_store import ProcessedDataStore
+from utils.drift_reference import (
+    REFERENCE_BINS, REFERENCE_STATS_PATH, ReferenceBuilder, compute_reference, decile_edges, save_reference
+)
 from utils.logger import get_logger
+from utils.quantile_sketch import QuantileSketch
+from utils.raw_data import TARGET_COLUMN, iter_raw_chunks, raw_format, read_raw
+from utils.step_cache import file_digest
 
 # Initialize logger
 logger = get_logger(__name__)
 
 # Paths
-RAW_DATA_PATH = "data/raw/housing.csv"
+RAW_DATA_PATH = "data/raw/housing.parquet"
 PROCESSED_DIR = "data/processed"
 SCALER_PATH = os.path.join("models", "scaler.pkl")
 
+# Streaming mode settings
+PREPROCESS_CHUNK_ROWS = int(os.getenv("PREPROCESS_CHUNK_ROWS", "100000"))
+PREPROCESS_STREAM_THRESHOLD_MB = float(os.getenv("PREPROCESS_STREAM_THRESHOLD_MB", "512"))
+# Row-hash buckets used to assign the deterministic train/test split
+SPLIT_BUCKETS = 10_000
+
+
+def load_data(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Load California Housing dataset from Parquet, Arrow IPC or CSV.
 
-def load_data(path: str) -> pd.DataFrame:
-    """Load California Housing dataset from CSV."""
+    Columns are read with an explicit float64 schema, and only ``columns``
+    (default: every feature and the target) are materialized.
+    """
     if os.path.exists(path):
-        logger.info(f"Loading dataset from: {path}")
-        return pd.read_csv(path)
+        logger.info(f"Loading {raw_format(path)} dataset from: {path}")
+        return read_raw(path, columns)
     else:
         logger.error(f"File not found: {path}")
         raise FileNotFoundError(f"{path} does not exist.")
@@ -58,6 +80,11 @@ def preprocess_data(
     X = remove_outliers_iqr(X)
     y = y.loc[X.index]  # Align y with filtered X
 
+    if save_scaler:
+        # Unscaled training features, compared against served traffic by the API's drift monitor
+        save_reference(compute_reference(X.to_numpy(), list(X.columns)), REFERENCE_STATS_PATH)
+        logger.info(f"Drift reference statistics saved to {REFERENCE_STATS_PATH}")
+
     # Feature scaling
     if scale:
         logger.info("Applying StandardScaler to features")
@@ -88,13 +115,194 @@ def preprocess_data(
     return X_train, X_test, y_train, y_test
 
 
-def main(data_path: str = RAW_DATA_PATH):
-    df = load_data(data_path)
-    preprocess_data(df)
+def iter_chunks(path: str, chunk_rows: int = PREPROCESS_CHUNK_ROWS):
+    """Yield float64 DataFrame chunks of a raw data file with missing rows dropped."""
+    if not os.path.exists(path):
+        logger.error(f"File not found: {path}")
+        raise FileNotFoundError(f"{path} does not exist.")
+    for chunk in iter_raw_chunks(path, chunk_rows):
+        yield chunk.dropna()
+
+
+def is_test_row(chunk: pd.DataFrame, test_size: float) -> np.ndarray:
+    """
+    Assign rows to the test split by hashing their contents.
+
+    The assignment depends only on the row values, so it is stable across
+    chunk sizes, file order and re-runs.
+    """
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return (hashes % SPLIT_BUCKETS) < int(test_size * SPLIT_BUCKETS)
+
+
+def preprocess_stream(
+    path: str,
+    chunk_rows: int = PREPROCESS_CHUNK_ROWS,
+    test_size: float = 0.2,
+    save_scaler: bool = True
+) -> tuple:
+    """
+    Preprocess a raw data file too large for memory, reading it in chunks.
+
+    Pass 1 builds a mergeable quantile sketch per feature to get the IQR
+    outlier bounds. Pass 2 drops outliers, fits the StandardScaler with
+    ``partial_fit`` and counts rows per split (rows are split by content
+    hash). Pass 3 scales each chunk and appends it to pre-sized .npy files
+    opened as memory maps. Peak memory is bounded by ``chunk_rows``.
+
+    Returns:
+        Memory-mapped (X_train, X_test, y_train, y_test).
+    """
+    logger.info(f"Starting streaming preprocessing of {path} in chunks of {chunk_rows} rows")
+
+    # Pass 1: approximate quartiles for the outlier bounds
+    sketch = None
+    for chunk in iter_chunks(path, chunk_rows):
+        X = chunk.drop(TARGET_COLUMN, axis=1)
+        if sketch is None:
+            feature_columns = list(X.columns)
+            sketch = QuantileSketch(len(feature_columns))
+        sketch.update(X.to_numpy())
+    if sketch is None or sketch.count == 0:
+        raise ValueError(f"No rows to preprocess in {path}")
+    Q1, Q3 = sketch.quantile([0.25, 0.75])
+    IQR = Q3 - Q1
+    lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+
+    def kept_rows(chunk):
+        X = chunk[feature_columns].to_numpy()
+        mask = ~((X < lower) | (X > upper)).any(axis=1)
+        return chunk[mask]
+
+    # Pass 2: incremental scaler fit, drift reference and split sizes
+    scaler = StandardScaler()
+    reference = ReferenceBuilder(
+        feature_columns, decile_edges(sketch.quantile(np.linspace(0, 1, REFERENCE_BINS + 1)[1:-1]))
+    )
+    n_train = n_test = 0
+    for chunk in iter_chunks(path, chunk_rows):
+        chunk = kept_rows(chunk)
+        if chunk.empty:
+            continue
+        scaler.partial_fit(chunk[feature_columns].to_numpy())
+        reference.update(chunk[feature_columns].to_numpy())
+        n_chunk_test = int(is_test_row(chunk, test_size).sum())
+        n_test += n_chunk_test
+        n_train += len(chunk) - n_chunk_test
+    logger.info(f"Outliers removed; {n_train} train and {n_test} test rows remain")
+
+    if save_scaler:
+        os.makedirs(os.path.dirname(SCALER_PATH), exist_ok=True)
+        joblib.dump(scaler, SCALER_PATH)
+        logger.info(f"Scaler saved to {SCALER_PATH}")
+        save_reference(reference.to_dict(), REFERENCE_STATS_PATH)
+        logger.info(f"Drift reference statistics saved to {REFERENCE_STATS_PATH}")
+
+    # Pass 3: scale and append each chunk to memory-mapped .npy outputs
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    n_features = len(feature_columns)
+    outputs = {
+        "X_train": (n_train, n_features), "X_test": (n_test, n_features),
+        "y_train": (n_train,), "y_test": (n_test,),
+    }
+    arrays = {
+        name: np.lib.format.open_memmap(
+            os.path.join(PROCESSED_DIR, f"{name}.npy"), mode="w+", dtype=np.float64, shape=shape
+        )
+        for name, shape in outputs.items()
+    }
+    train_pos = test_pos = 0
+    for chunk in iter_chunks(path, chunk_rows):
+        chunk = kept_rows(chunk)
+        if chunk.empty:
+            continue
+        test = is_test_row(chunk, test_size)
+        X = scaler.transform(chunk[feature_columns].to_numpy())
+        y = chunk[TARGET_COLUMN].to_numpy()
+        n_chunk_test = int(test.sum())
+        n_chunk_train = len(chunk) - n_chunk_test
+        arrays["X_train"][train_pos:train_pos + n_chunk_train] = X[~test]
+        arrays["y_train"][train_pos:train_pos + n_chunk_train] = y[~test]
+        arrays["X_test"][test_pos:test_pos + n_chunk_test] = X[test]
+        arrays["y_test"][test_pos:test_pos + n_chunk_test] = y[test]
+        train_pos += n_chunk_train
+        test_pos += n_chunk_test
+
+    for array in arrays.values():
+        array.flush()
+    logger.info(f"Processed data saved to {PROCESSED_DIR}")
+    return arrays["X_train"], arrays["X_test"], arrays["y_train"], arrays["y_test"]
+
+
+def append_to_store(
+    path: str,
+    store: ProcessedDataStore = None,
+    chunk_rows: int = PREPROCESS_CHUNK_ROWS,
+    test_size: float = 0.2
+):
+    """
+    Append a new batch of raw data to the versioned processed-data store.
+
+    The store's quantile sketch and scaler are updated with the batch only:
+    the sketch absorbs the new rows and yields the current outlier bounds,
+    the kept rows are split by content hash and the scaler is updated with
+    ``partial_fit``. Rows are stored unscaled so earlier segments stay valid
+    as the scaler statistics move. A batch whose contents were already
+    appended is skipped.
+
+    Returns:
+        The new segment's manifest entry, or None if nothing was appended.
+    """
+    store = store or ProcessedDataStore()
+    source = file_digest(path)
+    if store.has_source(source):
+        logger.info(f"{path} is already in the data store; skipping.")
+        return None
+
+    sketch = store.sketch
+    chunks = []
+    for chunk in iter_chunks(path, chunk_rows):
+        feature_columns = [column for column in chunk.columns if column != TARGET_COLUMN]
+        if sketch is None:
+            sketch = QuantileSketch(len(feature_columns))
+        sketch.update(chunk[feature_columns].to_numpy())
+        chunks.append(chunk)
+    if sum(len(chunk) for chunk in chunks) == 0:
+        logger.warning(f"No rows to append from {path}")
+        return None
+
+    Q1, Q3 = sketch.quantile([0.25, 0.75])
+    IQR = Q3 - Q1
+    df = pd.concat(chunks, ignore_index=True)
+    X = df[feature_columns].to_numpy()
+    kept = ~((X < Q1 - 1.5 * IQR) | (X > Q3 + 1.5 * IQR)).any(axis=1)
+    df = df[kept]
+    X, y = X[kept], df[TARGET_COLUMN].to_numpy()
+
+    scaler = store.scaler or StandardScaler()
+    scaler.partial_fit(X)
+    test = is_test_row(df, test_size)
+    segment = store.append(
+        {"X_train": X[~test], "X_test": X[test], "y_train": y[~test], "y_test": y[test]},
+        source=source, sketch=sketch, scaler=scaler
+    )
+    logger.info(f"Scaler updated with {len(X)} rows ({scaler.n_samples_seen_} total)")
+    return segment
+
+
+def main(data_path: str = RAW_DATA_PATH, streaming: bool = None):
+    if streaming is None:
+        size_mb = os.path.getsize(data_path) / (1024 * 1024) if os.path.exists(data_path) else 0
+        streaming = size_mb > PREPROCESS_STREAM_THRESHOLD_MB
+    if streaming:
+        preprocess_stream(data_path)
+    else:
+        df = load_data(data_path)
+        preprocess_data(df)
     logger.info("Preprocessing completed successfully.")
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        raise ValueError("Usage: python preprocess.py <data_path>")
-    main(sys.argv[1])
+        raise ValueError("Usage: python preprocess.py <data_path> [--stream]")
+    main(sys.argv[1], streaming=True if "--stream" in sys.argv[2:] else None)
@@ -1,38 +1,282 @@
 import sys
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from mlflow.tracking import MlflowClient
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.logger import get_logger
+from utils.common import (
+    PROCESSED_DIR, SCALER_PATH, available_cpus, configure_mlflow, load_config, load_processed_data
+)
+from utils.data_store import ProcessedDataStore
+from utils.drift_reference import REFERENCE_STATS_PATH
+from utils.pipeline_metrics import PipelineMetrics
+from utils.step_cache import StepCache, code_digest, file_digest, step_key
 from src.fetch_data import save_housing_data
-from src.preprocess import main as preprocess_main
-from src.train_linear import main as train_linear_main
-from src.train_tree import main as train_tree_main
+from src.preprocess import RAW_DATA_PATH, append_to_store, main as preprocess_main
+from src.train_linear import train_linear_regression
+from src.train_tree import train_decision_tree
+from src.train_incremental import train_linear_incremental
 from src.select_best_and_register import main as select_best_main
+from src.sweep import run_sweeps, sweep_grids
 
 logger = get_logger(__name__)
 
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+UTILS_DIR = os.path.join(os.path.dirname(SRC_DIR), "utils")
+# Source files whose contents are part of each step's cache key
+STEP_SOURCES = {
+    "fetch_data": ["fetch_data.py"],
+    "preprocess": ["preprocess.py", "../utils/quantile_sketch.py", "../utils/drift_reference.py"],
+    "linear_regression": ["train_linear.py"],
+    "decision_tree": ["train_tree.py"],
+    "sweep": ["sweep.py"],
+    "select": ["select_best_and_register.py", "compile_model.py", "evaluate.py"],
+}
+PREPROCESS_OUTPUTS = [
+    os.path.join(PROCESSED_DIR, f"{name}.npy") for name in ("X_train", "X_test", "y_train", "y_test")
+] + [SCALER_PATH, REFERENCE_STATS_PATH]
 
-def run_pipeline(data_path):
+# Candidate models trained in parallel, keyed by registered model name
+TRAINERS = {
+    "linear_regression": train_linear_regression,
+    "decision_tree": train_decision_tree,
+}
+
+# Processed arrays memory-mapped once per worker process
+_worker_data = None
+
+
+def _init_worker(data_dir):
+    """Map the processed arrays read-only and configure MLflow once per worker."""
+    global _worker_data
+    _worker_data = load_processed_data(data_dir, mmap_mode="r")
+    configure_mlflow()
+
+
+def _train_candidate(name):
+    start = time.perf_counter()
+    result = TRAINERS[name](data=_worker_data)
+    return name, result, time.perf_counter() - start
+
+
+def train_candidates(data_dir: str = PROCESSED_DIR, max_workers: int = None, names: list = None) -> dict:
+    """
+    Train every candidate model concurrently, one MLflow run each.
+
+    The processed arrays are memory-mapped read-only in each worker, so the
+    OS page cache holds a single shared copy of the data.
+
+    Returns:
+        Dict mapping model name to the trainer's result and wall-clock time.
+    """
+    names = list(TRAINERS) if names is None else list(names)
+    if not names:
+        return {}
+    workers = min(len(names), max_workers or available_cpus())
+    # Create the experiment up front so workers don't race to create it
+    configure_mlflow()
+
+    start = time.perf_counter()
+    results, failures = {}, {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(data_dir,)
+    ) as pool:
+        futures = [pool.submit(_train_candidate, name) for name in names]
+        for future, name in zip(futures, names):
+            try:
+                _, result, duration = future.result()
+                results[name] = {"result": result, "duration_sec": duration}
+            except Exception as e:
+                failures[name] = e
+                logger.error(f"[Pipeline] Training {name} failed: {e}")
+
+    total = time.perf_counter() - start
+    for name, outcome in results.items():
+        logger.info(f"[Pipeline] {name} trained in {outcome['duration_sec']:.2f}s")
+    logger.info(f"[Pipeline] Trained {len(results)} models on {workers} workers in {total:.2f}s")
+
+    if failures:
+        raise RuntimeError(f"Training failed for: {', '.join(sorted(failures))}")
+    return results
+
+
+def _source_digest(step: str) -> str:
+    paths = [os.path.join(SRC_DIR, name) for name in STEP_SOURCES[step]]
+    return code_digest(*paths, os.path.join(UTILS_DIR, "common.py"))
+
+
+def _restore(cache: StepCache, step: str, key: str):
+    manifest = cache.restore(step, key)
+    if manifest is not None:
+        logger.info(f"[Pipeline] {step}: inputs unchanged (key {key[:12]}), skipping.")
+    return manifest
+
+
+def _run_exists(run_id: str) -> bool:
+    try:
+        MlflowClient().get_run(run_id)
+        return True
+    except Exception:
+        return False
+
+
+def seed_store(data_path, store: ProcessedDataStore = None):
+    """
+    Append the full dataset to an empty data store.
+
+    Incremental updates fit and cross-validate on every stored row, so the
+    store has to start from the history rather than the first new batch.
+    A store that already has segments is left alone.
+    """
+    store = store or ProcessedDataStore()
+    if store.segments:
+        return None
+    if data_path is None or not os.path.exists(data_path):
+        logger.warning(f"[Pipeline] The data store is empty and {data_path} is missing; not seeding it.")
+        return None
+    logger.info(f"[Pipeline] Seeding the data store with {data_path}")
+    return append_to_store(data_path, store)
+
+
+def run_incremental(data_path):
+    """
+    Append ``data_path`` to the data store and update the linear candidate.
+
+    Only the new rows are preprocessed and folded into the model, so the
+    cost scales with the batch rather than the history. An empty store is
+    first seeded with the full dataset at RAW_DATA_PATH. The decision tree
+    is not retrained; its latest registered version stays in the selection.
+    """
+    logger.info(f"[Pipeline] Starting incremental update with {data_path}")
+    start = time.perf_counter()
+    metrics = PipelineMetrics("incremental")
+    status = "failed"
+    try:
+        configure_mlflow()
+        with metrics.step("append"):
+            seed_store(RAW_DATA_PATH)
+            append_to_store(data_path)
+        with metrics.step("train", model="linear_regression"):
+            result = train_linear_incremental()
+        if result is not None:
+            with metrics.step("select"):
+                # data/processed is stale in this mode; cross-validate on every stored training row
+                select_best_main(rows=ProcessedDataStore().load_split("train"))
+        status = "success"
+    finally:
+        metrics.write(time.perf_counter() - start, status)
+    logger.info(f"[Pipeline] Incremental update completed in {time.perf_counter() - start:.2f}s.")
+
+
+def run_pipeline(data_path, sweep: bool = False, use_cache: bool = True):
+    """
+    Fetch, preprocess, train and register, skipping steps whose inputs are unchanged.
+
+    Every step is keyed by a hash of its inputs (data digest, config section,
+    step source code and upstream keys). When a key is already in the step
+    cache, its outputs are restored and the step is skipped, so only steps
+    downstream of a change re-execute. Step timings are written to
+    PIPELINE_METRICS_DIR for Prometheus' textfile collector.
+    """
     logger.info(f"[Pipeline] Starting training pipeline with {data_path}")
+    start = time.perf_counter()
+    metrics = PipelineMetrics()
+    status = "failed"
+    try:
+        _run_steps(data_path, sweep, use_cache, metrics)
+        status = "success"
+    finally:
+        metrics.write(time.perf_counter() - start, status)
+    logger.info(f"[Pipeline] Training pipeline completed in {time.perf_counter() - start:.2f}s.")
+
+
+def _run_steps(data_path, sweep: bool, use_cache: bool, metrics: PipelineMetrics):
     os.environ["DATA_PATH"] = data_path
+    cache = StepCache(enabled=use_cache)
+    config = load_config()
+    tracking_uri = os.getenv("MLFLOW_TRACKING_URI")
+    configure_mlflow()
 
     if data_path is None or not os.path.exists(data_path):
-        logger.info("[Pipeline] Data path not found. Fetching fresh data.")
-        data_path = save_housing_data()  # returns full path
+        with metrics.step("fetch_data") as step:
+            fetch_key = step_key("fetch_data", _source_digest("fetch_data"))
+            manifest = _restore(cache, "fetch_data", fetch_key)
+            if manifest is not None:
+                data_path = manifest["result"]
+                step["status"] = "cached"
+            else:
+                logger.info("[Pipeline] Data path not found. Fetching fresh data.")
+                data_path = save_housing_data()  # returns full path
+                cache.store("fetch_data", fetch_key, [data_path], data_path)
 
     # Step 2: Preprocess
-    preprocess_main(data_path)
+    preprocess_key = step_key(
+        "preprocess", file_digest(data_path), _source_digest("preprocess"),
+        os.getenv("PREPROCESS_STREAM_THRESHOLD_MB")
+    )
+    with metrics.step("preprocess") as step:
+        if _restore(cache, "preprocess", preprocess_key) is None:
+            preprocess_main(data_path)
+            cache.store("preprocess", preprocess_key, PREPROCESS_OUTPUTS)
+        else:
+            step["status"] = "cached"
+    # Later incremental updates build on this data
+    with metrics.step("seed_store"):
+        seed_store(data_path)
 
-    # Step 3: Train models
-    train_linear_main()
-    train_tree_main()
+    # Step 3: Train models (or sweep the grids declared in config.yaml)
+    grids = sweep_grids(config) if sweep else {}
+    train_keys, run_ids, pending = {}, {}, []
+    for name in TRAINERS:
+        mode = "sweep" if name in grids else name
+        train_keys[name] = step_key(
+            mode, name, preprocess_key, config.get(name),
+            config.get("sweep") if mode == "sweep" else None,
+            _source_digest(mode), tracking_uri
+        )
+        manifest = _restore(cache, name, train_keys[name])
+        # A cached result is only reusable while its MLflow run still exists
+        if manifest is None or not _run_exists(manifest["result"]["run_id"]):
+            pending.append(name)
+        else:
+            run_ids[name] = manifest["result"]["run_id"]
+            metrics.observe("train", 0.0, model=name, status="cached")
 
-    # Step 4: Select best and register
-    select_best_main()
+    outputs = {name: [os.path.join("models", f"{name}.pkl")] for name in pending}
+    swept = [name for name in pending if name in grids]
+    if swept:
+        with metrics.step("sweep", model=",".join(swept)):
+            for name, result in run_sweeps(models=swept).items():
+                run_ids[name] = result["run_id"]
+                cache.store(name, train_keys[name], outputs[name], result)
+    trained = [name for name in pending if name not in grids]
+    if trained:
+        for name, outcome in train_candidates(names=trained).items():
+            metrics.observe("train", outcome["duration_sec"], model=name)
+            if outcome["result"] is not None:
+                run_ids[name] = outcome["result"]["run_id"]
+                cache.store(name, train_keys[name], outputs[name], outcome["result"])
 
-    logger.info("[Pipeline] Training pipeline completed.")
+    # Step 4: Select best and register. Keyed on the runs, not just the training inputs,
+    # so a candidate re-trained into a new run is always considered
+    select_key = step_key(
+        "select", train_keys, run_ids, config.get("evaluation"), _source_digest("select"), tracking_uri
+    )
+    with metrics.step("select") as step:
+        if _restore(cache, "select", select_key) is None:
+            version = select_best_main()
+            cache.store("select", select_key, [], version)
+        else:
+            step["status"] = "cached"
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        raise ValueError("Usage: python run_training_pipeline.py <data_path>")
-    run_pipeline(sys.argv[1])
+        raise ValueError(
+            "Usage: python run_training_pipeline.py <data_path> [--sweep] [--no-cache] [--incremental]"
+        )
+    if "--incremental" in sys.argv[2:]:
+        run_incremental(sys.argv[1])
+    else:
+        run_pipeline(sys.argv[1], sweep="--sweep" in sys.argv[2:], use_cache="--no-cache" not in sys.argv[2:])
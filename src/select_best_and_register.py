@@ -1,24 +1,141 @@
 """select_best_and_register.py
-This script selects the best model from the MLflow registry based on a specified metric,"""
+This script selects the best model from the MLflow registry based on a specified metric,
+
+Only the most recent REGISTRY_SCAN_LIMIT versions of each candidate are
+scanned. Their runs' metrics are fetched with a single bulk ``search_runs``
+query and cached locally by run id, and the winner is only registered again
+when it differs from the current best model.
+
+With an ``evaluation`` section in utils/config.yaml, the best version of each
+candidate (by the offline metric) and the current best model are
+cross-validated on the same folds of the current training rows
+(src/evaluate.py). A challenger
+replaces the current best model only when the upper bound of the paired
+bootstrap interval on its MSE difference is below zero, so noise-level
+differences do not cause a re-registration. Too few rows to cross-validate
+on also keeps the current best model."""
+import json
 import os
 import sys
+import time
 from typing import Optional
 import mlflow
+from mlflow.entities import Metric
 from mlflow.tracking import MlflowClient
-from mlflow.exceptions import RestException
+from mlflow.exceptions import MlflowException, RestException
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.logger import get_logger
-from utils.common import load_environment_variables
+from utils.common import load_config, load_environment_variables
+from utils.drift_reference import REFERENCE_STATS_PATH
+from src.compile_model import COMPILED_MODEL_TAG, export_compiled_model
+from src.evaluate import InsufficientRowsError, evaluate_candidates
 
 logger = get_logger(__name__)
 
+# Only the most recent versions of each candidate are considered
+REGISTRY_SCAN_LIMIT = int(os.getenv("REGISTRY_SCAN_LIMIT", "50"))
+# Metrics of finished runs keyed by run id; finished runs never change
+RUN_METRICS_CACHE = os.getenv("RUN_METRICS_CACHE", os.path.join(".cache", "run_metrics.json"))
+# Run ids per search_runs query
+SEARCH_RUNS_CHUNK = 100
+# Model version tag pointing the API's drift monitor at the training feature statistics
+DRIFT_REFERENCE_TAG = "drift_reference_uri"
+DRIFT_ARTIFACT_DIR = "drift"
+
+
+class RunMetricsCache:
+    """Local JSON cache of finished runs' metrics."""
+
+    def __init__(self, path: Optional[str] = RUN_METRICS_CACHE):
+        self.path = path
+        self.metrics = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.metrics = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable run metrics cache %s: %s", path, e)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics, f)
+        os.replace(tmp_path, self.path)
+
+
+def recent_versions(client: MlflowClient, model_name: str, limit: int = REGISTRY_SCAN_LIMIT) -> list:
+    """Return the newest ``limit`` versions of a registered model."""
+    return list(client.search_model_versions(
+        f"name='{model_name}'", max_results=limit, order_by=["version_number DESC"]
+    ))
+
+
+def fetch_run_metrics(client: MlflowClient, run_ids: list, cache: RunMetricsCache) -> tuple:
+    """
+    Return the metrics of ``run_ids``, fetching uncached runs in bulk.
+
+    Uncached runs are looked up with ``search_runs`` filtered on
+    ``run_id IN (...)`` rather than one ``get_run`` per version. Only
+    finished runs are added to the cache.
+
+    Returns:
+        Tuple of (dict run_id -> metrics, number of tracking round-trips).
+    """
+    metrics = {run_id: cache.metrics[run_id] for run_id in run_ids if run_id in cache.metrics}
+    missing = [run_id for run_id in dict.fromkeys(run_ids) if run_id and run_id not in metrics]
+    round_trips = 0
+    if missing:
+        experiment_ids = [experiment.experiment_id for experiment in client.search_experiments()]
+        round_trips += 1
+        for start in range(0, len(missing), SEARCH_RUNS_CHUNK):
+            chunk = missing[start:start + SEARCH_RUNS_CHUNK]
+            id_list = ", ".join(f"'{run_id}'" for run_id in chunk)
+            runs = client.search_runs(
+                experiment_ids, filter_string=f"attributes.run_id IN ({id_list})", max_results=len(chunk)
+            )
+            round_trips += 1
+            for run in runs:
+                metrics[run.info.run_id] = dict(run.data.metrics)
+                if run.info.status == "FINISHED":
+                    cache.metrics[run.info.run_id] = metrics[run.info.run_id]
+    return metrics, round_trips
+
+
+def export_drift_reference(client: MlflowClient, run_id: str, path: str = REFERENCE_STATS_PATH) -> Optional[str]:
+    """
+    Log the preprocessing step's reference statistics as an artifact of ``run_id``.
+
+    Returns:
+        The ``runs:/`` URI of the artifact, or None if no statistics exist.
+    """
+    if not os.path.exists(path):
+        logger.warning("No drift reference statistics at %s; skipping export.", path)
+        return None
+    client.log_artifact(run_id, path, artifact_path=DRIFT_ARTIFACT_DIR)
+    return f"runs:/{run_id}/{DRIFT_ARTIFACT_DIR}/{os.path.basename(path)}"
+
+
+def log_run_metrics(client: MlflowClient, run_id: str, metrics: dict, cache: RunMetricsCache):
+    """Log ``metrics`` to a finished run in one call and keep the local cache in sync."""
+    timestamp = int(time.time() * 1000)
+    client.log_batch(run_id, metrics=[Metric(key, value, timestamp, 0) for key, value in metrics.items()])
+    if run_id in cache.metrics:
+        cache.metrics[run_id].update(metrics)
+
 
 def register_best_from_registry(
     candidate_models: list,
     metric_key: str = "mse",
     greater_is_better: bool = False,
     best_model_name: str = "best_model",
-    tracking_uri: Optional[str] = None
+    tracking_uri: Optional[str] = None,
+    scan_limit: int = REGISTRY_SCAN_LIMIT,
+    cache: Optional[RunMetricsCache] = None,
+    evaluation: Optional[dict] = None,
+    rows: Optional[tuple] = None
 ) -> Optional[str]:
 
     if tracking_uri:
@@ -27,62 +144,164 @@ def register_best_from_registry(
         logger.info("Tracking URI set to: %s", tracking_uri)
 
     client = MlflowClient()
-    best_metric = None
-    best_model_uri = None
-    best_run_id = None
+    cache = cache if cache is not None else RunMetricsCache()
+    round_trips = 0
 
+    versions = []
     for model_name in candidate_models:
         try:
-            versions = client.search_model_versions(f"name='{model_name}'")
+            versions.extend(recent_versions(client, model_name, scan_limit))
         except RestException:
             logger.warning("Model '%s' not found. Skipping...", model_name)
+        round_trips += 1
+
+    run_metrics, fetch_round_trips = fetch_run_metrics(client, [v.run_id for v in versions], cache)
+    round_trips += fetch_round_trips
+    cache.save()
+
+    def better(value, than):
+        return than is None or (value > than if greater_is_better else value < than)
+
+    best_metric = None
+    best_version = None
+    # Best version of each candidate model, the shortlist for held-out evaluation
+    shortlist = {}
+    for version in versions:
+        metric_value = (run_metrics.get(version.run_id) or {}).get(metric_key)
+        if metric_value is None:
+            logger.info("Metric '%s' not found for run_id=%s. Skipping.", metric_key, version.run_id)
             continue
 
-        for version in versions:
-            run_id = version.run_id
-            run = client.get_run(run_id)
-            metric_value = run.data.metrics.get(metric_key)
-
-            if metric_value is None:
-                logger.info("Metric '%s' not found for run_id=%s. Skipping.", metric_key, run_id)
-                continue
-
-            if (best_metric is None) or (
-                greater_is_better and metric_value > best_metric
-            ) or (
-                not greater_is_better and metric_value < best_metric
-            ):
-                best_metric = metric_value
-                best_model_uri = version.source
-                best_run_id = run_id
-
-    if best_model_uri is None or best_run_id is None:
+        if better(metric_value, best_metric):
+            best_metric = metric_value
+            best_version = version
+        if better(metric_value, shortlist.get(version.name, (None,))[0]):
+            shortlist[version.name] = (metric_value, version)
+
+    if best_version is None:
         logger.warning("No valid models found with metric: %s", metric_key)
+        logger.info("Registry scan: %d versions, %d tracking round-trips", len(versions), round_trips)
         return None
 
+    try:
+        current = recent_versions(client, best_model_name, 1)
+    except MlflowException:
+        current = []
+    round_trips += 1
+
+    if evaluation and evaluation.get("enabled", True):
+        selected = select_by_cross_validation(
+            client, [version for _, version in shortlist.values()], current[0] if current else None,
+            evaluation, cache, rows
+        )
+        cache.save()
+        if selected is not None:
+            best_version, best_metric = selected
+            metric_key = "cv_mse"
+
+    best_run_id = best_version.run_id
+    model_uri = f"{best_version.source}"
+
+    # Nothing to do when the current best model already points at the winner (or was kept)
+    if current and current[0].run_id == best_run_id and current[0].source == model_uri:
+        logger.info("Best model unchanged (run_id=%s, %s=%.5f); '%s' stays at version %s",
+                    best_run_id, metric_key, best_metric, best_model_name, current[0].version)
+        logger.info("Registry scan: %d versions, %d tracking round-trips", len(versions), round_trips)
+        return current[0].version
+
     # Register best model with mlflow.register_model (auto-creates registered model if needed)
-    model_uri = f"{best_model_uri}"
     result = mlflow.register_model(
         model_uri=model_uri,
         name=best_model_name
     )
     logger.info("Best model (run_id=%s, %s=%.5f) registered as '%s' (version %s)",
                 best_run_id, metric_key, best_metric, best_model_name, result.version)
+    logger.info("Registry scan: %d versions, %d tracking round-trips", len(versions), round_trips)
+
+    # Export flat NumPy arrays so the API can skip the pyfunc/pandas path
+    compiled_uri = export_compiled_model(model_uri, best_run_id)
+    if compiled_uri:
+        client.set_model_version_tag(best_model_name, result.version, COMPILED_MODEL_TAG, compiled_uri)
+    reference_uri = export_drift_reference(client, best_run_id)
+    if reference_uri:
+        client.set_model_version_tag(best_model_name, result.version, DRIFT_REFERENCE_TAG, reference_uri)
 
     return result.version
 
 
-def main():
+def select_by_cross_validation(
+    client: MlflowClient, candidates: list, champion, settings: dict,
+    cache: RunMetricsCache, rows: Optional[tuple] = None
+) -> Optional[tuple]:
+    """
+    Cross-validate the shortlisted versions and the current best model on the same folds.
+
+    Every candidate's run gets ``cv_mse`` and its bootstrap interval.
+    The challenger with the lowest ``cv_mse`` also gets the paired
+    difference to the current best model, and is chosen when the whole
+    interval of that difference lies below zero; retrains of the current
+    best model's candidate are held to the same bar.
+
+    Returns:
+        (version, cv_mse) of the version to serve, where the version is
+        ``champion`` itself when it is kept (with a NaN cv_mse when there
+        were too few rows to cross-validate on); None when cross-validation
+        is unavailable.
+    """
+    sources = {version.run_id: version.source for version in candidates}
+    if champion is not None:
+        sources.setdefault(champion.run_id, champion.source)
+    try:
+        evaluation = evaluate_candidates(sources, settings, rows)
+    except InsufficientRowsError as e:
+        # Too few held-out errors to tell a challenger from noise
+        if champion is not None:
+            logger.warning("%s; keeping the current best model (version %s)", e, champion.version)
+            return champion, float("nan")
+        logger.warning("%s; no current best model, selecting on the offline metric", e)
+        return None
+    except (FileNotFoundError, ValueError, MlflowException) as e:
+        logger.warning("Cross-validation skipped, selecting on the offline metric: %s", e)
+        return None
+
+    summaries = {run_id: evaluation.summary(run_id) for run_id in sources}
+    for run_id, summary in summaries.items():
+        log_run_metrics(client, run_id, summary, cache)
+        logger.info("run_id=%s cv_mse=%.5f (%.0f%% CI %.5f-%.5f)", run_id, summary["cv_mse"],
+                    evaluation.confidence * 100, summary["cv_mse_ci_low"], summary["cv_mse_ci_high"])
+
+    winner = min(candidates, key=lambda version: summaries[version.run_id]["cv_mse"])
+    if champion is None or winner.run_id == champion.run_id:
+        return winner, summaries[winner.run_id]["cv_mse"]
+    difference = evaluation.difference(winner.run_id, champion.run_id)
+    log_run_metrics(client, winner.run_id, difference, cache)
+    if difference["cv_mse_delta_ci_high"] < 0:
+        logger.info("Challenger run_id=%s is significantly better: cv_mse delta %.5f (CI %.5f to %.5f)",
+                    winner.run_id, difference["cv_mse_delta"],
+                    difference["cv_mse_delta_ci_low"], difference["cv_mse_delta_ci_high"])
+        return winner, summaries[winner.run_id]["cv_mse"]
+
+    logger.info("Challenger run_id=%s is not significantly better than version %s: "
+                "cv_mse delta %.5f (CI %.5f to %.5f); keeping the current best model",
+                winner.run_id, champion.version, difference["cv_mse_delta"],
+                difference["cv_mse_delta_ci_low"], difference["cv_mse_delta_ci_high"])
+    return champion, summaries[champion.run_id]["cv_mse"]
+
+
+def main(rows: Optional[tuple] = None):
+    """Select among the candidates; ``rows`` overrides the rows they are cross-validated on."""
     load_environment_variables()
     # Load tracking URI from environment variable
     TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI")
 
-    register_best_from_registry(
+    return register_best_from_registry(
         candidate_models=["decision_tree", "linear_regression"],
         metric_key="mse",
         greater_is_better=False,
         best_model_name="best_model",
-        tracking_uri=TRACKING_URI
+        tracking_uri=TRACKING_URI,
+        evaluation=load_config().get("evaluation"),
+        rows=rows
     )
 
 
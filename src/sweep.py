@@ -0,0 +1,266 @@
+"""sweep.py
+Hyperparameter sweeps over the grids declared in utils/config.yaml.
+
+Each model section may declare a ``sweep`` mapping of parameter -> list of
+values or range. All combinations are scored with successive halving: every
+trial is first fitted on a small share of the training rows, only the best
+1/eta trials advance to the next rung with eta times more rows, and so on
+until a single winner remains. Trials run in parallel in a process pool
+whose workers memory-map the processed arrays once and reuse them for every
+trial. Each trial is logged as a nested MLflow run under one parent run per
+model, and the winner is refitted on all training rows and registered under
+the model's name so select_best_and_register can pick it up."""
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import mlflow
+import mlflow.sklearn
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.tree import DecisionTreeRegressor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.common import (
+    PROCESSED_DIR, available_cpus, configure_mlflow, fuse_scaler,
+    load_config, load_environment_variables, load_processed_data, save_model
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+load_environment_variables()
+
+SWEEP_DEFAULTS = {
+    "eta": 3,
+    "min_fraction": 0.1,
+    "validation_size": 0.2,
+    "random_state": 42,
+}
+
+# Per-worker state set by _init_worker
+_worker_data = None
+_worker_split = None
+
+
+def expand_values(spec) -> list:
+    """
+    Expand one parameter spec into its candidate values.
+
+    A list is used as-is. A mapping ``{low, high, num, log, type}`` becomes
+    ``num`` evenly spaced values (geometrically spaced with ``log: true``).
+    """
+    if not isinstance(spec, dict):
+        return list(spec) if isinstance(spec, (list, tuple)) else [spec]
+    space = np.geomspace if spec.get("log") else np.linspace
+    values = space(spec["low"], spec["high"], int(spec.get("num", 5)))
+    if spec.get("type") == "int":
+        return sorted({int(round(value)) for value in values})
+    return [float(value) for value in values]
+
+
+def expand_grid(grid: dict) -> list:
+    """Return every parameter combination of a sweep grid."""
+    names = sorted(grid)
+    values = [expand_values(grid[name]) for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def build_estimator(model_name: str, params: dict):
+    """Create an unfitted estimator for a sweep trial."""
+    if model_name == "linear_regression":
+        alpha = float(params.get("alpha", 0.0))
+        return Ridge(alpha=alpha) if alpha > 0 else LinearRegression()
+    if model_name == "decision_tree":
+        return DecisionTreeRegressor(random_state=0, **params)
+    raise ValueError(f"No sweep estimator for model '{model_name}'")
+
+
+def split_train_validation(n_rows: int, validation_size: float, random_state: int) -> tuple:
+    """Deterministically split training row indices into (fit, validation)."""
+    order = np.random.default_rng(random_state).permutation(n_rows)
+    n_val = max(1, int(n_rows * validation_size))
+    return order[n_val:], np.sort(order[:n_val])
+
+
+def _init_worker(data_dir, validation_size, random_state):
+    """Map the processed arrays once; every trial in this worker reuses them."""
+    global _worker_data, _worker_split
+    _worker_data = load_processed_data(data_dir, mmap_mode="r")
+    _worker_split = split_train_validation(len(_worker_data[2]), validation_size, random_state)
+
+
+def _evaluate_trial(model_name, params, n_rows):
+    X_train, _, y_train, _ = _worker_data
+    fit_rows, val_rows = _worker_split
+    # Sorted indices keep reads from the memory-mapped arrays sequential
+    rows = np.sort(fit_rows[:n_rows])
+    start = time.perf_counter()
+    model = build_estimator(model_name, params).fit(X_train[rows], y_train[rows])
+    fit_time = time.perf_counter() - start
+    val_mse = mean_squared_error(y_train[val_rows], model.predict(X_train[val_rows]))
+    return float(val_mse), fit_time
+
+
+def successive_halving(pool, model_name: str, trials: list, n_fit_rows: int, settings: dict) -> list:
+    """
+    Score ``trials`` with successive halving on growing data subsets.
+
+    Returns:
+        One record per trial with its params, per-rung validation MSE and
+        a ``winner`` flag set on the single surviving trial.
+    """
+    eta = max(2, int(settings["eta"]))
+    fraction = float(settings["min_fraction"])
+    records = [{"params": params, "history": []} for params in trials]
+    alive = list(range(len(records)))
+    rung = 0
+    while True:
+        n_rows = max(1, int(n_fit_rows * min(1.0, fraction)))
+        futures = [pool.submit(_evaluate_trial, model_name, records[i]["params"], n_rows) for i in alive]
+        for i, future in zip(alive, futures):
+            val_mse, fit_time = future.result()
+            records[i]["history"].append({"rung": rung, "n_rows": n_rows, "val_mse": val_mse, "fit_time": fit_time})
+
+        alive.sort(key=lambda i: records[i]["history"][-1]["val_mse"])
+        logger.info("[Sweep] %s rung %d: %d trials on %d rows, best val_mse=%.5f",
+                    model_name, rung, len(alive), n_rows, records[alive[0]]["history"][-1]["val_mse"])
+        if fraction >= 1.0:
+            break
+        alive = alive[:max(1, math.ceil(len(alive) / eta))]
+        if len(alive) == 1:
+            break
+        fraction *= eta
+        rung += 1
+
+    winner = alive[0]
+    for i, record in enumerate(records):
+        record["winner"] = i == winner
+    return records
+
+
+def _log_trials(model_name: str, records: list):
+    """Log every trial as a nested run under the active parent run."""
+    total_rungs = max(len(record["history"]) for record in records)
+    for index, record in enumerate(records):
+        with mlflow.start_run(run_name=f"{model_name}-trial-{index}", nested=True):
+            mlflow.log_params(record["params"])
+            for entry in record["history"]:
+                mlflow.log_metrics(
+                    {"val_mse": entry["val_mse"], "n_rows": entry["n_rows"], "fit_time_sec": entry["fit_time"]},
+                    step=entry["rung"]
+                )
+            mlflow.set_tags({
+                "winner": record["winner"],
+                "pruned": len(record["history"]) < total_rungs,
+            })
+
+
+def sweep_model(pool, model_name: str, grid: dict, data: tuple, settings: dict) -> dict:
+    """
+    Sweep one model's grid, log the trials and register the refitted winner.
+
+    Returns:
+        Dict with the parent run id, winning params and test metrics.
+    """
+    X_train, X_test, y_train, y_test = data
+    trials = expand_grid(grid)
+    fit_rows, _ = split_train_validation(len(y_train), settings["validation_size"], settings["random_state"])
+    start = time.perf_counter()
+
+    with mlflow.start_run(run_name=f"{model_name}-sweep") as parent:
+        logger.info("[Sweep] %s: %d trials", model_name, len(trials))
+        records = successive_halving(pool, model_name, trials, len(fit_rows), settings)
+        _log_trials(model_name, records)
+        best = next(record for record in records if record["winner"])
+
+        # Refit the winner on every training row and evaluate on the test split
+        model = build_estimator(model_name, best["params"]).fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        mse = mean_squared_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+        duration = time.perf_counter() - start
+
+        mlflow.log_params(best["params"])
+        mlflow.log_params({"n_trials": len(trials), "eta": settings["eta"]})
+        mlflow.log_metrics({
+            "mse": mse,
+            "r2": r2,
+            "best_val_mse": best["history"][-1]["val_mse"],
+            "training_time_sec": duration,
+        })
+
+        serving_model = fuse_scaler(model)
+        input_example = np.asarray(X_test[:5])
+        if serving_model is not model:
+            input_example = serving_model.named_steps["scaler"].inverse_transform(input_example)
+        mlflow.sklearn.log_model(
+            sk_model=serving_model,
+            artifact_path="model",
+            input_example=input_example,
+            registered_model_name=model_name
+        )
+        save_model(model, os.path.join("models", f"{model_name}.pkl"))
+
+    logger.info("[Sweep] %s winner %s: test MSE=%.4f, R2=%.4f (%.2fs)",
+                model_name, best["params"], mse, r2, duration)
+    return {
+        "model": model_name,
+        "run_id": parent.info.run_id,
+        "params": best["params"],
+        "mse": mse,
+        "r2": r2,
+        "training_time_sec": duration,
+    }
+
+
+def sweep_grids(config: dict) -> dict:
+    """Return the sweep grid of every model section that declares one."""
+    return {
+        name: section["sweep"]
+        for name, section in config.items()
+        if isinstance(section, dict) and isinstance(section.get("sweep"), dict)
+    }
+
+
+def run_sweeps(data_dir: str = PROCESSED_DIR, max_workers: int = None, models: list = None) -> dict:
+    """
+    Run the sweep of every model section in config.yaml that declares one.
+
+    Args:
+        models (list): Restrict the sweep to these model names.
+
+    Returns:
+        Dict mapping model name to its sweep result.
+    """
+    config = load_config()
+    settings = {**SWEEP_DEFAULTS, **(config.get("sweep") or {})}
+    grids = sweep_grids(config)
+    if models is not None:
+        grids = {name: grid for name, grid in grids.items() if name in models}
+    if not grids:
+        logger.warning("[Sweep] No model in config.yaml declares a sweep grid.")
+        return {}
+
+    configure_mlflow()
+    data = load_processed_data(data_dir, mmap_mode="r")
+    workers = max_workers or available_cpus()
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(data_dir, settings["validation_size"], settings["random_state"])
+    ) as pool:
+        for model_name, grid in grids.items():
+            results[model_name] = sweep_model(pool, model_name, grid, data, settings)
+    return results
+
+
+def main():
+    run_sweeps()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""train_incremental.py
+Incrementally updates the linear regression candidate from the data store.
+
+Instead of refitting on the full history, the trainer keeps the sufficient
+statistics of least squares (row count, feature and target sums, X^T X and
+X^T y) over the raw training rows. Each run folds in only the store segments
+it has not seen yet, at a cost proportional to the new rows, and solves the
+small normal equations for coefficients identical to a LinearRegression fit
+on every stored row. The same statistics over the test rows give the test
+MSE and R2 of any coefficients in closed form, so evaluation also only reads
+the new segments. The solution is re-expressed on the store's current
+scaler so the logged model is the usual scaler + model pipeline."""
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import mlflow
+import mlflow.sklearn
+from sklearn.linear_model import LinearRegression
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.common import configure_mlflow, fuse_scaler, load_environment_variables, save_model
+from utils.data_store import ProcessedDataStore
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+load_environment_variables()
+
+INCREMENTAL_STATE_PATH = os.path.join("models", "linear_regression_incremental.pkl")
+
+
+class LinearSufficientStats:
+    """Running least-squares statistics over raw feature rows."""
+
+    def __init__(self, n_features: int):
+        self.n = 0
+        self.sum_x = np.zeros(n_features)
+        self.sum_y = 0.0
+        self.sum_yy = 0.0
+        self.xtx = np.zeros((n_features, n_features))
+        self.xty = np.zeros(n_features)
+        self.segments = []
+
+    def update(self, X: np.ndarray, y: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.n += len(y)
+        self.sum_x += X.sum(axis=0)
+        self.sum_y += float(y.sum())
+        self.sum_yy += float(y @ y)
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+
+    def solve(self) -> tuple:
+        """
+        Return the least-squares (coef, intercept) on raw features.
+
+        Raises:
+            ValueError: If no rows have been seen.
+        """
+        if self.n == 0:
+            raise ValueError("no rows to fit the linear model on")
+        mean_x = self.sum_x / self.n
+        mean_y = self.sum_y / self.n
+        # Centering removes the intercept from the normal equations
+        cov = self.xtx - self.n * np.outer(mean_x, mean_x)
+        cross = self.xty - self.n * mean_x * mean_y
+        coef = np.linalg.lstsq(cov, cross, rcond=None)[0]
+        return coef, mean_y - float(mean_x @ coef)
+
+    def residual_sum_of_squares(self, coef: np.ndarray, intercept: float) -> float:
+        """Sum of (y - x . coef - intercept)^2 over every row seen, expanded into the statistics."""
+        return float(
+            self.sum_yy - 2 * coef @ self.xty - 2 * intercept * self.sum_y + coef @ self.xtx @ coef
+            + 2 * intercept * coef @ self.sum_x + self.n * intercept ** 2
+        )
+
+    def scores(self, coef: np.ndarray, intercept: float) -> tuple:
+        """
+        Return the (mse, r2) of the coefficients on the rows seen.
+
+        Raises:
+            ValueError: If no rows have been seen.
+        """
+        if self.n == 0:
+            raise ValueError("no rows to score the linear model on")
+        rss = self.residual_sum_of_squares(coef, intercept)
+        return rss / self.n, 1 - rss / (self.sum_yy - self.sum_y ** 2 / self.n)
+
+
+def scaled_linear_model(coef: np.ndarray, intercept: float, scaler) -> LinearRegression:
+    """
+    Build a LinearRegression over scaled features from raw-space coefficients.
+
+    ``coef . x + b`` equals ``(coef * scale) . (x - mean) / scale + (b + coef . mean)``.
+    """
+    model = LinearRegression()
+    model.coef_ = coef * scaler.scale_
+    model.intercept_ = intercept + float(coef @ scaler.mean_)
+    model.n_features_in_ = coef.shape[0]
+    return model
+
+
+def train_linear_incremental(store: ProcessedDataStore = None, state_path: str = INCREMENTAL_STATE_PATH) -> dict:
+    """
+    Fold new store segments into the linear model and log it to MLflow.
+
+    Segments without training rows would leave the model unchanged, and an
+    update with no test rows at all cannot be scored; either way the update
+    is skipped and its segments are folded in with the next one.
+
+    Returns:
+        Dict with the run id, the segments folded in, metrics and training
+        time, or None if there is nothing to update.
+    """
+    start_time = time.time()
+    store = store or ProcessedDataStore()
+    # Training and test rows are folded into separate statistics
+    state = joblib.load(state_path) if os.path.exists(state_path) else None
+    stats, test_stats = (state["train"], state["test"]) if state is not None else (None, None)
+    new_segments = [
+        segment for segment in store.segments
+        if stats is None or segment["name"] not in stats.segments
+    ]
+    if not new_segments:
+        logger.info("No new data store segments; linear model is up to date.")
+        return None
+    new_rows = sum(segment["n_train"] for segment in new_segments)
+    if new_rows == 0:
+        logger.warning(f"New segments {[segment['name'] for segment in new_segments]} have no "
+                       "training rows; skipping the linear model update.")
+        return None
+
+    for segment in new_segments:
+        X_train, X_test, y_train, y_test = store.load_segment(segment["name"])
+        if stats is None:
+            stats, test_stats = LinearSufficientStats(X_train.shape[1]), LinearSufficientStats(X_train.shape[1])
+        stats.update(X_train, y_train)
+        test_stats.update(X_test, y_test)
+        stats.segments.append(segment["name"])
+    if test_stats.n == 0:
+        logger.warning("The data store has no test rows to score the update on; skipping it.")
+        return None
+    coef, intercept = stats.solve()
+    model = scaled_linear_model(coef, intercept, store.scaler)
+
+    mse, r2 = test_stats.scores(coef, intercept)
+    logger.info(f"Linear model updated with {new_rows} new rows ({stats.n} total). "
+                f"MSE: {mse:.4f}, R2: {r2:.4f}")
+
+    configure_mlflow()
+    with mlflow.start_run(run_name="LinearRegression-incremental") as run:
+        mlflow.log_params({
+            "incremental": True,
+            "store_version": store.version,
+            "n_train_rows": stats.n,
+            "n_new_rows": new_rows,
+        })
+        mlflow.log_metric("mse", mse)
+        mlflow.log_metric("r2", r2)
+        mlflow.sklearn.log_model(
+            sk_model=fuse_scaler(model, store.scaler_path),
+            artifact_path="model",
+            input_example=np.asarray(X_train[:5]),
+            registered_model_name="linear_regression"
+        )
+        save_model(model, os.path.join("models", "linear_regression.pkl"))
+        duration = time.time() - start_time
+        mlflow.log_metric("training_time_sec", duration)
+
+    # Persist the statistics only once the model is logged
+    save_model({"train": stats, "test": test_stats}, state_path)
+    return {
+        "model": "linear_regression",
+        "run_id": run.info.run_id,
+        "segments": [segment["name"] for segment in new_segments],
+        "mse": mse,
+        "r2": r2,
+        "training_time_sec": duration,
+    }
+
+
+def main():
+    train_linear_incremental()
+
+
+if __name__ == "__main__":
+    main()
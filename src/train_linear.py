@@ -5,14 +5,16 @@ import sys
 import time
 import mlflow
 import mlflow.sklearn
-import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from utils.common import load_config, save_model, load_environment_variables
+from utils.common import (
+    load_config, save_model, load_environment_variables, fuse_scaler,
+    load_processed_data, configure_mlflow
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -20,7 +22,7 @@ logger = get_logger(__name__)
 load_environment_variables()
 
 
-def train_linear_regression():
+def train_linear_regression(data: tuple = None) -> dict:
     """
     Train a Linear Regression model on California Housing data,
     log experiment using MLflow, and persist the best model.
@@ -29,29 +31,34 @@ def train_linear_regression():
         - MSE and R² as evaluation metrics
         - Training duration
         - Trained model artifact to MLflow
+
+    Args:
+        data (tuple): Preloaded (X_train, X_test, y_train, y_test); read from
+            data/processed when omitted.
+
+    Returns:
+        Dict with the run id, metrics and training time, or None on failure.
     """
     start_time = time.time()
     logger.info("Loading configuration and data...")
     # Load configuration
     config = load_config()
     params = config.get('linear_regression', {})
+    params = {key: value for key, value in params.items() if key != "sweep"}
 
     # Load training data
-    data_dir = "data/processed"
-    X_train = np.load(os.path.join(data_dir, "X_train.npy"))
-    X_test = np.load(os.path.join(data_dir, "X_test.npy"))
-    y_train = np.load(os.path.join(data_dir, "y_train.npy"))
-    y_test = np.load(os.path.join(data_dir, "y_test.npy"))
+    if data is None:
+        data = load_processed_data()
+    X_train, X_test, y_train, y_test = data
 
     logger.info("Starting MLflow run for Linear Regression...")
+    result = None
     try:
         # Set MLflow Tracking URI from env variable
-        tracking_url = os.getenv("MLFLOW_TRACKING_URI")
+        tracking_url = configure_mlflow()
         logger.info(f"MLflow Tracking URI: {tracking_url}")
-        mlflow.set_tracking_uri(tracking_url)
-        mlflow.set_experiment("california_housing")
 
-        with mlflow.start_run(run_name="LinearRegression"):
+        with mlflow.start_run(run_name="LinearRegression") as run:
             model = LinearRegression()
             model.fit(X_train, y_train)
 
@@ -67,10 +74,13 @@ def train_linear_regression():
             mlflow.log_metric("r2", r2)
             logger.info(f"Logged metrics - MSE: {mse:.4f}, R2: {r2:.4f}")
 
-            # Log model with signature and input example (optional but recommended)
+            # Log scaler + model as one pipeline so serving takes raw features
+            serving_model = fuse_scaler(model)
             input_example = X_test[:5]  # small batch
+            if serving_model is not model:
+                input_example = serving_model.named_steps["scaler"].inverse_transform(input_example)
             mlflow.sklearn.log_model(
-                sk_model=model,
+                sk_model=serving_model,
                 artifact_path="model",
                 input_example=input_example,
                 registered_model_name="linear_regression"
@@ -82,13 +92,23 @@ def train_linear_regression():
             model_path = os.path.join("models", "linear_regression.pkl")
             save_model(model, model_path)
             logger.info(f"Model saved to {model_path}")
+
+            duration = time.time() - start_time
+            mlflow.log_metric("training_time_sec", duration)
+            result = {
+                "model": "linear_regression",
+                "run_id": run.info.run_id,
+                "mse": mse,
+                "r2": r2,
+                "training_time_sec": duration,
+            }
     except Exception as e:
         logger.exception(f"Training failed: {str(e)}")
     finally:
         duration = time.time() - start_time
         logger.info(f"Total training time: {duration:.2f} seconds")
-        mlflow.log_metric("training_time_sec", duration)
         mlflow.end_run()
+    return result
 
 
 def main():
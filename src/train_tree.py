@@ -6,13 +6,15 @@ import mlflow
 import mlflow.sklearn
 from mlflow.models.signature import infer_signature
 import time
-import numpy as np
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from utils.common import load_config, save_model, load_environment_variables
+from utils.common import (
+    load_config, save_model, load_environment_variables, fuse_scaler,
+    load_processed_data, configure_mlflow
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -20,7 +22,7 @@ logger = get_logger(__name__)
 load_environment_variables()
 
 
-def train_decision_tree():
+def train_decision_tree(data: tuple = None) -> dict:
     """
     Train a Decision Tree Regressor on preprocessed California Housing data.
     Logs the model training run using MLflow, including:
@@ -29,28 +31,32 @@ def train_decision_tree():
     - Training time
     - Model artifacts (saved locally and to MLflow)
 
+    Args:
+        data (tuple): Preloaded (X_train, X_test, y_train, y_test); read from
+            data/processed when omitted.
+
+    Returns:
+        Dict with the run id, metrics and training time.
+
     Raises:
         Exception: If training or logging fails
     """
     start_time = time.time()
     logger.info("Loading configuration and data...")
     config = load_config()
-    params = config["decision_tree"]
+    params = {key: value for key, value in config["decision_tree"].items() if key != "sweep"}
 
     # Load preprocessed data
-    X_train = np.load("data/processed/X_train.npy")
-    X_test = np.load("data/processed/X_test.npy")
-    y_train = np.load("data/processed/y_train.npy")
-    y_test = np.load("data/processed/y_test.npy")
+    if data is None:
+        data = load_processed_data()
+    X_train, X_test, y_train, y_test = data
 
     logger.info("Starting MLflow run for Decision Tree...")
     try:
         # Set MLflow Tracking URI from env variable
-        tracking_url = os.getenv("MLFLOW_TRACKING_URI")
+        tracking_url = configure_mlflow()
         logger.info(f"MLflow Tracking URI: {tracking_url}")
-        mlflow.set_tracking_uri(tracking_url)
-        mlflow.set_experiment("california_housing")
-        with mlflow.start_run(run_name="DecisionTreeRegressor"):
+        with mlflow.start_run(run_name="DecisionTreeRegressor") as run:
             model = DecisionTreeRegressor(max_depth=params["max_depth"])
             model.fit(X_train, y_train)
 
@@ -63,12 +69,17 @@ def train_decision_tree():
             mlflow.log_metric("mse", mse)
             mlflow.log_metric("r2", r2)
             logger.info(f"Model training complete. MSE: {mse:.4f}, R2: {r2:.4f}")
+            # Log scaler + model as one pipeline so serving takes raw features
+            serving_model = fuse_scaler(model)
+            X_example = X_test
+            if serving_model is not model:
+                X_example = serving_model.named_steps["scaler"].inverse_transform(X_test)
             # Infer signature and log model with input example
-            signature = infer_signature(X_test, y_pred)
-            input_example = X_test[:1]
+            signature = infer_signature(X_example, y_pred)
+            input_example = X_example[:1]
 
             mlflow.sklearn.log_model(
-                sk_model=model,
+                sk_model=serving_model,
                 artifact_path="model",
                 input_example=input_example,
                 signature=signature,
@@ -79,13 +90,22 @@ def train_decision_tree():
             model_path = os.path.join("models", "decision_tree.pkl")
             save_model(model, model_path)
             logger.info(f"Model saved to {model_path}")
+
+            duration = time.time() - start_time
+            mlflow.log_metric("training_time_sec", duration)
+            return {
+                "model": "decision_tree",
+                "run_id": run.info.run_id,
+                "mse": mse,
+                "r2": r2,
+                "training_time_sec": duration,
+            }
     except Exception as e:
         logger.exception("Error occurred during Decision Tree training.")
         raise e
     finally:
         duration = time.time() - start_time
         logger.info(f"Total training time: {duration:.2f} seconds")
-        mlflow.log_metric("training_time_sec", duration)
         mlflow.end_run()
 
 
@@ -1,37 +1,334 @@
-import sys
-from watchdog.observers.polling import PollingObserver
-from watchdog.events import FileSystemEventHandler
+"""watch_and_train.py
+Retrains the model when new data files (CSV, Parquet or Arrow IPC) land in
+the watch directory.
+
+New files are picked up through inotify where the platform supports it
+(watchdog's native Observer), falling back to polling otherwise. Each file
+is added to a persistent queue on disk. A single scheduler thread waits
+until no new file has arrived for DEBOUNCE_SECONDS and every queued file has
+stopped growing, converts the queued files into one Parquet batch and runs the
+training pipeline on it. Only one pipeline runs at a time; files that arrive
+meanwhile are coalesced into the next batch. A batch that was running when
+the watcher stopped is re-queued on restart.
+
+A ``*.retrain.json`` file (written by the API's drift monitor) is a request
+to retrain on RETRAIN_TRIGGER_DATA_PATH; it is queued like a new data file,
+and a batch that includes it runs the full pipeline with ``--no-cache`` so
+the models are refitted even when that data has not changed."""
+import json
+import os
 import subprocess
+import sys
+import threading
 import time
-import os
+from datetime import datetime
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.logger import get_logger
+from utils.raw_data import ARROW_SUFFIXES, PARQUET_SUFFIXES, convert_to_parquet
+
+WATCH_DIR = os.getenv("WATCH_DIR", "/app/data/new")
+BATCH_DIR = os.path.join(WATCH_DIR, "batches")
+QUEUE_PATH = os.getenv("RETRAIN_QUEUE_PATH", os.path.join(".cache", "retrain_queue.json"))
+# Quiet period after the last new file before a batch is started
+DEBOUNCE_SECONDS = float(os.getenv("RETRAIN_DEBOUNCE_SECONDS", "10"))
+# A file counts as fully written once its size is unchanged for this long
+STABLE_SECONDS = float(os.getenv("RETRAIN_STABLE_SECONDS", "2"))
+# Force the polling observer, e.g. for bind mounts that don't deliver inotify events
+WATCH_POLLING = os.getenv("WATCH_POLLING", "false").lower() == "true"
+# Append batches to the data store and update the model instead of retraining from scratch
+RETRAIN_INCREMENTAL = os.getenv("RETRAIN_INCREMENTAL", "false").lower() == "true"
+DATA_SUFFIXES = (".csv",) + PARQUET_SUFFIXES + ARROW_SUFFIXES
+# Retraining requests dropped by the API's drift monitor, and the data they retrain on
+RETRAIN_TRIGGER_SUFFIX = ".retrain.json"
+RETRAIN_TRIGGER_DATA_PATH = os.getenv("RETRAIN_TRIGGER_DATA_PATH", os.path.join("data", "raw", "housing.csv"))
+PIPELINE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_training_pipeline.py")
 
-WATCH_DIR = "/app/data/new"
 logger = get_logger(__name__)
 
 
+class RetrainQueue:
+    """
+    Pending data files persisted as JSON so they survive restarts.
+
+    ``pending`` holds files waiting for the next batch and ``running`` the
+    files of the batch currently being trained. Every change is written to
+    a temporary file and renamed into place.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.pending, self.running = [], []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            # An interrupted batch goes back to the front of the queue
+            self.pending = _unique(state.get("running", []) + state.get("pending", []))
+            self._save()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.pending)
+
+    def add(self, path: str) -> bool:
+        """Queue a file; returns False if it is already queued or running."""
+        with self._lock:
+            if path in self.pending or path in self.running:
+                return False
+            self.pending.append(path)
+            self._save()
+            return True
+
+    def take(self) -> list:
+        """Move every pending file into the running batch and return it."""
+        with self._lock:
+            self.running, self.pending = self.pending, []
+            self._save()
+            return list(self.running)
+
+    def done(self):
+        """Clear the running batch once its pipeline has finished."""
+        with self._lock:
+            self.running = []
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pending": self.pending, "running": self.running}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _unique(paths: list) -> list:
+    return list(dict.fromkeys(paths))
+
+
+def wait_until_stable(paths: list, stable_seconds: float = STABLE_SECONDS, timeout: float = 600) -> list:
+    """
+    Block until every file in ``paths`` stops growing.
+
+    All files are polled together, so a burst waits about ``stable_seconds``
+    in total rather than per file.
+
+    Returns:
+        The files that became stable, in order; vanished and timed-out files are dropped.
+    """
+    deadline = time.monotonic() + timeout
+    last_sizes, stable = {}, set()
+    waiting = list(paths)
+    while waiting and time.monotonic() < deadline:
+        for path in list(waiting):
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                waiting.remove(path)
+                continue
+            if size == last_sizes.get(path) and size > 0:
+                stable.add(path)
+                waiting.remove(path)
+            last_sizes[path] = size
+        if waiting:
+            time.sleep(stable_seconds)
+    return [path for path in paths if path in stable]
+
+
+def run_pipeline_subprocess(data_path: str, use_cache: bool = True) -> int:
+    """
+    Run the training pipeline on ``data_path`` and wait for it to exit.
+
+    With ``use_cache`` off the full pipeline runs without its step cache,
+    even in incremental mode, so every model is refitted from scratch.
+    """
+    command = [sys.executable, PIPELINE_SCRIPT, data_path]
+    if not use_cache:
+        command.append("--no-cache")
+    elif RETRAIN_INCREMENTAL:
+        command.append("--incremental")
+    return subprocess.run(command).returncode
+
+
+class RetrainScheduler:
+    """
+    Single-flight scheduler that coalesces queued files into training runs.
+
+    A background thread waits for the debounce window to pass, takes every
+    pending file, merges them and runs ``runner`` on the result. Runs never
+    overlap; files queued while a run is in progress go into the next one.
+    """
+
+    def __init__(
+        self,
+        queue: RetrainQueue,
+        runner=run_pipeline_subprocess,
+        debounce_seconds: float = DEBOUNCE_SECONDS,
+        stable_seconds: float = STABLE_SECONDS,
+        batch_dir: str = BATCH_DIR
+    ):
+        self.queue = queue
+        self.runner = runner
+        self.debounce_seconds = debounce_seconds
+        self.stable_seconds = stable_seconds
+        self.batch_dir = batch_dir
+        self._last_event = time.monotonic()
+        self._wakeup = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, path: str):
+        """Queue a new file and restart the debounce window."""
+        if self.queue.add(os.path.abspath(path)):
+            logger.info(f"[Watcher] Queued {path} ({len(self.queue)} pending)")
+        with self._wakeup:
+            self._last_event = time.monotonic()
+            self._wakeup.notify()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="retrain-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop after the current run, if any, finishes."""
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            with self._wakeup:
+                while not self._stopped:
+                    quiet_for = time.monotonic() - self._last_event
+                    if len(self.queue) and quiet_for >= self.debounce_seconds:
+                        break
+                    self._wakeup.wait(max(0.05, self.debounce_seconds - quiet_for) if len(self.queue) else None)
+                if self._stopped:
+                    return
+            try:
+                self.run_batch()
+            except Exception as e:
+                # Keep watching; the failed batch has already been cleared from the queue
+                logger.exception(f"[Watcher] Batch failed: {e}")
+
+    def run_batch(self):
+        """
+        Train on every pending file as a single batch.
+
+        The batch leaves the queue however it ends, so a file that cannot be
+        converted is dropped (and logged) instead of being retried on every
+        restart.
+        """
+        try:
+            self._run_batch(self.queue.take())
+        finally:
+            self.queue.done()
+
+    def _run_batch(self, queued: list):
+        paths = wait_until_stable(queued, self.stable_seconds)
+        if not paths:
+            return
+        # Convert once on arrival so every pipeline step reads typed columnar data
+        data_path = os.path.join(self.batch_dir, f"batch-{datetime.now():%Y%m%d-%H%M%S-%f}.parquet")
+        try:
+            merged = convert_to_parquet(paths, data_path)
+        except Exception:
+            if os.path.exists(data_path):
+                os.remove(data_path)
+            raise
+        if not merged:
+            logger.error(f"[Watcher] No usable files in batch: {paths}")
+            os.remove(data_path)
+            return
+        logger.info(f"[Watcher] Converted {merged} of {len(paths)} files into {data_path}")
+
+        # Drift requests retrain on data that may be unchanged, which the step cache would skip
+        use_cache = os.path.abspath(RETRAIN_TRIGGER_DATA_PATH) not in paths
+        logger.info(f"[Watcher] Running training pipeline on {data_path}{'' if use_cache else ' without cache'}")
+        start = time.perf_counter()
+        try:
+            returncode = self.runner(data_path, use_cache)
+            if returncode:
+                logger.error(f"[Watcher] Training pipeline exited with code {returncode}")
+            else:
+                logger.info(f"[Watcher] Training pipeline finished in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.error(f"[Watcher] Training pipeline failed: {e}")
+        finally:
+            # The batch is rebuilt from the queued files if the run is interrupted
+            os.remove(data_path)
+
+
 class NewDataHandler(FileSystemEventHandler):
+    def __init__(self, scheduler: RetrainScheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
+    def _handle(self, path: str):
+        """Queue new data files, and the training data on retraining requests, for the next batch."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(WATCH_DIR):
+            return
+        if path.lower().endswith(DATA_SUFFIXES):
+            logger.info(f"[Watcher] New data detected: {path}")
+            self.scheduler.submit(path)
+        elif path.endswith(RETRAIN_TRIGGER_SUFFIX):
+            self._handle_retrain_request(path)
+
+    def _handle_retrain_request(self, path: str):
+        try:
+            with open(path, encoding="utf-8") as f:
+                request = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"[Watcher] Ignoring unreadable retraining request {path}: {e}")
+            return
+        logger.warning(
+            f"[Watcher] Retraining requested ({request.get('reason')}: {', '.join(request.get('features', []))})"
+        )
+        self.scheduler.submit(RETRAIN_TRIGGER_DATA_PATH)
+
     def on_created(self, event):
-        """Handle new data files by triggering the training pipeline."""
-        logger.info(f"[Watcher] Detected new file: {event.src_path}")
-        if event.src_path.endswith(".csv"):
-            logger.info(f"[Watcher] New data detected: {event.src_path}")
-            subprocess.Popen([
-                "python", "src/run_training_pipeline.py", event.src_path
-            ])
+        if not event.is_directory:
+            self._handle(event.src_path)
 
+    def on_moved(self, event):
+        # Writers that create a temp file and rename it into place
+        if not event.is_directory:
+            self._handle(event.dest_path)
 
-if __name__ == "__main__":
-    os.makedirs(WATCH_DIR, exist_ok=True)
-    event_handler = NewDataHandler()
+
+def start_observer(handler: FileSystemEventHandler, path: str = WATCH_DIR):
+    """Start an inotify observer, falling back to polling if it is unavailable."""
+    if not WATCH_POLLING:
+        observer = Observer()
+        try:
+            observer.schedule(handler, path=path, recursive=False)
+            observer.start()
+            logger.info(f"[Watcher] Using {type(observer).__name__} on {os.path.abspath(path)}")
+            return observer
+        except OSError as e:
+            logger.warning(f"[Watcher] Native observer unavailable ({e}); falling back to polling")
     observer = PollingObserver()
-    observer.schedule(event_handler, path=WATCH_DIR, recursive=False)
+    observer.schedule(handler, path=path, recursive=False)
     observer.start()
-    logger.info(f"[Watcher] Watching absolute path: {os.path.abspath(WATCH_DIR)}")
+    logger.info(f"[Watcher] Using PollingObserver on {os.path.abspath(path)}")
+    return observer
+
+
+if __name__ == "__main__":
+    os.makedirs(WATCH_DIR, exist_ok=True)
+    scheduler = RetrainScheduler(RetrainQueue())
+    if len(scheduler.queue):
+        logger.info(f"[Watcher] Resuming {len(scheduler.queue)} queued files")
+    scheduler.start()
+    observer = start_observer(NewDataHandler(scheduler))
     try:
         while True:
             time.sleep(10)
     except KeyboardInterrupt:
         observer.stop()
+        scheduler.stop()
     observer.join()
@@ -0,0 +1,15 @@
+import os
+import shutil
+import tempfile
+
+# Modules create their loggers on import, before any fixture runs, so the log
+# file is redirected here rather than left as app.log in the working directory
+_log_dir = tempfile.mkdtemp(prefix="tests-log-")
+
+
+def pytest_configure(config):
+    os.environ.setdefault("LOG_FILE", os.path.join(_log_dir, "app.log"))
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_log_dir, ignore_errors=True)
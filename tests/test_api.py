@@ -0,0 +1,128 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+pytest.importorskip("prometheus_fastapi_instrumentator")
+httpx = pytest.importorskip("httpx")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+import main  # noqa: E402
+import model_pool  # noqa: E402
+from model_loader import model_cache  # noqa: E402
+from router import admin, agent  # noqa: E402
+
+ROW = {
+    "MedInc": 8.3252, "HouseAge": 41.0, "AveRooms": 6.98, "AveBedrms": 1.02,
+    "Population": 322.0, "AveOccup": 2.55, "Latitude": 37.88, "Longitude": -122.23,
+}
+
+
+class SumModel:
+    def predict(self, X):
+        return np.asarray(X).sum(axis=1)
+
+
+def request(method, url, **kwargs):
+    """Send one request to the app in-process; the lifespan (model warm-up) is not run."""
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(send())
+
+
+@pytest.fixture
+def serving(monkeypatch):
+    monkeypatch.setattr(model_cache, "_entry", ("7", SumModel()))
+
+
+def test_batch_prediction_accepts_a_list_of_rows(serving):
+    rows = [ROW, {**ROW, "MedInc": 1.0}]
+    response = request("POST", "/agents/predictions:batch", json=rows)
+    assert response.status_code == 200
+    assert response.json() == [{"predicted_price": pytest.approx(sum(row.values()))} for row in rows]
+
+
+def test_batch_prediction_accepts_columns(serving):
+    columns = {name: [value, value] for name, value in ROW.items()}
+    response = request("POST", "/agents/predictions:batch", json=columns)
+    assert response.status_code == 200
+    assert response.json() == [{"predicted_price": pytest.approx(sum(ROW.values()))}] * 2
+
+
+def test_batch_prediction_rejects_columns_of_different_lengths(serving):
+    columns = {name: [value, value] for name, value in ROW.items()}
+    columns["Latitude"] = [37.88]
+    response = request("POST", "/agents/predictions:batch", json=columns)
+    assert response.status_code == 422
+
+
+def test_ready_only_after_warm_up(monkeypatch):
+    monkeypatch.setattr(model_cache, "_entry", (None, None))
+    monkeypatch.setattr(model_cache, "start", lambda: setattr(model_cache, "_entry", ("7", SumModel())))
+    monkeypatch.setattr(main.shadow_evaluator, "start", lambda: None)
+
+    response = request("GET", "/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "loading"
+
+    main.warm_up()
+    response = request("GET", "/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "model_name": model_cache.model_name, "model_version": "7"}
+
+
+class FakeMlflowException(Exception):
+    def __init__(self, message, error_code):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A fresh model pool whose registry lookups raise ``registry.error``."""
+    registry = SimpleNamespace(error=None)
+
+    def get_model_version(name, version):
+        raise registry.error
+
+    fake_mlflow = SimpleNamespace(
+        exceptions=SimpleNamespace(MlflowException=FakeMlflowException),
+        tracking=SimpleNamespace(MlflowClient=lambda: SimpleNamespace(get_model_version=get_model_version)),
+    )
+    monkeypatch.setattr(model_pool, "get_mlflow", lambda: fake_mlflow)
+    monkeypatch.setattr(agent, "model_pool", model_pool.ModelPool())
+    return registry
+
+
+def test_model_version_prediction_unknown_version_is_404(registry):
+    registry.error = FakeMlflowException("not found", "RESOURCE_DOES_NOT_EXIST")
+    response = request("POST", "/agents/models/decision_tree/versions/99/prediction", json=ROW)
+    assert response.status_code == 404
+    assert "has no version 99" in response.json()["detail"]
+
+
+def test_model_version_prediction_registry_failure_is_503(registry):
+    registry.error = FakeMlflowException("connection refused", "INTERNAL_ERROR")
+    response = request("POST", "/agents/models/decision_tree/versions/3/prediction", json=ROW)
+    assert response.status_code == 503
+    assert "connection refused" in response.json()["detail"]
+    # Failed loads are not pooled
+    assert request("GET", "/agents/models").json()["models"] == []
+
+
+def test_admin_routes_require_the_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    assert request("GET", "/admin/shadow").status_code == 404
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "s3cret")
+    assert request("GET", "/admin/shadow").status_code == 403
+    assert request("GET", "/admin/shadow", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = request("GET", "/admin/shadow", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.json() == main.shadow_evaluator.stats()
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from batching import MicroBatcher  # noqa: E402
+from executor import ExecutorSaturatedError, InferenceExecutor, InferenceTimeoutError  # noqa: E402
+
+
+def test_concurrent_requests_share_one_batch():
+    calls = []
+
+    def predict(X):
+        calls.append(X.shape[0])
+        return X.sum(axis=1)
+
+    async def run():
+        batcher = MicroBatcher(predict, max_batch_size=16, max_wait_ms=50)
+        batcher.start()
+        rows = [np.full(8, i, dtype=np.float64) for i in range(10)]
+        results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == [8.0 * i for i in range(10)]
+    assert calls == [10]
+
+
+def test_rows_for_different_models_are_scored_separately():
+    calls = []
+
+    def predict(X, model, version):
+        calls.append((version, X.shape[0]))
+        return X.sum(axis=1) * model
+
+    async def run():
+        batcher = MicroBatcher(predict, max_batch_size=16, max_wait_ms=50)
+        batcher.start()
+        # A hot swap mid-burst: each row keeps the model it was accepted under
+        rows = [(np.full(8, i, dtype=np.float64), 1 if i < 3 else 10, "1" if i < 3 else "2") for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(row, model, version) for row, model, version in rows))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == [0.0, 8.0, 16.0, 240.0, 320.0]
+    assert sorted(calls) == [("1", 3), ("2", 2)]
+
+
+def test_predict_errors_reach_every_caller():
+    def predict(X):
+        raise ValueError("bad input")
+
+    async def run():
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+        batcher.start()
+        results = await asyncio.gather(
+            *(batcher.submit(np.zeros(8)) for _ in range(3)), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_executor_rejects_when_backlog_is_full():
+    release = threading.Event()
+
+    async def run():
+        executor = InferenceExecutor(max_workers=1, max_queue=1, timeout=5)
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(running, queued)
+        executor.shutdown()
+        return executor.in_flight
+
+    assert asyncio.run(run()) == 0
+
+
+def test_executor_times_out_slow_tasks():
+    async def run():
+        executor = InferenceExecutor(max_workers=1, max_queue=0, timeout=0.05)
+        with pytest.raises(InferenceTimeoutError):
+            await executor.run(time.sleep, 0.5)
+        executor.shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.harness import compare_results  # noqa: E402
+
+
+def _results(**values):
+    return {"results": {name: {"value": value, "unit": unit} for name, (value, unit) in values.items()}}
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = _results(train=(1.0, "s"), p99=(10.0, "ms"), throughput=(1000.0, "req/s"))
+    current = _results(train=(1.1, "s"), p99=(13.0, "ms"), throughput=(700.0, "req/s"), new=(1.0, "s"))
+
+    rows = {row["name"]: row for row in compare_results(current, baseline, threshold=0.2)}
+
+    assert not rows["train"]["regression"]
+    assert rows["p99"]["regression"]
+    # Lower throughput is a regression even though the number went down
+    assert rows["throughput"]["regression"]
+    assert rows["throughput"]["change"] == pytest.approx(0.3)
+    assert "new" not in rows
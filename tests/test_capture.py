@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("pydantic")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from capture import RequestCapture  # noqa: E402
+from models import FEATURE_COLUMNS  # noqa: E402
+
+ROW = np.array([8.3252, 41.0, 6.98, 1.02, 322.0, 2.55, 37.88, -122.23])
+
+
+def read_captures(directory):
+    lines = []
+    for name in sorted(os.listdir(directory)):
+        with gzip.open(os.path.join(directory, name), "rt") as f:
+            lines.extend(json.loads(line) for line in f)
+    return lines
+
+
+def test_flushes_single_and_batch_requests_as_jsonl(tmp_path):
+    capture = RequestCapture(enabled=True, directory=str(tmp_path))
+    capture.record("prediction", ROW, 4.5, "3", 0.0012)
+    capture.record("predictions:batch", np.vstack([ROW, ROW + 1]), np.array([1.0, 2.0]), "3", 0.01)
+    assert capture.flush() == 3
+    capture.record("prediction", ROW, 5.0, "4", 0.001)
+    capture.stop()
+
+    records = read_captures(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    assert [r["prediction"] for r in records] == [4.5, 1.0, 2.0, 5.0]
+    assert records[0]["features"] == dict(zip(FEATURE_COLUMNS, ROW.tolist()))
+    assert records[0]["latency_ms"] == 1.2 and records[0]["model_version"] == "3"
+    assert records[2]["endpoint"] == "predictions:batch"
+    assert records[2]["features"]["MedInc"] == ROW[0] + 1
+
+
+def test_drops_new_entries_when_buffer_is_full(tmp_path):
+    capture = RequestCapture(enabled=True, directory=str(tmp_path), buffer_size=2)
+    for value in range(5):
+        capture.record("prediction", ROW, float(value), "1", 0.0)
+    assert len(capture) == 2
+    capture.flush()
+    assert [r["prediction"] for r in read_captures(tmp_path)] == [0.0, 1.0]
+
+
+def test_rolls_over_to_a_new_segment_by_size(tmp_path, monkeypatch):
+    capture = RequestCapture(enabled=True, directory=str(tmp_path), segment_max_mb=1e-6)
+    for value in range(3):
+        capture.record("prediction", ROW, float(value), "1", 0.0)
+        # Segment names have one-second resolution
+        monkeypatch.setattr("capture.time.time", lambda value=value: 1_700_000_000 + value)
+        capture.flush()
+    assert len(os.listdir(tmp_path)) == 3
+    assert len(read_captures(tmp_path)) == 3
@@ -0,0 +1,122 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("mlflow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from sklearn.linear_model import LinearRegression  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from sklearn.tree import DecisionTreeRegressor  # noqa: E402
+from src.compile_model import compile_model, save_compiled  # noqa: E402
+import compiled as compiled_module  # noqa: E402
+from compiled import CompiledModel  # noqa: E402
+
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(0)
+    # Raw features on very different scales, like the housing columns
+    X = rng.normal(size=(2000, 8)) * [2.0, 12.0, 2.5, 0.5, 1100.0, 10.0, 2.1, 2.0]
+    X += [3.9, 28.6, 5.4, 1.1, 1425.0, 3.1, 35.6, -119.6]
+    y = 0.4 * X[:, 0] - X[:, 3] + 0.01 * X[:, 6] * X[:, 7] + rng.normal(scale=0.1, size=2000)
+    return X, y
+
+
+@pytest.mark.parametrize("model", [LinearRegression(), DecisionTreeRegressor(max_depth=6)])
+def test_compiled_predictions_match_sklearn(model, training_data, tmp_path):
+    X, y = training_data
+    model.fit(X, y)
+
+    path = save_compiled(compile_model(model), str(tmp_path / "model.npz"))
+    compiled = CompiledModel.load(path)
+
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-12, atol=1e-12)
+    for row in X[:50]:
+        np.testing.assert_allclose(compiled.predict(row[None, :]), model.predict(row[None, :]))
+
+
+def test_large_tree_rows_are_scored_from_shared_arrays(training_data, tmp_path, monkeypatch):
+    X, y = training_data
+    model = DecisionTreeRegressor(max_depth=6).fit(X, y)
+    path = CompiledModel.extract(save_compiled(compile_model(model), str(tmp_path / "model.npz")),
+                                 str(tmp_path / "unpacked"))
+    monkeypatch.setattr(compiled_module, "COMPILED_ROW_LIST_MAX_NODES", 0)
+
+    compiled = CompiledModel.load(path)
+
+    assert compiled._nodes is None and isinstance(compiled.threshold.base, np.memmap)
+    for row in X[:50]:
+        np.testing.assert_allclose(compiled.predict(row[None, :]), model.predict(row[None, :]))
+
+
+@pytest.mark.parametrize("model", [LinearRegression(), DecisionTreeRegressor(max_depth=6)])
+def test_fused_scaler_matches_two_step_prediction(model, training_data, tmp_path):
+    X, y = training_data
+    scaler = StandardScaler().fit(X)
+    model.fit(scaler.transform(X), y)
+    two_step = model.predict(scaler.transform(X))
+
+    fused = Pipeline([("scaler", scaler), ("model", model)])
+    path = save_compiled(compile_model(fused), str(tmp_path / "model.npz"))
+    compiled = CompiledModel.load(path)
+
+    np.testing.assert_allclose(fused.predict(X), two_step)
+    np.testing.assert_allclose(compiled.predict(X), two_step, rtol=1e-9, atol=1e-9)
+    for row in X[:50]:
+        np.testing.assert_allclose(compiled.predict(row), model.predict(scaler.transform(row[None, :])))
+
+
+@pytest.fixture
+def housing_like():
+    rng = np.random.default_rng(0)
+    n = 20000
+    # Rounded and integer columns like the California housing data; ties sit close to split points
+    X = np.column_stack([
+        np.round(rng.lognormal(1.3, 0.45, n), 4),
+        rng.integers(1, 53, n).astype(float),
+        rng.lognormal(1.65, 0.3, n),
+        rng.lognormal(0.05, 0.1, n),
+        rng.integers(3, 35000, n).astype(float),
+        rng.lognormal(1.05, 0.3, n),
+        np.round(rng.uniform(32.5, 42.0, n), 2),
+        np.round(rng.uniform(-124.3, -114.3, n), 2),
+    ])
+    y = 0.4 * X[:, 0] + 0.01 * X[:, 1] - 0.1 * (X[:, 6] - 36) + rng.normal(scale=0.5, size=n)
+    return X[:16000], y[:16000], X[16000:]
+
+
+@pytest.mark.parametrize("max_depth", [None, 12])
+def test_fused_scaler_deep_tree_is_exact_on_unseen_rows(max_depth, housing_like):
+    X, y, X_new = housing_like
+    scaler = StandardScaler().fit(X)
+    model = DecisionTreeRegressor(max_depth=max_depth, random_state=0).fit(scaler.transform(X), y)
+    two_step = model.predict(scaler.transform(X_new))
+
+    compiled = CompiledModel(compile_model(Pipeline([("scaler", scaler), ("model", model)])))
+
+    np.testing.assert_array_equal(compiled.predict(X_new), two_step)
+    np.testing.assert_array_equal([compiled.predict(row)[0] for row in X_new[:500]], two_step[:500])
+
+
+def test_compile_rejects_unsupported_models():
+    with pytest.raises(TypeError):
+        compile_model(object())
+
+
+@pytest.mark.parametrize("model", [LinearRegression(), DecisionTreeRegressor(max_depth=6)])
+def test_extracted_model_is_memory_mapped(model, training_data, tmp_path):
+    X, y = training_data
+    model.fit(X, y)
+
+    path = save_compiled(compile_model(model), str(tmp_path / "model.npz"))
+    shared = CompiledModel.load(CompiledModel.extract(path, str(tmp_path / "shared")))
+
+    arrays = [shared.coef] if shared.kind == "linear" else [shared.threshold, shared.value]
+    # Views onto the mapped files, not private copies
+    assert all(isinstance(array.base, np.memmap) for array in arrays)
+    np.testing.assert_array_equal(shared.predict(X), CompiledModel.load(path).predict(X))
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("pydantic")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from utils import drift_reference  # noqa: E402
+from drift import DriftMonitor, bin_counts  # noqa: E402
+from models import FEATURE_COLUMNS  # noqa: E402
+
+
+def sample(rng, n, shift=0.0):
+    X = rng.normal(size=(n, len(FEATURE_COLUMNS))) * [2.0, 12.0, 2.5, 0.5, 1100.0, 10.0, 2.1, 2.0]
+    X += [3.9, 28.6, 5.4, 1.1, 1425.0, 3.1, 35.6, -119.6]
+    X[:, 0] += shift
+    return X
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    # Reference columns in a different order than the API's features
+    columns = FEATURE_COLUMNS[::-1]
+    return drift_reference.compute_reference(sample(rng, 20_000)[:, ::-1], columns)
+
+
+def test_api_binning_matches_reference_binning():
+    rng = np.random.default_rng(1)
+    X = sample(rng, 1_000)
+    edges = np.sort(rng.normal(size=(len(FEATURE_COLUMNS), 9)), axis=1) + X.mean(axis=0)[:, None]
+    np.testing.assert_array_equal(bin_counts(X, edges), drift_reference.bin_counts(X, edges))
+
+
+def test_reference_statistics_match_numpy(reference):
+    X = sample(np.random.default_rng(0), 20_000)[:, ::-1]
+    np.testing.assert_allclose(reference["mean"], X.mean(axis=0))
+    np.testing.assert_allclose(reference["var"], X.var(axis=0, ddof=1))
+    np.testing.assert_allclose(np.sum(reference["proportions"], axis=1), 1.0)
+
+
+def test_same_distribution_shows_no_drift(reference):
+    monitor = DriftMonitor(enabled=True, window_rows=5_000, min_rows=500)
+    monitor.set_reference(reference)
+    rng = np.random.default_rng(2)
+    for row in sample(rng, 2_000):
+        monitor.observe(row)
+    monitor.observe(sample(rng, 1_000))
+    assert monitor.update() == 3_000
+
+    assert max(monitor.scores["psi"].values()) < 0.02
+    assert max(monitor.scores["ks"].values()) < 0.05
+    assert abs(monitor.scores["std_ratio"]["Population"] - 1) < 0.05
+    assert monitor.count == 3_000
+
+
+def test_shifted_feature_requests_retraining_once(reference, tmp_path):
+    monitor = DriftMonitor(
+        enabled=True, window_rows=1_000, min_rows=500, retrain_dir=str(tmp_path), retrain_cooldown=3600
+    )
+    monitor.set_reference(reference)
+    rng = np.random.default_rng(3)
+    for _ in range(3):
+        monitor.observe(sample(rng, 1_000, shift=2.0))
+        monitor.update()
+
+    assert monitor.scores["psi"]["MedInc"] > 0.2
+    assert monitor.scores["mean_shift"]["MedInc"] == pytest.approx(1.0, abs=0.15)
+    assert max(v for k, v in monitor.scores["psi"].items() if k != "MedInc") < 0.1
+    requests = [name for name in os.listdir(tmp_path) if name.endswith(".retrain.json")]
+    assert len(requests) == 1 and len(os.listdir(tmp_path)) == 1
+    with open(tmp_path / requests[0], encoding="utf-8") as f:
+        assert json.load(f)["features"] == ["MedInc"]
+
+
+def test_full_buffer_drops_rows(reference):
+    monitor = DriftMonitor(enabled=True, buffer_size=2)
+    monitor.set_reference(reference)
+    for row in sample(np.random.default_rng(4), 5):
+        monitor.observe(row)
+    assert monitor.update() == 2
@@ -0,0 +1,110 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("mlflow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import joblib  # noqa: E402
+from sklearn.linear_model import LinearRegression  # noqa: E402
+from sklearn.pipeline import make_pipeline  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from sklearn.tree import DecisionTreeRegressor  # noqa: E402
+from src import evaluate  # noqa: E402
+
+
+@pytest.fixture
+def processed_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=5.0, scale=3.0, size=(600, 4))
+    y = X @ [1.0, -2.0, 0.5, 0.0] + rng.normal(scale=0.3, size=600)
+    scaler = StandardScaler().fit(X)
+    joblib.dump(scaler, tmp_path / "scaler.pkl")
+    X = scaler.transform(X)
+    for name, array in {"X_train": X[:500], "X_test": X[500:], "y_train": y[:500], "y_test": y[500:]}.items():
+        np.save(tmp_path / f"{name}.npy", array)
+    return str(tmp_path)
+
+
+def test_training_rows_are_unscaled(processed_dir):
+    X, y = evaluate.training_rows(processed_dir, os.path.join(processed_dir, "scaler.pkl"))
+    scaler = joblib.load(os.path.join(processed_dir, "scaler.pkl"))
+    np.testing.assert_allclose(scaler.transform(X), np.load(os.path.join(processed_dir, "X_train.npy")))
+    assert len(y) == 500
+
+
+def test_folds_partition_rows_evenly():
+    assignment = evaluate.fold_assignment(103, 5, 42)
+    assert sorted(np.bincount(assignment)) == [20, 20, 21, 21, 21]
+    np.testing.assert_array_equal(assignment, evaluate.fold_assignment(103, 5, 42))
+
+
+def test_out_of_fold_errors_match_sequential_cross_validation(processed_dir):
+    X, y = evaluate.training_rows(processed_dir, os.path.join(processed_dir, "scaler.pkl"))
+    # Fused pipelines, as registered: the scaler is refitted with every fold
+    estimators = {
+        "linear": make_pipeline(StandardScaler(), LinearRegression()),
+        "tree": make_pipeline(StandardScaler(), DecisionTreeRegressor(max_depth=3, random_state=0)),
+    }
+    errors = evaluate.cross_validate(estimators, X, y, folds=4, random_state=7, max_workers=2)
+
+    assignment = evaluate.fold_assignment(len(y), 4, 7)
+    for label, estimator in estimators.items():
+        expected = np.empty(len(y))
+        for fold in range(4):
+            held_out = assignment == fold
+            model = estimator.fit(X[~held_out], y[~held_out])
+            expected[held_out] = (model.predict(X[held_out]) - y[held_out]) ** 2
+        np.testing.assert_allclose(errors[label], expected)
+
+
+def test_candidates_are_cross_validated_on_the_given_rows(monkeypatch):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(1_000, 3))
+    y = X @ [1.0, 2.0, -1.0] + rng.normal(scale=0.1, size=1_000)
+    # Registered models are fitted; only their settings carry over into the folds
+    models = {
+        "linear": LinearRegression().fit(X[:10], np.zeros(10)),
+        "stump": DecisionTreeRegressor(max_depth=1).fit(X[:10], np.zeros(10)),
+    }
+    monkeypatch.setattr(evaluate.mlflow.sklearn, "load_model", lambda uri: models[uri])
+
+    result = evaluate.evaluate_candidates(
+        {label: label for label in models}, {"folds": 3, "bootstrap_resamples": 200}, rows=(X, y)
+    )
+
+    assert result.errors["linear"].shape == (1_000,)
+    assert result.summary("linear")["cv_mse"] < 0.02
+    assert result.difference("linear", "stump")["cv_mse_delta_ci_high"] < 0
+
+
+@pytest.mark.parametrize("n_rows, settings", [(3, {"folds": 5, "min_rows": 0}), (999, {"folds": 5})])
+def test_too_few_rows_are_rejected(n_rows, settings):
+    with pytest.raises(evaluate.InsufficientRowsError):
+        evaluate.evaluate_candidates({"model": "uri"}, settings, rows=(np.empty((n_rows, 3)), np.empty(n_rows)))
+
+
+def test_bootstrap_means_are_resampled_means():
+    errors = np.random.default_rng(1).exponential(size=(2, 2_000))
+    samples = evaluate.bootstrap_means(errors, 250, random_state=3)
+    assert samples.shape == (250, 2)
+    assert samples.mean(axis=0) == pytest.approx(errors.mean(axis=1), rel=0.01)
+    assert samples.std(axis=0) == pytest.approx(errors.std(axis=1) / np.sqrt(2_000), rel=0.2)
+
+    rng = np.random.default_rng(3)
+    index = rng.integers(0, 2_000, size=(evaluate.BOOTSTRAP_CHUNK, 2_000))
+    np.testing.assert_allclose(samples[:evaluate.BOOTSTRAP_CHUNK], errors[:, index].mean(axis=2).T)
+
+
+def test_paired_interval_detects_small_consistent_improvement():
+    rng = np.random.default_rng(2)
+    baseline = rng.exponential(size=5_000)
+    errors = {"champion": baseline, "challenger": baseline * 0.99, "noisy": baseline * 0.99 + rng.normal(0, 0.5, 5_000)}
+    result = evaluate.Evaluation(errors, evaluate.bootstrap_means(np.vstack(list(errors.values())), 500), 0.95)
+
+    # Unpaired intervals overlap, but the paired difference is clearly below zero
+    assert result.summary("challenger")["cv_mse_ci_high"] > result.summary("champion")["cv_mse_ci_low"]
+    assert result.difference("challenger", "champion")["cv_mse_delta_ci_high"] < 0
+    assert result.difference("noisy", "champion")["cv_mse_delta_ci_high"] > 0
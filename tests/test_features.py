@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from models import FEATURE_COLUMNS, ColumnarPredictionRequest, PredictionRequest  # noqa: E402
+from features import columns_to_matrix, requests_to_matrix  # noqa: E402
+
+
+ROWS = [
+    dict(MedInc=8.3, HouseAge=42, AveRooms=6.5, AveBedrms=1.1,
+         Population=322, AveOccup=2.6, Latitude=34.2, Longitude=-118.4),
+    dict(MedInc=2.1, HouseAge=15, AveRooms=4.0, AveBedrms=0.9,
+         Population=1200, AveOccup=3.1, Latitude=37.8, Longitude=-122.3),
+]
+
+
+def test_requests_to_matrix_uses_feature_order():
+    X = requests_to_matrix([PredictionRequest(**row) for row in ROWS])
+
+    assert X.dtype == np.float64
+    assert X.flags["C_CONTIGUOUS"]
+    expected = np.array([[row[name] for name in FEATURE_COLUMNS] for row in ROWS])
+    np.testing.assert_array_equal(X, expected)
+
+
+def test_columnar_matches_row_form():
+    columns = {name: [row[name] for row in ROWS] for name in FEATURE_COLUMNS}
+    X_columns = columns_to_matrix(ColumnarPredictionRequest(**columns))
+    X_rows = requests_to_matrix([PredictionRequest(**row) for row in ROWS])
+
+    np.testing.assert_array_equal(X_columns, X_rows)
+
+
+def test_columnar_rejects_ragged_arrays():
+    columns = {name: [row[name] for row in ROWS] for name in FEATURE_COLUMNS}
+    columns["MedInc"] = [1.0]
+
+    with pytest.raises(ValueError):
+        ColumnarPredictionRequest(**columns)
@@ -0,0 +1,99 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("mlflow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sklearn.linear_model import LinearRegression  # noqa: E402
+from sklearn.metrics import mean_squared_error, r2_score  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from src import preprocess  # noqa: E402
+from src.train_incremental import LinearSufficientStats, scaled_linear_model, train_linear_incremental  # noqa: E402
+from utils.data_store import ProcessedDataStore  # noqa: E402
+
+COLUMNS = ["MedInc", "HouseAge", "AveRooms", "AveBedrms",
+           "Population", "AveOccup", "Latitude", "Longitude"]
+
+
+def _housing_csv(path, seed, n_rows=2_000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, 8)), columns=COLUMNS)
+    df["MedHouseVal"] = df.to_numpy() @ rng.uniform(size=8) + rng.normal(scale=0.1, size=n_rows)
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_sufficient_stats_match_full_fit():
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=3.0, scale=2.0, size=(3_000, 8))
+    y = X @ rng.normal(size=8) + 1.5 + rng.normal(scale=0.1, size=3_000)
+    stats = LinearSufficientStats(8)
+    for start in range(0, 3_000, 1_000):
+        stats.update(X[start:start + 1_000], y[start:start + 1_000])
+
+    coef, intercept = stats.solve()
+    expected = LinearRegression().fit(X, y)
+    scaler = StandardScaler().fit(X)
+    scaled = scaled_linear_model(coef, intercept, scaler)
+
+    assert np.allclose(coef, expected.coef_)
+    assert np.isclose(intercept, expected.intercept_)
+    assert np.allclose(scaled.predict(scaler.transform(X)), expected.predict(X))
+
+
+def test_running_scores_match_full_evaluation():
+    rng = np.random.default_rng(3)
+    X = rng.normal(loc=2.0, size=(1_500, 8))
+    y = X @ rng.normal(size=8) + rng.normal(scale=0.5, size=1_500)
+    coef, intercept = rng.normal(size=8), 0.7
+    stats = LinearSufficientStats(8)
+    for start in range(0, 1_500, 500):
+        stats.update(X[start:start + 500], y[start:start + 500])
+
+    mse, r2 = stats.scores(coef, intercept)
+    y_pred = X @ coef + intercept
+    assert np.isclose(mse, mean_squared_error(y, y_pred))
+    assert np.isclose(r2, r2_score(y, y_pred))
+
+
+def test_append_to_store_is_incremental_and_idempotent(tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocess, "SCALER_PATH", str(tmp_path / "scaler.pkl"))
+    joblib = pytest.importorskip("joblib")
+    store = ProcessedDataStore(str(tmp_path / "store"))
+    first = _housing_csv(tmp_path / "first.csv", seed=1)
+    second = _housing_csv(tmp_path / "second.csv", seed=2)
+
+    preprocess.append_to_store(first, store)
+    preprocess.append_to_store(second, store)
+    assert preprocess.append_to_store(second, store) is None
+
+    reloaded = ProcessedDataStore(str(tmp_path / "store"))
+    X_train, y_train = reloaded.load_split("train")
+    X_test, _ = reloaded.load_split("test")
+    assert reloaded.version == 2
+    assert len(y_train) == reloaded.n_rows["train"]
+    assert reloaded.sketch.count == 4_000
+    # The incrementally updated scaler matches one fitted on every kept row
+    X = np.concatenate([X_train, X_test])
+    assert reloaded.scaler.n_samples_seen_ == len(X)
+    assert np.allclose(reloaded.scaler.mean_, X.mean(axis=0))
+    # Saved with the store; the scaler of data/processed is left alone
+    assert np.array_equal(joblib.load(reloaded.scaler_path).mean_, reloaded.scaler.mean_)
+    assert not os.path.exists(tmp_path / "scaler.pkl")
+
+
+def test_segments_without_training_rows_are_not_fitted(tmp_path):
+    store = ProcessedDataStore(str(tmp_path / "store"))
+    X = np.ones((3, 8))
+    store.append({"X_train": X[:0], "X_test": X, "y_train": np.empty(0), "y_test": np.ones(3)},
+                 source="only-test-rows", sketch=None, scaler=StandardScaler().fit(X))
+    state_path = str(tmp_path / "state.pkl")
+
+    assert train_linear_incremental(store, state_path) is None
+    assert not os.path.exists(state_path)
+    with pytest.raises(ValueError):
+        LinearSufficientStats(8).solve()
@@ -1,3 +1,4 @@
+import json
 import os
 import importlib
 import sys
@@ -57,3 +58,95 @@ def test_logger_respects_env_log_level(setup_logger):
         content = f.read()
 
     assert message in content
+
+
+@pytest.fixture
+def async_logger(monkeypatch, tmp_path):
+    log_path = str(tmp_path / "async.log")
+    monkeypatch.setenv("LOG_FILE", log_path)
+    monkeypatch.setenv("LOG_ASYNC", "true")
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_SAMPLE_RATES", "test.sampled=0.1")
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import utils.logger
+    importlib.reload(utils.logger)
+
+    yield utils.logger, log_path
+
+    utils.logger.shutdown_logging()
+    for name in ("test.async", "test.sampled", "test.other"):
+        logger = utils.logger.logging.getLogger(name)
+        for handler in list(logger.handlers):
+            handler.close()
+            logger.removeHandler(handler)
+        logger.filters.clear()
+
+
+def test_async_logger_writes_json_after_drain(async_logger):
+    module, path = async_logger
+    logger = module.get_logger("test.async")
+    logger.info("queued %s", "message")
+
+    module.shutdown_logging()
+
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.loads(f.readline())
+    assert entry["message"] == "queued message"
+    assert entry["logger"] == "test.async"
+
+
+def test_sampling_keeps_warnings(async_logger):
+    module, path = async_logger
+    logger = module.get_logger("test.sampled")
+    for i in range(100):
+        logger.info("hot path %d", i)
+    logger.warning("always kept")
+
+    module.shutdown_logging()
+
+    with open(path, "r", encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f]
+    assert len(messages) == 11
+    assert messages[-1] == "always kept"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_async_logger_writes_from_forked_child(async_logger):
+    module, path = async_logger
+    logger = module.get_logger("test.async")
+    logger.info("before fork")
+
+    pid = os.fork()
+    if pid == 0:
+        for i in range(20):
+            logger.info("child %d", i)
+        module.shutdown_logging()
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    module.shutdown_logging()
+
+    assert status == 0
+    with open(path, "r", encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f]
+    assert [m for m in messages if m.startswith("child")] == [f"child {i}" for i in range(20)]
+
+
+def test_rotation_is_only_disabled_on_request(async_logger, monkeypatch):
+    monkeypatch.setenv("LOG_MAX_BYTES", "100")
+    module, path = async_logger
+    module.get_logger("test.async")
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    # Forking (e.g. a training process pool) keeps the parent rotating
+    assert [handler.maxBytes for handler in module._file_handlers] == [100]
+
+    module.disable_rotation()
+    module.get_logger("test.sampled")
+    assert [handler.maxBytes for handler in module._file_handlers] == [0]
+    monkeypatch.setenv("LOG_FILE", path + ".other")
+    module.get_logger("test.other")
+    assert [handler.maxBytes for handler in module._file_handlers] == [0, 0]
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(API_DIR)
+import model_loader  # noqa: E402
+from model_loader import ModelCache  # noqa: E402
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(X.shape)
+        return np.zeros(len(X))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ModelCache(refresh_interval=0)
+    monkeypatch.setattr(cache, "_latest_model_version", lambda: SimpleNamespace(version=3, tags={}))
+    monkeypatch.setattr(cache, "_load", lambda model_version: FakeModel())
+    return cache
+
+
+def test_importing_model_loader_does_not_import_mlflow(tmp_path):
+    code = "import sys, model_loader; print('mlflow' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=API_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "LOG_FILE": str(tmp_path / "app.log")}
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_model_is_warmed_up_before_it_is_ready(cache):
+    assert not cache.ready
+    assert cache.refresh()
+
+    model, version = cache.get()
+    assert cache.ready and version == "3"
+    assert model.calls == [(1, len(model_loader.FEATURE_COLUMNS))]
+    assert set(cache.timings) == {"registry", "load", "warmup"}
+
+
+def test_failed_warm_up_keeps_cache_unready(cache, monkeypatch):
+    monkeypatch.setattr(ModelCache, "_warm_up", staticmethod(lambda model: 1 / 0))
+    assert not cache.refresh()
+    assert not cache.ready
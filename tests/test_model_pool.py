@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("pydantic")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+import model_loader  # noqa: E402
+from model_pool import ModelNotFoundError, ModelPool, model_nbytes  # noqa: E402
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, model_name, version):
+        with self.lock:
+            self.calls.append((model_name, version))
+        time.sleep(self.delay)
+        if version == "404":
+            raise ModelNotFoundError(f"Model '{model_name}' has no version {version}.")
+        return f"{model_name}-v{version}"
+
+
+def test_concurrent_first_requests_load_once():
+    loader = CountingLoader(delay=0.05)
+    pool = ModelPool(loader=loader, sizer=lambda model: 100)
+
+    async def run():
+        return await asyncio.gather(*(pool.get("decision_tree", "3") for _ in range(10)))
+
+    entries = asyncio.run(run())
+    assert loader.calls == [("decision_tree", "3")]
+    assert {entry.model for entry in entries} == {"decision_tree-v3"}
+    assert entries[0].requests == 10
+    assert entries[0].load_seconds >= 0.05
+
+
+def test_evicts_least_recently_used_within_budget():
+    pool = ModelPool(max_mb=2.5 / 1024, loader=CountingLoader(), sizer=lambda model: 1024)
+
+    async def run():
+        await pool.get("linear_regression", "1")
+        await pool.get("linear_regression", "2")
+        await pool.get("linear_regression", "1")
+        await pool.get("decision_tree", "1")
+
+    asyncio.run(run())
+    snapshot = pool.snapshot()
+    assert [(m["model_name"], m["model_version"]) for m in snapshot["models"]] == [
+        ("linear_regression", "1"), ("decision_tree", "1")
+    ]
+    assert snapshot["size_bytes"] == 2048
+    assert snapshot["models"][0]["requests"] == 2
+
+
+def test_eviction_removes_unpacked_arrays(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader, "MODEL_SHARED_DIR", str(tmp_path))
+    for version in ("1", "2"):
+        os.makedirs(model_loader.shared_model_dir("decision_tree", version))
+    pool = ModelPool(max_mb=1.5 / 1024, loader=CountingLoader(), sizer=lambda model: 1024)
+
+    async def run():
+        await pool.get("decision_tree", "1")
+        await pool.get("decision_tree", "2")
+
+    asyncio.run(run())
+    assert not os.path.exists(model_loader.shared_model_dir("decision_tree", "1"))
+    assert os.path.isdir(model_loader.shared_model_dir("decision_tree", "2"))
+
+
+def test_keeps_a_model_larger_than_the_budget():
+    pool = ModelPool(max_mb=0, loader=CountingLoader(), sizer=lambda model: 1024)
+    asyncio.run(pool.get("decision_tree", "1"))
+    asyncio.run(pool.get("decision_tree", "2"))
+    assert [m["model_version"] for m in pool.snapshot()["models"]] == ["2"]
+
+
+def test_failed_loads_are_not_cached():
+    loader = CountingLoader()
+    pool = ModelPool(loader=loader, sizer=lambda model: 1)
+    for _ in range(2):
+        with pytest.raises(ModelNotFoundError):
+            asyncio.run(pool.get("decision_tree", "404"))
+    assert len(loader.calls) == 2
+    assert len(pool) == 0
+    assert pool.snapshot()["loading"] == []
+
+
+def test_model_size_is_estimated_from_its_arrays():
+    assert model_nbytes({"coef": np.zeros(1000)}) > 8000
+
+
+def test_pyfunc_wrapper_is_sized_by_the_wrapped_model():
+    class Wrapper:
+        def get_raw_model(self):
+            return {"coef": np.zeros(1000)}
+
+    assert model_nbytes(Wrapper()) > 8000
+
+
+def test_unpicklable_model_is_charged_the_default_size(monkeypatch):
+    import model_pool
+
+    monkeypatch.setattr(model_pool, "MODEL_POOL_DEFAULT_MODEL_MB", 2)
+    assert model_nbytes(threading.Lock()) == 2 * 1024 * 1024
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.pipeline_metrics import PipelineMetrics  # noqa: E402
+
+
+def test_steps_are_written_as_textfile(tmp_path):
+    metrics = PipelineMetrics("training", metrics_dir=str(tmp_path))
+    with metrics.step("preprocess"):
+        pass
+    with metrics.step("select") as step:
+        step["status"] = "cached"
+    metrics.observe("train", 1.5, model="decision_tree")
+    with pytest.raises(ValueError):
+        with metrics.step("fetch_data"):
+            raise ValueError("boom")
+    metrics.write(2.0, "failed")
+
+    text = (tmp_path / "training.prom").read_text()
+    assert 'step="preprocess"' in text and 'status="cached"' in text
+    assert ('pipeline_step_duration_seconds{model="decision_tree",pipeline="training",'
+            'status="run",step="train"} 1.5') in text
+    assert 'step="fetch_data"' in text and 'status="failed"' in text
+    assert 'pipeline_duration_seconds{pipeline="training",status="failed"} 2.0' in text
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from prediction_cache import PredictionCache  # noqa: E402
+
+ROW = np.array([8.3252, 41.0, 6.98, 1.02, 322.0, 2.55, 37.88, -122.23])
+
+
+def test_hit_after_put_and_invalidation_on_new_version():
+    cache = PredictionCache(enabled=True)
+    assert cache.get(ROW, "1") is None
+    cache.put(ROW, "1", 4.5)
+
+    assert cache.get(ROW.copy(), "1") == 4.5
+    assert cache.get(ROW, "2") is None
+    assert len(cache) == 0
+
+
+def test_put_for_a_swapped_out_version_is_ignored():
+    cache = PredictionCache(enabled=True)
+    cache.get(ROW, "2")
+    cache.put(ROW, "1", 4.5)
+
+    assert len(cache) == 0
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = PredictionCache(enabled=True, max_entries=2, ttl_seconds=10)
+    rows = [ROW + i for i in range(3)]
+    cache.get(rows[0], "1")
+    cache.put(rows[0], "1", 0.0)
+    cache.put(rows[1], "1", 1.0)
+    cache.get(rows[0], "1")  # rows[1] is now least recently used
+    cache.put(rows[2], "1", 2.0)
+
+    assert cache.get(rows[1], "1") is None
+    assert cache.get(rows[0], "1") == 0.0
+
+    now = time.monotonic()
+    monkeypatch.setattr("prediction_cache.time.monotonic", lambda: now + 11)
+    assert cache.get(rows[2], "1") is None
+
+
+def test_rounding_shares_entries():
+    cache = PredictionCache(enabled=True, round_decimals=2)
+    cache.get(ROW, "1")
+    cache.put(ROW, "1", 4.5)
+
+    assert cache.get(ROW + 0.001, "1") == 4.5
+    assert cache.get(ROW + 0.01, "1") is None
@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from profiler import ProfilerBusyError, SamplingProfiler, collapse  # noqa: E402
+
+
+def spin_until(event):
+    while not event.is_set():
+        pass
+
+
+def test_profile_contains_busy_thread_as_folded_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_until, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        stacks = SamplingProfiler().sample(0.2, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    spinning = [stack for stack in stacks if stack.startswith("spinner;")]
+    assert spinning and all("spin_until (test_profiler.py)" in stack for stack in spinning)
+    lines = collapse(stacks).splitlines()
+    assert len(lines) == len(stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_only_one_capture_at_a_time():
+    profiler = SamplingProfiler()
+    thread = threading.Thread(target=profiler.sample, args=(0.3,))
+    thread.start()
+    try:
+        while not profiler._lock.locked():
+            pass
+        with pytest.raises(ProfilerBusyError):
+            profiler.sample(0.01)
+    finally:
+        thread.join()
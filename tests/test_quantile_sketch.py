@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.quantile_sketch import QuantileSketch  # noqa: E402
+
+
+def _rank_error(values, estimate, q):
+    return abs((values <= estimate).mean() - q)
+
+
+def test_quantiles_within_rank_error():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(size=200_000), rng.exponential(size=200_000)])
+    sketch = QuantileSketch(2, k=512)
+    for start in range(0, len(X), 7_000):
+        sketch.update(X[start:start + 7_000])
+
+    estimates = sketch.quantile([0.25, 0.5, 0.75])
+
+    assert sketch.count == len(X)
+    for i, q in enumerate([0.25, 0.5, 0.75]):
+        for column in range(2):
+            assert _rank_error(X[:, column], estimates[i, column], q) < 0.01
+
+
+def test_merge_matches_single_sketch():
+    rng = np.random.default_rng(1)
+    X = rng.uniform(size=(50_000, 3))
+    left, right = QuantileSketch(3, k=512), QuantileSketch(3, k=512)
+    left.update(X[:20_000])
+    right.update(X[20_000:])
+
+    merged = left.merge(right)
+
+    assert merged.count == len(X)
+    assert np.allclose(merged.quantile(0.5), 0.5, atol=0.02)
+
+
+def test_merge_rejects_different_columns():
+    with pytest.raises(ValueError):
+        QuantileSketch(2).merge(QuantileSketch(3))
+
+
+def test_stream_preprocessing_matches_in_memory(tmp_path, monkeypatch):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("sklearn")
+    from src import preprocess
+
+    rng = np.random.default_rng(2)
+    columns = ["MedInc", "HouseAge", "AveRooms", "AveBedrms",
+               "Population", "AveOccup", "Latitude", "Longitude"]
+    df = pd.DataFrame(rng.normal(size=(5_000, 8)), columns=columns)
+    df["MedHouseVal"] = rng.uniform(size=5_000)
+    path = tmp_path / "housing.csv"
+    df.to_csv(path, index=False)
+    monkeypatch.setattr(preprocess, "PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setattr(preprocess, "SCALER_PATH", str(tmp_path / "scaler.pkl"))
+    monkeypatch.setattr(preprocess, "REFERENCE_STATS_PATH", str(tmp_path / "reference_stats.json"))
+
+    X_train, X_test, y_train, y_test = preprocess.preprocess_stream(str(path), chunk_rows=700)
+
+    # Exact quartiles are well within the sketch's error at this size
+    kept = len(preprocess.remove_outliers_iqr(df.drop("MedHouseVal", axis=1)))
+    assert len(y_train) + len(y_test) == kept
+    assert X_train.shape == (len(y_train), 8) and X_test.shape == (len(y_test), 8)
+    assert 0.15 < len(y_test) / kept < 0.25
+    X = np.concatenate([X_train, X_test])
+    assert np.allclose(X.mean(axis=0), 0, atol=1e-6)
+    assert np.allclose(X.std(axis=0), 1, atol=1e-6)
+
+    # Drift reference describes the kept, unscaled training features
+    with open(tmp_path / "reference_stats.json", encoding="utf-8") as f:
+        reference = json.load(f)
+    assert reference["count"] == kept and reference["features"] == columns
+    assert np.isclose(sum(reference["proportions"][0]), 1.0)
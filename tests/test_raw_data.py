@@ -0,0 +1,41 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.raw_data import RAW_COLUMNS, iter_raw_chunks, read_raw, write_raw  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(1_000, len(RAW_COLUMNS))), columns=RAW_COLUMNS)
+    # Integer-looking columns must still come back as float64
+    df["HouseAge"] = rng.integers(1, 50, size=1_000)
+    return df
+
+
+@pytest.mark.parametrize("filename", ["housing.csv", "housing.parquet", "housing.arrow"])
+def test_formats_round_trip_with_float_schema(frame, tmp_path, filename):
+    path = write_raw(frame, str(tmp_path / filename))
+
+    df = read_raw(path)
+
+    assert list(df.columns) == RAW_COLUMNS
+    assert (df.dtypes == "float64").all()
+    assert np.allclose(df.to_numpy(), frame.to_numpy(dtype=float))
+
+
+@pytest.mark.parametrize("filename", ["housing.csv", "housing.parquet", "housing.arrow"])
+def test_projection_and_chunks(frame, tmp_path, filename):
+    path = write_raw(frame, str(tmp_path / filename))
+
+    chunks = list(iter_raw_chunks(path, chunk_rows=300, columns=["MedInc", "MedHouseVal"]))
+
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert all(list(chunk.columns) == ["MedInc", "MedHouseVal"] for chunk in chunks)
+    assert np.allclose(pd.concat(chunks)["MedInc"], frame["MedInc"])
@@ -0,0 +1,125 @@
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("mlflow")
+pytest.importorskip("sklearn")
+pytest.importorskip("prometheus_client")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import run_training_pipeline as pipeline  # noqa: E402
+from utils.pipeline_metrics import PipelineMetrics  # noqa: E402
+from utils.step_cache import StepCache  # noqa: E402
+
+
+@pytest.fixture
+def fake_pipeline(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from utils.data_store import ProcessedDataStore
+
+    monkeypatch.chdir(tmp_path)
+    calls = {"train": [], "select": 0, "seed": []}
+    deleted_runs = set()
+
+    def train_candidates(names):
+        calls["train"].append(sorted(names))
+        outcomes = {}
+        for name in names:
+            os.makedirs("models", exist_ok=True)
+            with open(os.path.join("models", f"{name}.pkl"), "w") as f:
+                f.write(name)
+            run_id = f"{name}-{len(calls['train'])}"
+            outcomes[name] = {"result": {"run_id": run_id}, "duration_sec": 0.0}
+        return outcomes
+
+    def select_best_main():
+        calls["select"] += 1
+        return str(calls["select"])
+
+    def append_to_store(data_path, store):
+        calls["seed"].append(data_path)
+        X, y = np.ones((4, 2)), np.ones(4)
+        store.append({"X_train": X[:3], "X_test": X[3:], "y_train": y[:3], "y_test": y[3:]},
+                     source=data_path, sketch=None, scaler=None)
+
+    monkeypatch.setattr(pipeline, "StepCache", lambda enabled: StepCache(str(tmp_path / "cache"), enabled))
+    monkeypatch.setattr(pipeline, "configure_mlflow", lambda: None)
+    monkeypatch.setattr(pipeline, "load_config", lambda: {})
+    monkeypatch.setattr(pipeline, "preprocess_main", lambda data_path: None)
+    monkeypatch.setattr(pipeline, "PREPROCESS_OUTPUTS", [])
+    monkeypatch.setattr(pipeline, "train_candidates", train_candidates)
+    monkeypatch.setattr(pipeline, "select_best_main", select_best_main)
+    monkeypatch.setattr(pipeline, "_run_exists", lambda run_id: run_id not in deleted_runs)
+    monkeypatch.setattr(pipeline, "append_to_store", append_to_store)
+    monkeypatch.setattr(pipeline, "ProcessedDataStore", lambda: ProcessedDataStore(str(tmp_path / "store")))
+
+    data_path = tmp_path / "housing.csv"
+    data_path.write_text("a,b\n1,2\n")
+    metrics = PipelineMetrics(metrics_dir=str(tmp_path / "metrics"))
+    return lambda: pipeline._run_steps(str(data_path), False, True, metrics), calls, deleted_runs
+
+
+def test_unchanged_inputs_skip_training_and_selection(fake_pipeline):
+    run, calls, _ = fake_pipeline
+    run()
+    run()
+    assert calls["train"] == [["decision_tree", "linear_regression"]]
+    assert calls["select"] == 1
+
+
+def test_full_run_seeds_an_empty_data_store_once(fake_pipeline, tmp_path):
+    run, calls, _ = fake_pipeline
+    run()
+    run()
+    assert calls["seed"] == [str(tmp_path / "housing.csv")]
+
+
+def test_retrained_candidate_is_reselected(fake_pipeline):
+    run, calls, deleted_runs = fake_pipeline
+    run()
+    # The cached run was deleted from MLflow, so the trainer re-runs into a new run
+    deleted_runs.add("linear_regression-1")
+    run()
+    assert calls["train"] == [["decision_tree", "linear_regression"], ["linear_regression"]]
+    assert calls["select"] == 2
+
+
+def test_incremental_selection_cross_validates_on_every_stored_training_row(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from utils.data_store import ProcessedDataStore
+
+    monkeypatch.chdir(tmp_path)
+    store = ProcessedDataStore(str(tmp_path / "store"))
+    for seed in (1, 2):
+        X, y = np.full((10, 2), seed, dtype=float), np.full(10, seed, dtype=float)
+        store.append({"X_train": X[:8], "X_test": X[8:], "y_train": y[:8], "y_test": y[8:]},
+                     source=str(seed), sketch=None, scaler=None)
+    selected = []
+
+    monkeypatch.setattr(pipeline, "configure_mlflow", lambda: None)
+    monkeypatch.setattr(pipeline, "append_to_store", lambda data_path: None)
+    monkeypatch.setattr(pipeline, "train_linear_incremental", lambda: {"segments": ["seg-000002"]})
+    monkeypatch.setattr(pipeline, "ProcessedDataStore", lambda: ProcessedDataStore(str(tmp_path / "store")))
+    monkeypatch.setattr(pipeline, "select_best_main", lambda rows: selected.append(rows))
+
+    pipeline.run_incremental("batch.csv")
+
+    (X, y), = selected
+    assert X.shape == (16, 2) and sorted(set(y)) == [1, 2]
+
+
+def test_incremental_update_seeds_an_empty_store_with_the_full_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "housing.parquet").write_text("")
+    appended = []
+
+    monkeypatch.setattr(pipeline, "configure_mlflow", lambda: None)
+    monkeypatch.setattr(pipeline, "RAW_DATA_PATH", str(tmp_path / "housing.parquet"))
+    monkeypatch.setattr(pipeline, "append_to_store", lambda data_path, store=None: appended.append(data_path))
+    monkeypatch.setattr(pipeline, "train_linear_incremental", lambda: None)
+    monkeypatch.setattr(pipeline, "ProcessedDataStore", lambda: SimpleNamespace(segments=[]))
+
+    pipeline.run_incremental("batch.csv")
+
+    assert appended == [str(tmp_path / "housing.parquet"), "batch.csv"]
@@ -0,0 +1,178 @@
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("mlflow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import select_best_and_register as select  # noqa: E402
+
+
+class FakeClient:
+    """Registry with one run per version; records every tracking call."""
+
+    def __init__(self, versions, metrics):
+        self.versions = versions
+        self.metrics = metrics
+        self.calls = []
+
+    def search_model_versions(self, filter_string, max_results=None, order_by=None):
+        self.calls.append("search_model_versions")
+        name = filter_string.split("'")[1]
+        found = sorted((v for v in self.versions if v.name == name), key=lambda v: -int(v.version))
+        return found[:max_results]
+
+    def search_experiments(self):
+        self.calls.append("search_experiments")
+        return [SimpleNamespace(experiment_id="0")]
+
+    def search_runs(self, experiment_ids, filter_string, max_results):
+        self.calls.append("search_runs")
+        return [
+            SimpleNamespace(
+                info=SimpleNamespace(run_id=run_id, status="FINISHED"),
+                data=SimpleNamespace(metrics={"mse": mse})
+            )
+            for run_id, mse in self.metrics.items() if f"'{run_id}'" in filter_string
+        ]
+
+    def get_run(self, run_id):
+        raise AssertionError("runs must be fetched in bulk")
+
+
+def _version(name, version, run_id):
+    return SimpleNamespace(name=name, version=str(version), run_id=run_id, source=f"models:/{run_id}")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    versions = [_version("linear_regression", i, f"lin{i}") for i in range(1, 6)]
+    versions += [_version("decision_tree", i, f"tree{i}") for i in range(1, 6)]
+    metrics = {f"lin{i}": 0.5 + i for i in range(1, 6)}
+    metrics.update({f"tree{i}": 0.3 + i for i in range(1, 6)})
+    client = FakeClient(versions, metrics)
+    registered = []
+
+    def register_model(model_uri, name):
+        registered.append(model_uri)
+        version = _version(name, len(registered), model_uri.split("/")[-1])
+        client.versions.append(version)
+        return version
+
+    monkeypatch.setattr(select, "MlflowClient", lambda: client)
+    monkeypatch.setattr(select.mlflow, "register_model", register_model)
+    monkeypatch.setattr(select, "export_compiled_model", lambda uri, run_id: None)
+    monkeypatch.setattr(select, "export_drift_reference", lambda client, run_id: None)
+    return client, registered
+
+
+def test_scan_is_bounded_batched_and_cached(registry, tmp_path):
+    client, registered = registry
+    cache = select.RunMetricsCache(str(tmp_path / "metrics.json"))
+
+    select.register_best_from_registry(["decision_tree", "linear_regression"], scan_limit=3, cache=cache)
+
+    # Versions 3-5 of each model; tree3 has the lowest mse in that window
+    assert registered == ["models:/tree3"]
+    assert client.calls.count("search_runs") == 1
+    assert sorted(cache.metrics) == ["lin3", "lin4", "lin5", "tree3", "tree4", "tree5"]
+
+    client.calls.clear()
+    select.register_best_from_registry(
+        ["decision_tree", "linear_regression"], scan_limit=3,
+        cache=select.RunMetricsCache(str(tmp_path / "metrics.json"))
+    )
+
+    # Unchanged winner: metrics come from the cache and nothing is re-registered
+    assert "search_runs" not in client.calls
+    assert registered == ["models:/tree3"]
+
+
+@pytest.mark.parametrize("improvement, promoted", [(0.99, True), (1.0, False)])
+def test_challenger_must_be_significantly_better(registry, tmp_path, monkeypatch, improvement, promoted):
+    np = pytest.importorskip("numpy")
+    from src import evaluate
+
+    client, registered = registry
+    client.versions.append(_version("best_model", 1, "lin5"))
+    logged = {}
+    client.log_batch = lambda run_id, metrics: logged.setdefault(run_id, {}).update(
+        {metric.key: metric.value for metric in metrics}
+    )
+
+    def evaluate_candidates(sources, settings, rows):
+        # Scaled copies of one error vector: tree3 is consistently better only when improvement < 1
+        base = np.random.default_rng(0).exponential(size=2_000)
+        errors = {run_id: base * (improvement if run_id == "tree3" else 1.1) for run_id in sources}
+        errors["lin5"] = base
+        samples = evaluate.bootstrap_means(np.vstack(list(errors.values())), 200)
+        return evaluate.Evaluation(errors, samples, 0.95)
+
+    monkeypatch.setattr(select, "evaluate_candidates", evaluate_candidates)
+    version = select.register_best_from_registry(
+        ["decision_tree", "linear_regression"], scan_limit=3,
+        cache=select.RunMetricsCache(str(tmp_path / "metrics.json")), evaluation={"enabled": True}
+    )
+
+    # The current best model (lin5) stays at version 1 unless tree3 is promoted
+    assert registered == (["models:/tree3"] if promoted else [])
+    assert promoted or version == "1"
+    assert sorted(logged) == ["lin3", "lin5", "tree3"]
+    assert "cv_mse_ci_high" in logged["lin5"]
+    assert (logged["tree3"]["cv_mse_delta_ci_high"] < 0) == promoted
+
+
+@pytest.mark.parametrize("retrain_errors, promoted", [("noisy", False), ("worse", False), ("better", True)])
+def test_retrain_of_current_best_must_also_be_significantly_better(
+    registry, tmp_path, monkeypatch, retrain_errors, promoted
+):
+    np = pytest.importorskip("numpy")
+    from src import evaluate
+
+    client, registered = registry
+    # best_model serves lin4; lin5 is a newer retrain of the same candidate
+    client.versions.append(_version("best_model", 1, "lin4"))
+    client.metrics["lin5"] = 0.1
+    client.log_batch = lambda run_id, metrics: None
+
+    def evaluate_candidates(sources, settings, rows):
+        rng = np.random.default_rng(0)
+        base = rng.exponential(size=2_000)
+        retrain = {
+            "noisy": base + rng.normal(0, 0.05, 2_000), "worse": base * 1.2, "better": base * 0.95
+        }[retrain_errors]
+        errors = {"lin4": base, "lin5": retrain, "tree3": base * 1.1}
+        samples = evaluate.bootstrap_means(np.vstack(list(errors.values())), 200)
+        return evaluate.Evaluation(errors, samples, 0.95)
+
+    monkeypatch.setattr(select, "evaluate_candidates", evaluate_candidates)
+    version = select.register_best_from_registry(
+        ["decision_tree", "linear_regression"], scan_limit=3,
+        cache=select.RunMetricsCache(str(tmp_path / "metrics.json")), evaluation={"enabled": True}
+    )
+
+    assert registered == (["models:/lin5"] if promoted else [])
+    assert promoted or version == "1"
+
+
+@pytest.mark.parametrize("has_champion", [True, False])
+def test_too_few_rows_keep_the_current_best_model(registry, tmp_path, monkeypatch, has_champion):
+    from src import evaluate
+
+    client, registered = registry
+    if has_champion:
+        client.versions.append(_version("best_model", 1, "lin5"))
+
+    def evaluate_candidates(sources, settings, rows):
+        raise evaluate.InsufficientRowsError("12 rows are too few to cross-validate on")
+
+    monkeypatch.setattr(select, "evaluate_candidates", evaluate_candidates)
+    version = select.register_best_from_registry(
+        ["decision_tree", "linear_regression"], scan_limit=3,
+        cache=select.RunMetricsCache(str(tmp_path / "metrics.json")), evaluation={"enabled": True}
+    )
+
+    # Without a current best model there is nothing to keep, so the offline metric decides
+    assert registered == ([] if has_champion else ["models:/tree3"])
+    assert version == "1"
@@ -0,0 +1,112 @@
+import gzip
+import json
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("pydantic")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+from capture import RequestCapture  # noqa: E402
+from shadow import ShadowEvaluator  # noqa: E402
+from models import FEATURE_COLUMNS  # noqa: E402
+
+
+class LinearModel:
+    def __init__(self, scale):
+        self.scale = scale
+
+    def predict(self, X):
+        return X.sum(axis=1) * self.scale
+
+
+class FakeCache:
+    def __init__(self, model_name, model, version):
+        self.model_name = model_name
+        self.entry = (model, version)
+
+    def get(self):
+        return self.entry
+
+
+def evaluator(capture=None, sample_rate=1.0):
+    shadow = ShadowEvaluator(
+        champion=FakeCache("best_model", LinearModel(1.0), "3"), enabled=True, model_name="decision_tree",
+        sample_rate=sample_rate, capture=RequestCapture(enabled=False) if capture is None else capture
+    )
+    shadow.challenger = FakeCache("decision_tree", LinearModel(1.1), "7")
+    return shadow
+
+
+def test_requires_a_challenger_other_than_the_champion():
+    champion = FakeCache("best_model", LinearModel(1.0), "3")
+    with pytest.raises(ValueError, match="SHADOW_MODEL_NAME"):
+        ShadowEvaluator(champion=champion, enabled=True, model_name="")
+    with pytest.raises(ValueError, match="SHADOW_MODEL_VERSION"):
+        ShadowEvaluator(champion=champion, enabled=True, model_name="best_model")
+    shadow = ShadowEvaluator(champion=champion, enabled=True, model_name="best_model", model_version="2")
+    assert shadow.challenger.pinned_version == "2"
+    assert not shadow.challenger.prune_shared
+
+
+def test_pairs_served_and_challenger_predictions():
+    shadow = evaluator()
+    X = np.random.default_rng(0).uniform(1, 2, size=(50, len(FEATURE_COLUMNS)))
+    served = X.sum(axis=1)
+    shadow.observe(X[0], float(served[0]), "3")
+    shadow.observe(X[1:], served[1:], "3")
+    assert shadow.update() == 50
+
+    stats = shadow.stats()
+    diff = served * 0.1
+    assert stats["rows"] == 50
+    assert stats["champion"]["model_version"] == "3"
+    assert stats["challenger"]["model_version"] == "7"
+    assert stats["mean_diff"] == pytest.approx(diff.mean())
+    assert stats["rms_diff"] == pytest.approx(np.sqrt((diff ** 2).mean()))
+    assert stats["max_abs_diff"] == pytest.approx(diff.max())
+    assert stats["mean_relative_diff"] == pytest.approx(0.1)
+    assert stats["champion"]["seconds_per_row"] > 0
+    assert stats["challenger"]["seconds_per_row"] > 0
+
+
+def test_samples_rows_and_skips_other_champion_versions():
+    shadow = evaluator(sample_rate=0.0)
+    shadow.observe(np.ones(len(FEATURE_COLUMNS)), 8.0, "3")
+    shadow.observe(np.ones((100, len(FEATURE_COLUMNS))), np.full(100, 8.0), "3")
+    assert len(shadow._buffer) == 0
+
+    shadow.sample_rate = 1.0
+    shadow.observe(np.ones(len(FEATURE_COLUMNS)), 8.0, "2")
+    assert shadow.update() == 0
+    assert shadow.stats()["rows"] == 0
+
+
+def test_statistics_restart_when_challenger_changes():
+    shadow = evaluator()
+    shadow.observe(np.ones(len(FEATURE_COLUMNS)), 8.0, "3")
+    shadow.update()
+    shadow.challenger.entry = (LinearModel(1.0), "8")
+    shadow.observe(np.ones(len(FEATURE_COLUMNS)), 8.0, "3")
+    shadow.update()
+    stats = shadow.stats()
+    assert stats["rows"] == 1
+    assert stats["challenger"]["model_version"] == "8"
+    assert stats["mean_abs_diff"] == 0
+
+
+def test_captures_paired_predictions(tmp_path):
+    shadow = evaluator(capture=RequestCapture(enabled=True, directory=str(tmp_path)))
+    shadow.observe(np.ones((2, len(FEATURE_COLUMNS))), np.array([8.0, 8.0]), "3")
+    shadow.update()
+    assert shadow.capture.flush() == 2
+    (name,) = os.listdir(tmp_path)
+    with gzip.open(tmp_path / name, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["endpoint"] == "shadow"
+    assert lines[0]["model_version"] == "3"
+    assert lines[0]["prediction"] == 8.0
+    assert lines[0]["challenger_version"] == "7"
+    assert lines[0]["challenger_prediction"] == pytest.approx(8.8)
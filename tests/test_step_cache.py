@@ -0,0 +1,46 @@
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.step_cache import StepCache, file_digest, step_key  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StepCache(root=str(tmp_path / "cache"))
+
+
+def test_restore_copies_outputs_back(cache, tmp_path):
+    output = tmp_path / "out" / "result.txt"
+    output.parent.mkdir()
+    output.write_text("first run")
+    key = step_key("preprocess", "digest-1")
+
+    cache.store("preprocess", key, [str(output)], {"rows": 3})
+    output.write_text("overwritten")
+
+    manifest = cache.restore("preprocess", key)
+
+    assert manifest["result"] == {"rows": 3}
+    assert output.read_text() == "first run"
+
+
+def test_changed_inputs_miss(cache, tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a,b\n1,2\n")
+    key = step_key("preprocess", file_digest(str(data)))
+    cache.store("preprocess", key, [], None)
+
+    data.write_text("a,b\n1,3\n")
+    changed_key = step_key("preprocess", file_digest(str(data)))
+
+    assert changed_key != key
+    assert cache.restore("preprocess", changed_key) is None
+
+
+def test_disabled_cache_never_hits(tmp_path):
+    cache = StepCache(root=str(tmp_path / "cache"), enabled=False)
+    cache.store("select", "key", [], "3")
+
+    assert cache.restore("select", "key") is None
@@ -0,0 +1,44 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("mlflow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import src.sweep as sweep  # noqa: E402
+
+
+def test_expand_grid_supports_lists_and_ranges():
+    grid = {
+        "max_depth": [4, 8],
+        "min_samples_leaf": {"low": 1, "high": 100, "num": 3, "log": True, "type": "int"},
+    }
+
+    trials = sweep.expand_grid(grid)
+
+    assert len(trials) == 6
+    assert {trial["min_samples_leaf"] for trial in trials} == {1, 10, 100}
+    assert {trial["max_depth"] for trial in trials} == {4, 8}
+
+
+def test_successive_halving_prunes_to_best_trial(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 3))
+    y = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(scale=0.1, size=600)
+    for name, array in {"X_train": X[:500], "X_test": X[500:], "y_train": y[:500], "y_test": y[500:]}.items():
+        np.save(tmp_path / f"{name}.npy", array)
+    sweep._init_worker(str(tmp_path), validation_size=0.2, random_state=0)
+
+    trials = [{"alpha": alpha} for alpha in (0.0, 1.0, 1000.0, 10000.0)]
+    settings = {"eta": 2, "min_fraction": 0.25}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        records = sweep.successive_halving(pool, "linear_regression", trials, 400, settings)
+
+    winner = next(record for record in records if record["winner"])
+    assert winner["params"]["alpha"] in (0.0, 1.0)
+    # The worst trials are dropped after the first rung
+    assert len(records[3]["history"]) == 1
+    assert [entry["n_rows"] for entry in winner["history"]] == [100, 200]
@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import time
+import pytest
+
+pytest.importorskip("watchdog")
+pytest.importorskip("pyarrow")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import watch_and_train  # noqa: E402
+from src.watch_and_train import NewDataHandler, RetrainQueue, RetrainScheduler  # noqa: E402
+from utils.raw_data import RAW_COLUMNS, convert_to_parquet, read_raw  # noqa: E402
+
+
+def _write_csv(path, rows):
+    lines = [",".join(RAW_COLUMNS)] + [",".join([str(i)] * len(RAW_COLUMNS)) for i in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_queue_requeues_interrupted_batch(tmp_path):
+    queue_path = str(tmp_path / "queue.json")
+    queue = RetrainQueue(queue_path)
+    queue.add("/data/1.csv")
+    queue.take()
+    queue.add("/data/2.csv")
+
+    restarted = RetrainQueue(queue_path)
+
+    assert restarted.pending == ["/data/1.csv", "/data/2.csv"]
+    assert restarted.running == []
+
+
+def test_convert_merges_files_and_skips_bad_schema(tmp_path):
+    first = _write_csv(tmp_path / "1.csv", [1, 2])
+    second = _write_csv(tmp_path / "2.csv", [3])
+    bad = tmp_path / "bad.csv"
+    bad.write_text("a,b\n1,2\n")
+    output = str(tmp_path / "batch.parquet")
+
+    assert convert_to_parquet([first, str(bad), second], output) == 2
+    df = read_raw(output)
+    assert list(df.columns) == RAW_COLUMNS
+    assert df["MedInc"].tolist() == [1.0, 2.0, 3.0]
+    assert (df.dtypes == "float64").all()
+
+
+def test_convert_skips_a_file_malformed_after_its_first_chunk(tmp_path):
+    good = _write_csv(tmp_path / "good.csv", [1])
+    malformed = tmp_path / "malformed.csv"
+    _write_csv(malformed, [7, 8, 9])
+    with open(malformed, "a") as f:
+        f.write(",".join(["x"] * len(RAW_COLUMNS)) + "\n")
+    output = str(tmp_path / "batch.parquet")
+
+    assert convert_to_parquet([str(malformed), good], output, chunk_rows=2) == 1
+    assert read_raw(output)["MedInc"].tolist() == [1.0]
+    assert not os.path.exists(f"{output}.part")
+
+
+def test_burst_is_coalesced_into_one_run(tmp_path):
+    runs, rows, active, overlap = [], [], [0], []
+    lock = threading.Lock()
+
+    def runner(data_path, use_cache):
+        with lock:
+            active[0] += 1
+            overlap.append(active[0] > 1)
+        runs.append(data_path)
+        rows.append(len(read_raw(data_path)))
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return 0
+
+    scheduler = RetrainScheduler(
+        RetrainQueue(str(tmp_path / "queue.json")), runner=runner,
+        debounce_seconds=0.2, stable_seconds=0.01, batch_dir=str(tmp_path / "batches")
+    )
+    scheduler.start()
+    for i in range(5):
+        scheduler.submit(_write_csv(tmp_path / f"{i}.csv", [i]))
+    deadline = time.monotonic() + 5
+    while not runs and time.monotonic() < deadline:
+        time.sleep(0.05)
+    scheduler.stop(timeout=5)
+
+    assert len(runs) == 1
+    assert not any(overlap)
+    assert runs[0].endswith(".parquet")
+    assert rows == [5]
+    assert not os.path.exists(runs[0])
+
+
+def test_retrain_request_batch_skips_the_step_cache(tmp_path, monkeypatch):
+    trigger = _write_csv(tmp_path / "housing.csv", [1, 2])
+    monkeypatch.setattr(watch_and_train, "RETRAIN_TRIGGER_DATA_PATH", trigger)
+    runs = []
+    scheduler = RetrainScheduler(
+        RetrainQueue(str(tmp_path / "queue.json")), runner=lambda path, use_cache: runs.append(use_cache),
+        stable_seconds=0.01, batch_dir=str(tmp_path / "batches")
+    )
+
+    scheduler.submit(_write_csv(tmp_path / "new.csv", [3]))
+    scheduler.run_batch()
+    scheduler.submit(trigger)
+    scheduler.run_batch()
+
+    assert runs == [True, False]
+
+
+def test_files_are_polled_together(tmp_path):
+    paths = [_write_csv(tmp_path / f"{i}.csv", [i]) for i in range(10)]
+    missing = str(tmp_path / "missing.csv")
+    start = time.monotonic()
+
+    stable = watch_and_train.wait_until_stable(paths + [missing], stable_seconds=0.1)
+
+    assert stable == paths
+    assert time.monotonic() - start < 0.5
+
+
+def test_retrain_request_queues_training_data(tmp_path, monkeypatch):
+    class Scheduler:
+        submitted = []
+
+        def submit(self, path):
+            self.submitted.append(path)
+
+    monkeypatch.setattr(watch_and_train, "WATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(watch_and_train, "RETRAIN_TRIGGER_DATA_PATH", "data/raw/housing.parquet")
+    request = tmp_path / "drift-1-1.retrain.json"
+    request.write_text('{"reason": "drift", "features": ["MedInc"]}')
+    (tmp_path / "notes.json").write_text("{}")
+
+    handler = NewDataHandler(Scheduler())
+    handler._handle(str(tmp_path / "notes.json"))
+    handler._handle(str(request))
+
+    assert Scheduler.submitted == ["data/raw/housing.parquet"]
+    assert not request.exists()
+
+
+def test_failed_batch_is_dropped_and_the_scheduler_keeps_running(tmp_path, monkeypatch):
+    runs = []
+    queue = RetrainQueue(str(tmp_path / "queue.json"))
+    scheduler = RetrainScheduler(
+        queue, runner=lambda path, use_cache: runs.append(path),
+        debounce_seconds=0.05, stable_seconds=0.01, batch_dir=str(tmp_path / "batches")
+    )
+
+    def convert_once_broken(paths, output_path):
+        monkeypatch.setattr(watch_and_train, "convert_to_parquet", convert_to_parquet)
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(watch_and_train, "convert_to_parquet", convert_once_broken)
+    scheduler.start()
+    scheduler.submit(_write_csv(tmp_path / "1.csv", [1]))
+    deadline = time.monotonic() + 5
+    while (len(queue) or queue.running) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert RetrainQueue(str(tmp_path / "queue.json")).pending == []
+
+    scheduler.submit(_write_csv(tmp_path / "2.csv", [2]))
+    while not runs and time.monotonic() < deadline:
+        time.sleep(0.05)
+    scheduler.stop(timeout=5)
+    assert len(runs) == 1
@@ -1,8 +1,18 @@
+from functools import lru_cache
 from pathlib import Path
 import yaml
 import joblib
 import os
+import numpy as np
+import mlflow
 from dotenv import load_dotenv
+from sklearn.pipeline import Pipeline
+
+# Scaler fitted by src/preprocess.py
+SCALER_PATH = os.path.join("models", "scaler.pkl")
+# Train/test arrays written by src/preprocess.py
+PROCESSED_DIR = "data/processed"
+EXPERIMENT_NAME = "california_housing"
 
 
 def load_config():
@@ -18,6 +28,52 @@ def save_model(model, path):
     joblib.dump(model, path)
 
 
+def load_processed_data(data_dir=PROCESSED_DIR, mmap_mode=None):
+    """
+    Load the processed train/test arrays.
+
+    With ``mmap_mode="r"`` the arrays are memory-mapped read-only, so every
+    process that maps them shares the same pages instead of holding a copy.
+
+    Returns:
+        Tuple of (X_train, X_test, y_train, y_test).
+    """
+    return tuple(
+        np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in ("X_train", "X_test", "y_train", "y_test")
+    )
+
+
+def available_cpus():
+    """Number of CPUs this process may run on (respects container cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=None)
+def configure_mlflow(experiment_name=EXPERIMENT_NAME):
+    """Point MLflow at the tracking server and experiment, once per process."""
+    tracking_url = os.getenv("MLFLOW_TRACKING_URI")
+    mlflow.set_tracking_uri(tracking_url)
+    mlflow.set_experiment(experiment_name)
+    return tracking_url
+
+
+def fuse_scaler(model, scaler_path=SCALER_PATH):
+    """
+    Wrap a model trained on scaled features with the fitted scaler.
+
+    The returned pipeline takes raw features, so the served artifact applies
+    the same preprocessing as training. Returns the model unchanged when no
+    scaler was saved (preprocessing ran with scale=False).
+    """
+    if not os.path.exists(scaler_path):
+        return model
+    scaler = joblib.load(scaler_path)
+    return Pipeline([("scaler", scaler), ("model", model)])
+
+
 def load_environment_variables():
     """Load environment variables from .env file."""
     if os.environ.get("DOCKER_ENV", "false").lower() == "true":
@@ -0,0 +1,135 @@
+"""Versioned, append-only store of processed training data.
+
+Each batch of new data becomes an immutable segment of raw (unscaled)
+feature arrays split into train and test rows. The store also keeps the
+running quantile sketch behind the outlier bounds and the incrementally
+fitted StandardScaler, so appending a batch only touches the new rows."""
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+import joblib
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DATA_STORE_DIR = os.getenv("DATA_STORE_DIR", os.path.join("data", "store"))
+STATE_FILE = "state.pkl"
+SCALER_FILE = "scaler.pkl"
+MANIFEST_FILE = "manifest.json"
+ARRAY_NAMES = ("X_train", "X_test", "y_train", "y_test")
+
+
+class ProcessedDataStore:
+    """
+    Append-only segments plus the running preprocessing state.
+
+    Layout: ``<root>/segments/<name>/{X_train,X_test,y_train,y_test}.npy``
+    and ``<root>/state.pkl`` holding the version, segment list, source
+    digests, quantile sketch and scaler. ``manifest.json`` mirrors the
+    segment list for inspection, and ``scaler.pkl`` holds the scaler that
+    models trained on the store are fused with. A segment is written to a
+    temporary directory and renamed into place before the state that
+    references it is replaced, so an interrupted append leaves the previous
+    version intact.
+    """
+
+    def __init__(self, root: str = DATA_STORE_DIR):
+        self.root = root
+        self.version = 0
+        self.segments = []
+        self.sources = []
+        self.sketch = None
+        self.scaler = None
+        state_path = os.path.join(root, STATE_FILE)
+        if os.path.exists(state_path):
+            self.__dict__.update(joblib.load(state_path))
+
+    def has_source(self, digest: str) -> bool:
+        """Whether a batch with this content digest was already appended."""
+        return digest in self.sources
+
+    @property
+    def scaler_path(self) -> str:
+        return os.path.join(self.root, SCALER_FILE)
+
+    @property
+    def n_rows(self) -> dict:
+        return {
+            "train": sum(segment["n_train"] for segment in self.segments),
+            "test": sum(segment["n_test"] for segment in self.segments),
+        }
+
+    def append(self, arrays: dict, source: str, sketch, scaler) -> dict:
+        """
+        Add a segment and the preprocessing state that produced it.
+
+        Args:
+            arrays (dict): X_train, X_test, y_train and y_test of the batch.
+            source (str): Content digest of the batch, used to skip re-appends.
+
+        Returns:
+            The new segment's manifest entry.
+        """
+        name = f"seg-{self.version + 1:06d}"
+        segments_dir = os.path.join(self.root, "segments")
+        os.makedirs(segments_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=segments_dir)
+        try:
+            for array_name in ARRAY_NAMES:
+                np.save(os.path.join(tmp_dir, f"{array_name}.npy"), arrays[array_name])
+            os.replace(tmp_dir, os.path.join(segments_dir, name))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        segment = {
+            "name": name,
+            "source": source,
+            "n_train": int(len(arrays["y_train"])),
+            "n_test": int(len(arrays["y_test"])),
+        }
+        self.version += 1
+        self.segments = self.segments + [segment]
+        self.sources = self.sources + [source]
+        self.sketch, self.scaler = sketch, scaler
+        self._save()
+        logger.info(f"Appended {name} ({segment['n_train']} train, {segment['n_test']} test rows) "
+                    f"to {self.root}, version {self.version}")
+        return segment
+
+    def load_segment(self, name: str, mmap_mode: Optional[str] = "r") -> tuple:
+        """Return a segment's raw (X_train, X_test, y_train, y_test)."""
+        segment_dir = os.path.join(self.root, "segments", name)
+        return tuple(
+            np.load(os.path.join(segment_dir, f"{array_name}.npy"), mmap_mode=mmap_mode)
+            for array_name in ARRAY_NAMES
+        )
+
+    def load_split(self, split: str, names: Optional[list] = None) -> tuple:
+        """Concatenate one split ("train" or "test") across the named segments, or every segment."""
+        index = {"train": (0, 2), "test": (1, 3)}[split]
+        names = [segment["name"] for segment in self.segments] if names is None else names
+        parts = [self.load_segment(name) for name in names]
+        X = np.concatenate([part[index[0]] for part in parts]) if parts else np.empty((0, 0))
+        y = np.concatenate([part[index[1]] for part in parts]) if parts else np.empty(0)
+        return X, y
+
+    def _save(self):
+        state = {
+            "version": self.version,
+            "segments": self.segments,
+            "sources": self.sources,
+            "sketch": self.sketch,
+            "scaler": self.scaler,
+        }
+        tmp_path = os.path.join(self.root, f"{STATE_FILE}.tmp")
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, os.path.join(self.root, STATE_FILE))
+        if self.scaler is not None:
+            joblib.dump(self.scaler, f"{self.scaler_path}.tmp")
+            os.replace(f"{self.scaler_path}.tmp", self.scaler_path)
+        with open(os.path.join(self.root, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "segments": self.segments}, f, indent=2)
@@ -0,0 +1,98 @@
+"""Reference feature statistics for the API's drift monitor.
+
+Preprocessing records, for every feature of the training data, the mean,
+variance and a histogram over fixed bins whose edges are the reference
+deciles. The API bins served traffic with the same edges and compares the
+two histograms (PSI, binned KS), so the reference has to be written with
+exactly the binning rule used by ``api/drift.py``: a value falls in the bin
+given by the number of inner edges strictly below it."""
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+
+REFERENCE_STATS_PATH = os.path.join("models", "reference_stats.json")
+REFERENCE_BINS = 10
+
+
+def bin_counts(X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Count the rows of ``X`` falling in each feature's bins.
+
+    Args:
+        X: Array of shape (n_rows, n_features).
+        edges: Inner bin edges of shape (n_features, n_bins - 1).
+
+    Returns:
+        Array of shape (n_features, n_bins).
+    """
+    n_features, n_bins = edges.shape[0], edges.shape[1] + 1
+    index = (X[:, :, None] > edges[None, :, :]).sum(axis=2)
+    offsets = np.arange(n_features) * n_bins
+    return np.bincount((index + offsets).ravel(), minlength=n_features * n_bins).reshape(n_features, n_bins)
+
+
+def decile_edges(quantiles: np.ndarray) -> np.ndarray:
+    """Turn (n_bins - 1, n_features) quantiles into (n_features, n_bins - 1) edges."""
+    return np.ascontiguousarray(np.asarray(quantiles, dtype=np.float64).T)
+
+
+class ReferenceBuilder:
+    """
+    Accumulates reference statistics chunk by chunk.
+
+    Mean and variance are merged with Chan's parallel update, so feeding
+    chunks gives the same result as one pass over all rows.
+    """
+
+    def __init__(self, columns: list, edges: np.ndarray):
+        self.columns = list(columns)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        n_features = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.counts = np.zeros((n_features, self.edges.shape[1] + 1), dtype=np.int64)
+
+    def update(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        n = X.shape[0]
+        if n == 0:
+            return
+        mean = X.mean(axis=0)
+        m2 = ((X - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.counts += bin_counts(X, self.edges)
+
+    def to_dict(self) -> dict:
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "features": self.columns,
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "var": (self.m2 / max(self.count - 1, 1)).tolist(),
+            "edges": self.edges.tolist(),
+            "proportions": (self.counts / max(self.count, 1)).tolist(),
+        }
+
+
+def compute_reference(X: np.ndarray, columns: list, n_bins: int = REFERENCE_BINS) -> dict:
+    """Reference statistics of an in-memory feature matrix, binned at its deciles."""
+    X = np.asarray(X, dtype=np.float64)
+    edges = decile_edges(np.quantile(X, np.linspace(0, 1, n_bins + 1)[1:-1], axis=0))
+    builder = ReferenceBuilder(columns, edges)
+    builder.update(X)
+    return builder.to_dict()
+
+
+def save_reference(reference: dict, path: str = REFERENCE_STATS_PATH) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(reference, f)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,78 @@
+"""Prometheus textfile export of training pipeline step timings.
+
+The pipeline is a batch job with no HTTP endpoint to scrape, so step
+durations are written to ``<PIPELINE_METRICS_DIR>/<pipeline>.prom``, which
+node_exporter's textfile collector (``--collector.textfile.directory``)
+picks up. Each run replaces its file, so the series always describe the
+most recent run."""
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PIPELINE_METRICS_DIR = os.getenv("PIPELINE_METRICS_DIR", os.path.join(".cache", "metrics"))
+
+
+class PipelineMetrics:
+    """
+    Step durations of one pipeline run, written out as a Prometheus textfile.
+
+    Steps are labeled with the candidate model they train ("" for shared
+    steps) and whether they ran or were restored from the step cache.
+    """
+
+    def __init__(self, pipeline: str = "training", metrics_dir: str = PIPELINE_METRICS_DIR):
+        self.pipeline = pipeline
+        self.path = os.path.join(metrics_dir, f"{pipeline}.prom") if metrics_dir else None
+        self.registry = CollectorRegistry()
+        self.step_seconds = Gauge(
+            "pipeline_step_duration_seconds",
+            "Wall-clock seconds spent in a pipeline step during the last run",
+            ["pipeline", "step", "model", "status"], registry=self.registry
+        )
+        self.run_seconds = Gauge(
+            "pipeline_duration_seconds",
+            "Wall-clock seconds of the last pipeline run",
+            ["pipeline", "status"], registry=self.registry
+        )
+        self.last_run = Gauge(
+            "pipeline_last_run_timestamp_seconds",
+            "Unix time at which the last pipeline run finished",
+            ["pipeline", "status"], registry=self.registry
+        )
+
+    def observe(self, step: str, seconds: float, model: str = "", status: str = "run"):
+        self.step_seconds.labels(self.pipeline, step, model, status).set(seconds)
+
+    @contextmanager
+    def step(self, step: str, model: str = ""):
+        """
+        Time the enclosed block as ``step``.
+
+        Yields a dict; set ``"status"`` in it (e.g. to "cached") to change
+        the status label. A block that raises is recorded as "failed".
+        """
+        outcome = {"status": "run"}
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome["status"] = "failed"
+            raise
+        finally:
+            self.observe(step, time.perf_counter() - started, model, outcome["status"])
+
+    def write(self, seconds: float, status: str = "success"):
+        """Record the whole run and atomically replace the textfile."""
+        self.run_seconds.labels(self.pipeline, status).set(seconds)
+        self.last_run.labels(self.pipeline, status).set(time.time())
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_to_textfile(self.path, self.registry)
+        except OSError as e:
+            logger.warning(f"Could not write pipeline metrics to {self.path}: {e}")
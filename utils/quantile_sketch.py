@@ -0,0 +1,89 @@
+"""Mergeable approximate quantile sketch for streaming column statistics."""
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    KLL-style compactor sketch over the columns of a numeric matrix.
+
+    Rows are buffered in level 0. When a level holds more than ``k`` rows,
+    each column is sorted and every other value is promoted to the next
+    level with twice the weight, so memory stays at O(k log(n / k)) rows
+    regardless of how many rows are seen. Two sketches over the same columns
+    can be merged, which makes the sketch usable across chunks, files and
+    incremental batches.
+    """
+
+    def __init__(self, n_columns: int, k: int = 2048, seed: int = 0):
+        self.n_columns = n_columns
+        self.k = k
+        self.count = 0
+        self._levels = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, X: np.ndarray) -> "QuantileSketch":
+        """Add a (n_rows, n_columns) block of values."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_columns)
+        if X.shape[0] == 0:
+            return self
+        self.count += X.shape[0]
+        self._add(0, X)
+        self._compact()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch over the same columns into this one."""
+        if other.n_columns != self.n_columns:
+            raise ValueError("Cannot merge sketches over different columns")
+        for level, values in enumerate(other._levels):
+            if values.shape[0]:
+                self._add(level, values)
+        self.count += other.count
+        self._compact()
+        return self
+
+    def quantile(self, q) -> np.ndarray:
+        """
+        Approximate per-column quantiles.
+
+        Returns:
+            Array of shape (n_columns,) for a scalar ``q``, or
+            (len(q), n_columns) for a sequence of quantiles.
+        """
+        if self.count == 0:
+            raise ValueError("Quantile of an empty sketch")
+        values = np.concatenate([v for v in self._levels if v.shape[0]], axis=0)
+        weights = np.concatenate([
+            np.full(v.shape[0], 2.0 ** level) for level, v in enumerate(self._levels) if v.shape[0]
+        ])
+        order = np.argsort(values, axis=0, kind="stable")
+        sorted_values = np.take_along_axis(values, order, axis=0)
+        cumulative = np.cumsum(weights[order], axis=0)
+        total = cumulative[-1]
+
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        result = np.empty((qs.shape[0], self.n_columns))
+        for i, quantile in enumerate(qs):
+            # First position whose cumulative weight reaches the target rank
+            index = np.argmax(cumulative >= quantile * total, axis=0)
+            result[i] = sorted_values[index, np.arange(self.n_columns)]
+        return result[0] if np.ndim(q) == 0 else result
+
+    def _add(self, level: int, values: np.ndarray):
+        while len(self._levels) <= level:
+            self._levels.append(np.empty((0, self.n_columns)))
+        self._levels[level] = np.concatenate([self._levels[level], values], axis=0)
+
+    def _compact(self):
+        level = 0
+        while level < len(self._levels):
+            values = self._levels[level]
+            if values.shape[0] > self.k:
+                values = np.sort(values, axis=0)
+                # An odd leftover stays at this level so no weight is lost
+                keep = values[-1:] if values.shape[0] % 2 else values[:0]
+                pairs = values[:values.shape[0] - keep.shape[0]]
+                offset = int(self._rng.integers(2))
+                self._levels[level] = keep
+                self._add(level + 1, pairs[offset::2])
+            level += 1
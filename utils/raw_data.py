@@ -0,0 +1,158 @@
+"""Typed reading and writing of raw housing data in CSV, Parquet or Arrow IPC.
+
+Every column is read as float64 through an explicit schema, so nothing is
+type-inferred, and readers only materialize the requested columns. Parquet
+is the default on-disk format; CSV is still accepted everywhere and can be
+converted once with ``convert_to_parquet``."""
+import os
+from typing import Iterator, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TARGET_COLUMN = "MedHouseVal"
+FEATURE_COLUMNS = [
+    "MedInc", "HouseAge", "AveRooms", "AveBedrms",
+    "Population", "AveOccup", "Latitude", "Longitude",
+]
+RAW_COLUMNS = FEATURE_COLUMNS + [TARGET_COLUMN]
+RAW_SCHEMA = pa.schema([(column, pa.float64()) for column in RAW_COLUMNS])
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def raw_format(path: str) -> str:
+    """Return "parquet", "arrow" or "csv" based on the file extension."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+
+def _schema_for(columns: list) -> pa.Schema:
+    return pa.schema([RAW_SCHEMA.field(column) for column in columns])
+
+
+def read_raw_table(path: str, columns: Optional[list] = None) -> pa.Table:
+    """
+    Read a raw data file as an Arrow table with float64 columns.
+
+    Args:
+        columns (list): Columns to read; defaults to every schema column.
+
+    Raises:
+        KeyError: If a requested column is missing from the file.
+    """
+    columns = list(columns or RAW_COLUMNS)
+    fmt = raw_format(path)
+    if fmt == "parquet":
+        table = pq.read_table(path, columns=columns)
+    elif fmt == "arrow":
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types={column: pa.float64() for column in columns},
+            include_columns=columns,
+        ))
+    missing = set(columns) - set(table.column_names)
+    if missing:
+        raise KeyError(f"{path} is missing columns: {sorted(missing)}")
+    return table.select(columns).cast(_schema_for(columns))
+
+
+def read_raw(path: str, columns: Optional[list] = None) -> pd.DataFrame:
+    """Read a raw data file into a float64 DataFrame."""
+    return read_raw_table(path, columns).to_pandas()
+
+
+def iter_raw_chunks(path: str, chunk_rows: int, columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """Yield float64 DataFrames of at most ``chunk_rows`` rows."""
+    columns = list(columns or RAW_COLUMNS)
+    schema = _schema_for(columns)
+    fmt = raw_format(path)
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield pa.Table.from_batches([batch]).cast(schema).to_pandas()
+    elif fmt == "arrow":
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.cast(schema).to_batches(max_chunksize=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, chunksize=chunk_rows, usecols=columns,
+            dtype={column: "float64" for column in columns}
+        )
+
+
+def write_raw(df: pd.DataFrame, path: str) -> str:
+    """Write a DataFrame in the format implied by ``path``'s extension."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fmt = raw_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return path
+    table = pa.Table.from_pandas(df[RAW_COLUMNS], preserve_index=False).cast(RAW_SCHEMA)
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")
+    return path
+
+
+def raw_columns(path: str) -> list:
+    """Column names of a raw data file, read from its header or footer only."""
+    fmt = raw_format(path)
+    if fmt == "parquet":
+        return pq.read_schema(path).names
+    if fmt == "arrow":
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.names
+    with open(path, encoding="utf-8") as f:
+        return [name.strip().strip('"') for name in f.readline().rstrip("\r\n").split(",")]
+
+
+def convert_to_parquet(paths: list, output_path: str, chunk_rows: int = 100_000) -> int:
+    """
+    Stream one or more raw files into a single Parquet file.
+
+    Each file is first converted on its own into a staging file, which is
+    appended to ``output_path`` only once the whole file has been read, so a
+    file that turns out to be malformed halfway through leaves nothing
+    behind. Files that lack a schema column or cannot be parsed are skipped
+    with a warning.
+
+    Returns:
+        Number of files written to ``output_path``.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    part_path = f"{output_path}.part"
+    converted = 0
+    try:
+        with pq.ParquetWriter(output_path, RAW_SCHEMA) as writer:
+            for path in paths:
+                try:
+                    missing = set(RAW_COLUMNS) - set(raw_columns(path))
+                    if missing:
+                        logger.warning(f"Skipping {path}: missing columns {sorted(missing)}")
+                        continue
+                    with pq.ParquetWriter(part_path, RAW_SCHEMA) as part:
+                        for chunk in iter_raw_chunks(path, chunk_rows):
+                            part.write_table(pa.Table.from_pandas(chunk, schema=RAW_SCHEMA, preserve_index=False))
+                except (OSError, ValueError, pa.ArrowException) as e:
+                    logger.warning(f"Skipping {path}: {e}")
+                    continue
+                for batch in pq.ParquetFile(part_path).iter_batches(batch_size=chunk_rows):
+                    writer.write_batch(batch)
+                converted += 1
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return converted
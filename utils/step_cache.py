@@ -0,0 +1,110 @@
+"""Content-addressed cache for training pipeline steps.
+
+Each step is keyed by a hash of everything that determines its outputs
+(input file digests, config section, source code of the step, upstream step
+keys). Outputs of a finished step are copied into the cache under that key;
+when the pipeline runs again with the same key the outputs are copied back
+and the step is skipped."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STEP_CACHE_DIR = os.getenv("STEP_CACHE_DIR", os.path.join(".cache", "steps"))
+MANIFEST_FILE = "manifest.json"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_digest(*paths: str) -> str:
+    """SHA-256 over the source files that implement a step."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def step_key(*parts) -> str:
+    """Combine JSON-serializable key parts into a single hex key."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StepCache:
+    """
+    Local artifact cache of pipeline step outputs.
+
+    Layout: ``<root>/<step>/<key>/manifest.json`` plus a copy of every output
+    file under ``files/``. Entries are written to a temporary directory and
+    renamed into place so a crashed run never leaves a half-written entry.
+    """
+
+    def __init__(self, root: str = STEP_CACHE_DIR, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+
+    def _entry_dir(self, step: str, key: str) -> str:
+        return os.path.join(self.root, step, key)
+
+    def lookup(self, step: str, key: str) -> Optional[dict]:
+        """Return the manifest of a cached step, or None on a miss."""
+        if not self.enabled:
+            return None
+        manifest_path = os.path.join(self._entry_dir(step, key), MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def restore(self, step: str, key: str) -> Optional[dict]:
+        """
+        Copy a cached step's outputs back into place.
+
+        Returns:
+            The cached manifest, or None if the step has to run.
+        """
+        manifest = self.lookup(step, key)
+        if manifest is None:
+            return None
+        files_dir = os.path.join(self._entry_dir(step, key), "files")
+        for index in range(len(manifest["outputs"])):
+            if not os.path.exists(os.path.join(files_dir, str(index))):
+                logger.warning("Cache entry %s/%s is incomplete; re-running step.", step, key[:12])
+                return None
+        for index, path in enumerate(manifest["outputs"]):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.copy2(os.path.join(files_dir, str(index)), path)
+        return manifest
+
+    def store(self, step: str, key: str, outputs: list, result=None) -> None:
+        """Copy a finished step's output files into the cache."""
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(step, key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir))
+        try:
+            os.makedirs(os.path.join(tmp_dir, "files"))
+            for index, path in enumerate(outputs):
+                shutil.copy2(path, os.path.join(tmp_dir, "files", str(index)))
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump({"step": step, "key": key, "outputs": list(outputs), "result": result}, f)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_dir, entry_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise